@@ -1,13 +1,21 @@
-import os
 from dotenv import dotenv_values
 import streamlit as st
-from groq import Groq
-import pdfkit
-import pdfplumber
-import re
-import requests
-from datetime import datetime
-import pandas as pd
+import time
+# Only light modules are imported here. pandas, pdfplumber, numpy and the Groq
+# SDK are imported where their feature is first used, so a cold start renders
+# the page without paying for them (see benchmarks/cold_start.py)
+from taxnova.chat_export import render_chat_pdf
+from taxnova.chat_store import ChatStore
+from taxnova.chat_stream import StreamStats
+from taxnova.context_window import ContextWindow
+from taxnova.form16_cache import ExtractionCache, document_hash
+from taxnova.itr_outbox import FAILED, FILED, REJECTED, ITROutbox, load_portal
+from taxnova.metrics import metrics
+
+# Every script run (initial load or widget rerun) is one measured request
+run_started = time.perf_counter()
+metrics.begin_request("run")
+metrics.inc("script_runs")
 if "theme" not in st.session_state:
     st.session_state.theme = "light"
 
@@ -464,64 +472,187 @@ with col_header:
         if st.button(mode_label, key="theme_toggle"):
             toggle_theme()
 
-def parse_groq_stream(stream):
-    response_content = ""
-    for chunk in stream:
-        if chunk.choices and chunk.choices[0].delta.content is not None:
-            response_content += chunk.choices[0].delta.content
-            yield chunk.choices[0].delta.content
-    return response_content
-
-def extract_form16_data(uploaded_file):
-    with pdfplumber.open(uploaded_file) as pdf:
-        extracted_text = "\n".join([page.extract_text() for page in pdf.pages if page.extract_text()])
-    
-    # Enhanced extraction with improved regex patterns
-    gross_salary = re.search(r'Gross Salary.*?(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)', extracted_text, re.IGNORECASE)
-    tds = re.search(r'Tax Deducted at Source.*?(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)', extracted_text, re.IGNORECASE)
-    taxable_income = re.search(r'Taxable Income.*?(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)', extracted_text, re.IGNORECASE)
-    
-    return {
-        "Gross Salary": float(gross_salary.group(1).replace(',', '')) if gross_salary else 0,
-        "TDS Deducted": float(tds.group(1).replace(',', '')) if tds else 0,
-        "Taxable Income": float(taxable_income.group(1).replace(',', '')) if taxable_income else 0,
-    }
-
-def identify_deductions(income):
-    deductions = {
-        "Section 80C (Investments)": min(income * 0.1, 150000),
-        "Section 80D (Health Insurance)": 25000,
-        "Section 24 (Home Loan Interest)": 200000
-    }
-    return deductions
-
-def auto_fill_itr(data):
-    """Simulates automatic ITR filing using an API"""
-    return {
-        "status": "Success",
-        "message": "Your ITR has been successfully filed!",
-        "reference_id": f"ITR{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    }
-
 def format_currency(value):
     return f"₹{value:,.2f}"
 
-# Load API keys
-try:
-    secrets = dotenv_values(".env")
-    GROQ_API_KEY = secrets["GROQ_API_KEY"]
-except Exception:
-    secrets = st.secrets
-    GROQ_API_KEY = secrets["GROQ_API_KEY"]
-
-os.environ["GROQ_API_KEY"] = GROQ_API_KEY
+# Load API keys and settings from Streamlit secrets and .env, where .env wins;
+# read once per process instead of on every rerun
+@st.cache_resource
+def load_config():
+    from streamlit.errors import StreamlitSecretNotFoundError
+
+    try:
+        config = dict(st.secrets)
+    except StreamlitSecretNotFoundError:
+        # No secrets.toml: run without them and say so where a key is needed
+        config = {}
+    config.update((key, value) for key, value in dotenv_values(".env").items() if value is not None)
+    return config
+
+secrets = load_config()
 INITIAL_RESPONSE = secrets.get("INITIAL_RESPONSE", "Hello! I'm here to help with tax finalization.")
 CHAT_CONTEXT = secrets.get("CHAT_CONTEXT", "You are a tax assistant helping users navigate tax finalization. Offer guidance on tax forms, deductions, credits, and filing deadlines.")
 
-client = Groq(api_key=GROQ_API_KEY)
+# Stage timings go to optional JSON-lines / Prometheus files, configured once per process
+@st.cache_resource
+def configure_metrics():
+    metrics.configure(
+        jsonl_path=secrets.get("METRICS_JSONL_PATH"),
+        prometheus_path=secrets.get("METRICS_PROMETHEUS_PATH"),
+    )
+
+configure_metrics()
+
+# One pooled, rate-limit aware client per endpoint, shared by every session. Groq
+# is the default endpoint; others used in LLM_ROUTES (model@name) are configured
+# with LLM_ENDPOINT_<NAME>_BASE_URL and, if their key differs, LLM_ENDPOINT_<NAME>_API_KEY
+@st.cache_resource
+def get_llm_client(endpoint="groq"):
+    from taxnova.llm_client import LLMClient
+
+    prefix = f"LLM_ENDPOINT_{endpoint.upper()}_"
+    return LLMClient(
+        api_key=secrets.get(prefix + "API_KEY", secrets["GROQ_API_KEY"]),
+        base_url=secrets.get("GROQ_BASE_URL") if endpoint == "groq" else secrets[prefix + "BASE_URL"],
+        timeout=float(secrets.get("LLM_TIMEOUT_SECONDS", 30)),
+        max_retries=int(secrets.get("LLM_MAX_RETRIES", 4)),
+        max_concurrency=int(secrets.get("LLM_MAX_CONCURRENCY", 8)),
+    )
+
+# Coalesces identical in-flight questions into one model stream and lets chat
+# turns go ahead of background briefings when close to the rate limit
+@st.cache_resource
+def get_llm_scheduler(endpoint="groq"):
+    from taxnova.llm_scheduler import LLMScheduler
+
+    return LLMScheduler(
+        get_llm_client(endpoint),
+        background_slots=int(secrets.get("LLM_BACKGROUND_SLOTS", 0)) or None,
+        throttle_cooldown=float(secrets.get("LLM_THROTTLE_COOLDOWN_SECONDS", 20)),
+    )
+
+# Picks the model per request (LLM_ROUTES) and fails over when one is degraded
+@st.cache_resource
+def get_model_router():
+    from taxnova.assistant import DEFAULT_MODEL
+    from taxnova.model_router import ModelRouter, parse_routes
+
+    return ModelRouter(
+        parse_routes(secrets.get("LLM_ROUTES", DEFAULT_MODEL), get_llm_scheduler),
+        ttft_budget_ms=float(secrets.get("LLM_TTFT_BUDGET_MS", 1500)),
+        first_token_timeout=float(secrets.get("LLM_FIRST_TOKEN_TIMEOUT_SECONDS", 15)),
+    )
+
+# Memory-mapped tax-rules index, opened once per process
+@st.cache_resource
+def get_retrieval_index():
+    from taxnova.retrieval import RetrievalIndex
+
+    return RetrievalIndex.open(index_dir=secrets.get("RETRIEVAL_INDEX_DIR"))
 
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = [{"role": "assistant", "content": INITIAL_RESPONSE}]
+# Shared across sessions so common questions skip the Groq round trip
+@st.cache_resource
+def get_answer_cache():
+    from taxnova.answer_cache import AnswerCache
+
+    return AnswerCache(
+        max_entries=int(secrets.get("ANSWER_CACHE_ENTRIES", 512)),
+        ttl_seconds=int(secrets.get("ANSWER_CACHE_TTL_SECONDS", 24 * 3600)),
+        threshold=float(secrets.get("ANSWER_CACHE_THRESHOLD", 0.95)),
+    )
+
+# Shared across reruns and sessions so each certificate is parsed only once
+@st.cache_resource
+def get_extraction_cache():
+    return ExtractionCache(
+        max_entries=int(secrets.get("FORM16_CACHE_ENTRIES", 256)),
+        disk_dir=secrets.get("FORM16_CACHE_DIR"),
+        max_disk_bytes=int(secrets.get("FORM16_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    )
+
+# Optional layout templates (python -m taxnova.form16_templates learn) let known
+# certificate formats be read from their field regions instead of the full text
+@st.cache_resource
+def get_form16_templates():
+    path = secrets.get("FORM16_TEMPLATES")
+    if not path:
+        return None
+    from taxnova.form16_templates import TemplateIndex
+
+    return TemplateIndex.load(path)
+
+# Chat turns live in SQLite; only recent messages of active sessions stay in memory
+@st.cache_resource
+def get_chat_store():
+    return ChatStore(
+        secrets.get("CHAT_DB_PATH", "taxnova_chat.db"),
+        tail_messages=int(secrets.get("CHAT_MEMORY_MESSAGES", 50)),
+        idle_seconds=int(secrets.get("CHAT_IDLE_SECONDS", 15 * 60)),
+        retention_days=int(secrets.get("CHAT_RETENTION_DAYS", 30)),
+    )
+
+# Filing requests go to a durable outbox drained by background workers; set
+# ITR_OUTBOX_WORKERS=0 to drain it from `python -m taxnova.itr_outbox work` instead
+@st.cache_resource
+def get_itr_outbox():
+    return ITROutbox(
+        secrets.get("ITR_OUTBOX_PATH", "taxnova_itr.db"),
+        portal=load_portal(secrets.get("ITR_PORTAL_BACKEND")),
+        workers=int(secrets.get("ITR_OUTBOX_WORKERS", 2)),
+        batch_size=int(secrets.get("ITR_OUTBOX_BATCH_SIZE", 20)),
+    ).start()
+
+CHAT_PAGE_SIZE = int(secrets.get("CHAT_PAGE_SIZE", 20))
+
+# Retrieval, context window, answer cache and model calls for one chat turn
+@st.cache_resource
+def get_assistant():
+    from taxnova.assistant import Assistant
+
+    return Assistant(
+        llm=get_model_router(),
+        retrieval=get_retrieval_index(),
+        answer_cache=get_answer_cache(),
+        system_prompt=CHAT_CONTEXT,
+        initial_response=INITIAL_RESPONSE,
+        top_k=int(secrets.get("RETRIEVAL_TOP_K", 3)),
+    )
+
+# First-turn briefings, generated in the background after an upload and shared by document
+@st.cache_resource
+def get_briefings():
+    from taxnova.briefing import Briefings
+
+    return Briefings(get_assistant(), max_entries=int(secrets.get("BRIEFING_CACHE_ENTRIES", 256)))
+
+def analyze_form16(uploaded_file):
+    """Extracts the certificate and runs the tax engine for the uploaded file."""
+    from taxnova.analysis import analyze_extracted
+    from taxnova.form16 import CORE_FIELDS, extract_form16_data
+
+    with metrics.span("form16_extract"):
+        templates = get_form16_templates()
+        extracted_data = get_extraction_cache().get_or_extract(
+            uploaded_file.getvalue(), lambda file: extract_form16_data(file, CORE_FIELDS, templates),
+            CORE_FIELDS, templates)
+    return {"file_id": uploaded_file.file_id, "document_hash": document_hash(uploaded_file.getvalue()),
+            **analyze_extracted(extracted_data)}
+
+# The session only keeps its chat id and how many messages are on screen
+if "chat_session_id" not in st.session_state:
+    st.session_state.chat_session_id = get_chat_store().new_session(greeting=INITIAL_RESPONSE)
+    st.session_state.chat_visible = CHAT_PAGE_SIZE
+
+# Keeps each request within the model's context window, summarizing older turns
+if "context_window" not in st.session_state:
+    st.session_state.context_window = ContextWindow(
+        budget_tokens=int(secrets.get("CHAT_CONTEXT_TOKENS", 6000)),
+        summary_tokens=int(secrets.get("CHAT_SUMMARY_TOKENS", 600)),
+    )
+
+# Per-request streaming latency (time to first token, tokens/sec)
+if "stream_stats" not in st.session_state:
+    st.session_state.stream_stats = []
 
 # Page header with updated title
 st.markdown('<div class="custom-header">'
@@ -533,7 +664,10 @@ st.markdown('<div class="custom-header">'
 col1, col2 = st.columns([2, 3])
 
 # COLUMN 1 (LEFT) - Form 16 Analysis
-with col1:
+# Each column is a fragment, so its widgets rerun only their own column
+@st.fragment
+def render_analysis_panel():
+    metrics.inc("analysis_panel_runs")
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("📄 Form 16/ Form 22 Analysis")
     
@@ -542,78 +676,112 @@ with col1:
     st.caption("form 16 for employees\n,form 22 for businessman/entrepreneurs")
     
     if uploaded_file:
-        with st.spinner("Analyzing your Form 16..."):
-            # Show progress bar for visual feedback
-            progress_bar = st.progress(0)
-            for i in range(100):
-                progress_bar.progress(i + 1)
-            
-            extracted_data = extract_form16_data(uploaded_file)
-            
-            # Success message
-            st.success("Form 16 analyzed successfully!")
-            
-            # Display extracted data in a table
-            df = pd.DataFrame({
-                "Item": extracted_data.keys(),
-                "Amount": [format_currency(val) for val in extracted_data.values()]
+        import pandas as pd
+        from taxnova.tax_engine import DEFAULT_FY
+
+        # Reuse this session's analysis until a different file is uploaded
+        analysis = st.session_state.get("form16_analysis")
+        if analysis is None or analysis["file_id"] != uploaded_file.file_id:
+            with st.spinner("Analyzing your Form 16..."):
+                analysis = analyze_form16(uploaded_file)
+            st.session_state.form16_analysis = analysis
+            # The chat gets these figures with every question, and a personalised briefing
+            # is prepared while the summary below is read
+            from taxnova.briefing import taxpayer_profile
+
+            st.session_state.taxpayer_profile = taxpayer_profile(analysis, DEFAULT_FY)
+            if "GROQ_API_KEY" in secrets:
+                get_briefings().prefetch(analysis["document_hash"], st.session_state.taxpayer_profile)
+            # Rerun the whole page so the chat column picks up the new certificate
+            st.rerun()
+        extracted_data = analysis["extracted_data"]
+        
+        # Success message
+        st.success("Form 16 analyzed successfully!")
+        
+        # Display extracted data in a table
+        df = pd.DataFrame({
+            "Item": extracted_data.keys(),
+            "Amount": [format_currency(val) for val in extracted_data.values()]
+        })
+        st.table(df)
+        
+        # Tax Calculation
+        deductions = analysis["deductions"]
+        tax_summary = analysis["tax_summary"]
+        income = tax_summary["income"]
+        total_deductions = tax_summary["total_deductions"]
+        taxable_income_after_deductions = tax_summary["taxable_after_deductions"]
+        tax_liability = tax_summary["tax_liability"]
+        tax_due = tax_summary["tax_due"]
+        
+        # Display tax breakdown
+        st.markdown("### 📊 Tax Summary")
+        col_a, col_b = st.columns(2)
+        with col_a:
+            st.metric("Total Income", format_currency(income))
+            st.metric("Total Deductions", format_currency(total_deductions))
+        with col_b:
+            st.metric("Taxable Income", format_currency(taxable_income_after_deductions))
+            st.metric("Tax Liability", format_currency(tax_liability))
+        
+        # Visual indicator for tax refund or payment due
+        if tax_due > 0:
+            st.error(f"Tax Payment Due: {format_currency(tax_due)}")
+        else:
+            st.success(f"Tax Refund Due: {format_currency(abs(tax_due))}")
+        
+        # Deductions breakdown with expandable section
+        with st.expander("View Deductions Breakdown"):
+            deductions_df = pd.DataFrame({
+                "Deduction Type": deductions.keys(),
+                "Amount": [format_currency(val) for val in deductions.values()]
             })
-            st.table(df)
-            
-            # Tax Calculation
-            income = extracted_data.get("Taxable Income", 0)
-            tds_paid = extracted_data.get("TDS Deducted", 0)
-            deductions = identify_deductions(income)
-            total_deductions = sum(deductions.values())
-            taxable_income_after_deductions = max(0, income - total_deductions)
-            
-            # Tax calculation based on income slabs
-            tax_liability = 0
-            if taxable_income_after_deductions <= 250000:
-                tax_liability = 0
-            elif taxable_income_after_deductions <= 500000:
-                tax_liability = (taxable_income_after_deductions - 250000) * 0.05
-            elif taxable_income_after_deductions <= 1000000:
-                tax_liability = 12500 + (taxable_income_after_deductions - 500000) * 0.2
+            st.table(deductions_df)
+        
+        # Regime comparison with the optimizer's recommended plan
+        with st.expander("⚖️ Old vs New Regime"):
+            regime_plan = analysis["regime_plan"]
+            old_plan, new_plan = regime_plan["old_regime"], regime_plan["new_regime"]
+            st.table(pd.DataFrame({
+                "Regime": ["Old (best deductions)", "New"],
+                "Tax incl. cess": [format_currency(old_plan["tax"]), format_currency(new_plan["tax"])],
+                "Investment needed": [format_currency(old_plan["extra_investment"]), format_currency(0)],
+            }))
+            if regime_plan["regime"] == "new":
+                st.success(f"The new regime is cheaper for FY {DEFAULT_FY}, with no investments needed.")
             else:
-                tax_liability = 112500 + (taxable_income_after_deductions - 1000000) * 0.3
-            
-            tax_due = max(0, tax_liability - tds_paid)
-            
-            # Display tax breakdown
-            st.markdown("### 📊 Tax Summary")
-            col_a, col_b = st.columns(2)
-            with col_a:
-                st.metric("Total Income", format_currency(income))
-                st.metric("Total Deductions", format_currency(total_deductions))
-            with col_b:
-                st.metric("Taxable Income", format_currency(taxable_income_after_deductions))
-                st.metric("Tax Liability", format_currency(tax_liability))
-            
-            # Visual indicator for tax refund or payment due
-            if tax_due > 0:
-                st.error(f"Tax Payment Due: {format_currency(tax_due)}")
+                allocation = ", ".join(f"Section {section}: {format_currency(amount)}"
+                                       for section, amount in regime_plan["allocation"].items() if amount)
+                st.success(f"The old regime is cheaper for FY {DEFAULT_FY} if you claim {allocation}.")
+        
+        # Auto-fill ITR Form: the request is queued and acknowledged at once; the same
+        # certificate and figures always map to the same submission, so it is filed once
+        outbox = get_itr_outbox()
+        itr_payload = {"fy": DEFAULT_FY, **extracted_data}
+        submission = outbox.find(analysis["document_hash"], itr_payload)
+        if submission is None and st.button("🚀 Auto-File ITR"):
+            submission = outbox.submit(analysis["document_hash"], itr_payload)
+        if submission is not None:
+            if submission["status"] == FILED:
+                st.success(submission["message"] or "Your ITR has been successfully filed!")
+            elif submission["status"] in (REJECTED, FAILED):
+                st.error(f"Filing did not go through: {submission['message']}")
+                # Queued again under the same idempotency key, so the portal still files it only once
+                if st.button("🔁 Retry filing"):
+                    outbox.retry(submission["reference_id"])
+                    st.rerun()
             else:
-                st.success(f"Tax Refund Due: {format_currency(abs(tax_due))}")
-            
-            # Deductions breakdown with expandable section
-            with st.expander("View Deductions Breakdown"):
-                deductions_df = pd.DataFrame({
-                    "Deduction Type": deductions.keys(),
-                    "Amount": [format_currency(val) for val in deductions.values()]
-                })
-                st.table(deductions_df)
-            
-            # Auto-fill ITR Form with improved button
-            if st.button("🚀 Auto-File ITR"):
-                with st.spinner("Filing your ITR..."):
-                    itr_response = auto_fill_itr(extracted_data)
-                    if itr_response["status"] == "Success":
-                        st.success(itr_response["message"])
-                        st.info(f"Reference ID: {itr_response['reference_id']}")
-                    else:
-                        st.error(itr_response["message"])
+                st.info("Your ITR is queued for filing; this usually takes a few minutes.")
+                st.button("🔄 Check filing status")
+            st.info(f"Reference ID: {submission['reference_id']}")
     else:
+        # The certificate was removed: forget its figures so later chat turns stop using
+        # them, and rerun the page so the chat column drops its briefing too
+        cleared = [st.session_state.pop(key, None)
+                   for key in ("form16_analysis", "taxpayer_profile", "briefed_document")]
+        if any(value is not None for value in cleared):
+            st.rerun()
         # Placeholder when no file is uploaded
         st.info("Upload your Form 16/ Form 22 PDF to automatically extract tax information and calculate your liability.")
     
@@ -640,12 +808,20 @@ with col1:
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("⚙️ Additional Features")
     
-    # Export chat functionality
-    if st.button("📥 Export Chat as PDF"):
-        with st.spinner("Generating PDF..."):
-            chat_content = "\n".join([f"{msg['role'].capitalize()}: {msg['content']}" for msg in st.session_state.chat_history])
-            pdfkit.from_string(chat_content, "TaxNova_Assistant_Chat.pdf")  # Updated file name
-            st.success("Chat exported as PDF! Download started.")
+    # Export chat functionality: the PDF is built in memory only when the
+    # button is clicked, from the history as it is at that moment
+    chat_store, chat_session_id = get_chat_store(), st.session_state.chat_session_id
+
+    def export_chat_pdf():
+        with metrics.span("pdf_export"):
+            return render_chat_pdf(chat_store.messages(chat_session_id))
+
+    st.download_button(
+        "📥 Export Chat as PDF",
+        data=export_chat_pdf,
+        file_name="TaxNova_Assistant_Chat.pdf",
+        mime="application/pdf",
+    )
     
     # Resources section with improved links
     st.markdown("### 📚 Tax Resources")
@@ -661,15 +837,57 @@ with col1:
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+with col1:
+    render_analysis_panel()
+
 # COLUMN 2 (RIGHT) - Chat Interface
-with col2:
+def show_earlier_messages():
+    st.session_state.chat_visible += CHAT_PAGE_SIZE
+
+def pending_briefing():
+    """Document hash of this session's certificate while its briefing is still to be shown."""
+    analysis = st.session_state.get("form16_analysis")
+    if analysis is None or "GROQ_API_KEY" not in secrets:
+        return None
+    document = analysis["document_hash"]
+    return None if st.session_state.get("briefed_document") == document else document
+
+def deliver_briefing(chat_store, session_id):
+    # The briefing joins the conversation as soon as it is ready; a failed one is skipped
+    document = pending_briefing()
+    if document is None:
+        return
+    briefing = get_briefings().get(document)
+    if briefing:
+        chat_store.append(session_id, "assistant", f"📋 **Your Form 16 briefing**\n\n{briefing}")
+    if briefing or not get_briefings().pending(document):
+        st.session_state.briefed_document = document
+
+def watch_briefing():
+    document = pending_briefing()
+    if document is None or not get_briefings().pending(document):
+        st.rerun()
+    st.caption("✨ Preparing a briefing on your Form 16...")
+
+@st.fragment
+def render_chat_panel():
+    metrics.inc("chat_panel_runs")
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("💬 Tax Consultation")
     
-    # Chat interface with improved display
+    chat_store = get_chat_store()
+    session_id = st.session_state.chat_session_id
+    deliver_briefing(chat_store, session_id)
+    history = chat_store.history(session_id)
+
+    # Chat interface with improved display; only the newest page is rendered
     chat_container = st.container()
     with chat_container:
-        for message in st.session_state.chat_history:
+        hidden = len(history) - st.session_state.chat_visible
+        if hidden > 0:
+            st.button(f"⬆️ Load earlier messages ({hidden} more)", key="load_earlier",
+                      on_click=show_earlier_messages)
+        for message in chat_store.recent(session_id, st.session_state.chat_visible):
             role = "user" if message["role"] == "user" else "assistant"
             avatar = "👤" if role == "user" else "🤖"
             with st.chat_message(role, avatar=avatar):
@@ -678,30 +896,77 @@ with col2:
     user_prompt = st.chat_input("Ask me any tax-related question...")
     
     if user_prompt:
+        metrics.begin_request("chat")
         with st.chat_message("user", avatar="👤"):
             st.markdown(user_prompt)
-        st.session_state.chat_history.append({"role": "user", "content": user_prompt})
-
-        messages = [{"role": "system", "content": CHAT_CONTEXT},
-                    {"role": "assistant", "content": INITIAL_RESPONSE},
-                    *st.session_state.chat_history]
-
-        with st.chat_message("assistant", avatar="🤖"):
-            with st.spinner("Thinking..."):
-                stream = client.chat.completions.create(model="llama3-8b-8192", messages=messages, stream=True)
-                response_content = "".join(parse_groq_stream(stream))
-                st.markdown(response_content)
-                st.session_state.chat_history.append({"role": "assistant", "content": response_content})
+        chat_store.append(session_id, "user", user_prompt)
+
+        if "GROQ_API_KEY" not in secrets:
+            with st.chat_message("assistant", avatar="🤖"):
+                st.error("The assistant is not configured: GROQ_API_KEY is not set in the app secrets.")
+        else:
+            from taxnova.llm_client import LLMUnavailableError
+
+            assistant = get_assistant()
+            turn = assistant.prepare(user_prompt, history, st.session_state.context_window,
+                                     profile=st.session_state.get("taxpayer_profile"))
+
+            with st.chat_message("assistant", avatar="🤖"):
+                if turn.cached_answer is not None:
+                    response_content = turn.cached_answer
+                    st.markdown(response_content)
+                else:
+                    stats = StreamStats(model=assistant.model)
+                    try:
+                        # Render tokens as they arrive instead of waiting for the full answer
+                        response_content = st.write_stream(assistant.stream(turn, stats))
+                    except LLMUnavailableError as exc:
+                        response_content = None
+                        st.error(f"The assistant is busy right now. Please try again in a moment. ({exc})")
+                    st.session_state.stream_stats = st.session_state.stream_stats[-49:] + [stats.as_dict()]
+                    assistant.remember(turn, response_content)
+                if response_content:
+                    chat_store.append(session_id, "assistant", response_content)
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+with col2:
+    render_chat_panel()
+    # Polls only while a briefing is being generated, then reruns the page to show it
+    if pending_briefing() is not None:
+        st.fragment(watch_briefing, run_every=1.5)()
+
+# Optional diagnostics panel with per-stage latency for this process
+with st.sidebar:
+    if st.checkbox("🔧 Show diagnostics", key="show_diagnostics"):
+        import pandas as pd
+
+        snapshot = metrics.snapshot()
+        st.markdown("### Stage latency (ms)")
+        if snapshot["histograms"]:
+            st.dataframe(pd.DataFrame.from_dict(snapshot["histograms"], orient="index"))
+        st.markdown("### Counters")
+        st.json(snapshot["counters"])
+        st.markdown("### Caches and model client")
+        st.json({
+            "llm_client": get_llm_scheduler().stats() if "GROQ_API_KEY" in secrets else None,
+            "model_router": get_model_router().stats() if "GROQ_API_KEY" in secrets else None,
+            "answer_cache": get_answer_cache().stats(),
+            "chat_store": get_chat_store().stats(),
+            "extraction_cache": {"hits": get_extraction_cache().hits, "misses": get_extraction_cache().misses},
+            "briefings": get_briefings().stats() if "GROQ_API_KEY" in secrets else None,
+            "last_streams": st.session_state.stream_stats[-5:],
+        })
+        st.markdown("### Recent spans")
+        st.dataframe(pd.DataFrame(snapshot["recent_spans"][-25:]))
+        st.download_button("Download Prometheus metrics", metrics.prometheus_text(),
+                           file_name="taxnova_metrics.prom", mime="text/plain")
+
 # Footer with updated name
 st.markdown(f'''
 <div style="text-align: center; padding: 1rem; margin-top: 2rem; color: {"#ffffff" if st.session_state.theme == "dark" else "#6b7280"};">
     <p>© 2025 TaxNova Assistant | Current Financial Year: 2024-25</p>
 </div>
 ''', unsafe_allow_html=True)
-GROQ_API_KEY = st.secrets["GROQ_API_KEY"]
 
-# Use the API key securely (Example: for an API request)
-headers = {"Authorization": f"Bearer {GROQ_API_KEY}"}
\ No newline at end of file
+metrics.record_span("script_run", (time.perf_counter() - run_started) * 1000)
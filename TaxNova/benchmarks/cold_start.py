@@ -0,0 +1,111 @@
+"""Cold-start budget check for the Streamlit page.
+
+Each run starts a fresh interpreter, imports Streamlit and renders app.py once
+headlessly (streamlit.testing), which is what a new container pays before the
+first page appears. The check fails when the median cold start exceeds the
+budget, or when a module the page is meant to load lazily was imported by the
+first render:
+
+    python -m benchmarks.cold_start                    # median of 3 runs vs 1500 ms
+    python -m benchmarks.cold_start --budget-ms 1000 --profile
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+# Heavy dependencies that only their feature may import
+DEFERRED_MODULES = ("pandas", "pdfplumber", "groq", "numpy", "requests", "pdfkit")
+
+# Runs in the child interpreter; prints one JSON line on stdout
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+app = AppTest.from_file({app!r}, default_timeout=120)
+app.secrets["GROQ_API_KEY"] = "cold-start-check"
+app.run()
+rendered = time.perf_counter()
+print(json.dumps({{
+    "streamlit_import_ms": (imported - started) * 1000,
+    "first_render_ms": (rendered - imported) * 1000,
+    "loaded": [name for name in {deferred!r} if name in sys.modules],
+    "exceptions": [str(exception.value) for exception in app.exception],
+}}))
+"""
+
+
+def measure(profile=False):
+    """One cold start in a new interpreter; with `profile`, also the slowest imports."""
+    command = [sys.executable]
+    if profile:
+        command += ["-X", "importtime"]
+    code = _CHILD.format(app=str(APP_DIR / "app.py"), deferred=DEFERRED_MODULES)
+    completed = subprocess.run(command + ["-c", code], cwd=APP_DIR, capture_output=True, text=True)
+    if completed.returncode:
+        raise RuntimeError(f"Cold-start run failed:\n{completed.stderr}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["cold_start_ms"] = result["streamlit_import_ms"] + result["first_render_ms"]
+    if profile:
+        result["slowest_imports"] = slowest_imports(completed.stderr)
+    return result
+
+
+def slowest_imports(importtime_output, limit=15):
+    """Top-level modules by cumulative import time, from `python -X importtime` output."""
+    imports = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented under the module that pulled them in
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            imports.append((int(cumulative) / 1000, name.strip()))
+    return [{"module": name, "ms": round(ms, 1)} for ms, name in sorted(imports, reverse=True)[:limit]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the Streamlit page's cold start against a budget.")
+    parser.add_argument("--budget-ms", type=float, default=1500,
+                        help="Allowed median cold start, Streamlit import included (default: 1500)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to measure")
+    parser.add_argument("--profile", action="store_true", help="Also list the slowest top-level imports")
+    parser.add_argument("-o", "--output", type=Path, help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    runs = [measure() for _ in range(args.runs)]
+    report = {
+        "budget_ms": args.budget_ms,
+        **{key: round(statistics.median(run[key] for run in runs), 1)
+           for key in ("streamlit_import_ms", "first_render_ms", "cold_start_ms")},
+        "loaded": sorted({name for run in runs for name in run["loaded"]}),
+        "exceptions": sorted({exception for run in runs for exception in run["exceptions"]}),
+    }
+    failures = []
+    if report["cold_start_ms"] > args.budget_ms:
+        failures.append(f"cold start {report['cold_start_ms']} ms is over the {args.budget_ms:g} ms budget")
+    if report["loaded"]:
+        failures.append(f"first render imported {', '.join(report['loaded'])}")
+    if report["exceptions"]:
+        failures.append(f"first render raised {'; '.join(report['exceptions'])}")
+    # The profile is what you need to fix a regression, so it is taken on failure too
+    if args.profile or failures:
+        report["slowest_imports"] = measure(profile=True)["slowest_imports"]
+
+    for key in ("streamlit_import_ms", "first_render_ms", "cold_start_ms"):
+        print(f"  {key:<24} {report[key]}")
+    for row in report.get("slowest_imports", ()):
+        print(f"  import {row['module']:<32} {row['ms']} ms")
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
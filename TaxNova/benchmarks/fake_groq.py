@@ -0,0 +1,239 @@
+"""Local stand-in for the Groq chat-completions API.
+
+Speaks the same protocol as `client.chat.completions.create`, streaming
+server-sent events in the OpenAI chunk format with Groq's `x_groq` usage on
+the last chunk. Time to first token, token rate, errors and rate limiting are
+configurable, so the chat path can be load tested offline:
+
+    python -m benchmarks.fake_groq --port 8765 --ttft-ms 300 --tokens-per-sec 80
+    GROQ_BASE_URL=http://127.0.0.1:8765 streamlit run app.py
+
+GET /stats returns the server's own counters as JSON.
+"""
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_VOCABULARY = (
+    "deduction section 80C 80D limit rupees lakh regime old new slab rate rebate taxable "
+    "income salary return filing ITR deadline TDS refund employer certificate cess surcharge "
+    "investment premium exemption assessment year financial claim proof portal verify"
+).split()
+
+
+class FakeGroq:
+    def __init__(self, ttft_ms=250, ttft_jitter_ms=100, tokens_per_sec=100, answer_tokens=120,
+                 error_rate=0.0, rate_limit_rate=0.0, drop_rate=0.0, rpm=None, max_streams=None,
+                 retry_after=1, seed=None):
+        self.ttft_ms = ttft_ms
+        self.ttft_jitter_ms = ttft_jitter_ms
+        self.tokens_per_sec = tokens_per_sec
+        self.answer_tokens = answer_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.drop_rate = drop_rate
+        self.rpm = rpm
+        self.max_streams = max_streams
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent = deque()  # request times within the last minute, for `rpm`
+        self.counters = {"requests": 0, "streams": 0, "completed": 0, "rate_limited": 0,
+                         "errors": 0, "dropped": 0, "tokens": 0, "active_streams": 0}
+        self._server = None
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def admit(self):
+        """Decides the fate of a request: None to serve it, or an (status, message) error."""
+        now = time.monotonic()
+        with self._lock:
+            self.counters["requests"] += 1
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if self.rpm and len(self._recent) >= self.rpm:
+                return 429, "Rate limit reached for requests per minute"
+            if self.max_streams and self.counters["active_streams"] >= self.max_streams:
+                return 429, "Too many concurrent requests"
+            roll = self._random.random()
+            self._recent.append(now)
+        if roll < self.rate_limit_rate:
+            return 429, "Rate limit reached for tokens per minute"
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 503, "Service unavailable"
+        return None
+
+    def answer(self, messages):
+        """A deterministic answer for the conversation, so repeated prompts match."""
+        seed = hashlib.sha256(json.dumps(messages[-1:], sort_keys=True).encode()).digest()
+        rng = random.Random(seed)
+        return [rng.choice(_VOCABULARY) + " " for _ in range(self.answer_tokens)]
+
+    def first_token_delay(self):
+        with self._lock:
+            jitter = self._random.uniform(-self.ttft_jitter_ms, self.ttft_jitter_ms)
+        return max(0.0, self.ttft_ms + jitter) / 1000
+
+    def should_drop(self):
+        with self._lock:
+            return self._random.random() < self.drop_rate
+
+    def serve(self, host="127.0.0.1", port=0):
+        """Starts serving on a background thread and returns the base URL."""
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        threading.Thread(target=self._server.serve_forever, name="fake-groq", daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}"
+
+    def shutdown(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/stats":
+            return self._send_json(404, {"error": {"message": "Not found"}})
+        with self.server.fake._lock:
+            counters = dict(self.server.fake.counters)
+        self._send_json(200, counters)
+
+    def do_POST(self):
+        fake = self.server.fake
+        if not self.path.endswith("/chat/completions"):
+            return self._send_json(404, {"error": {"message": "Not found"}})
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        rejected = fake.admit()
+        if rejected:
+            status, message = rejected
+            fake._count("rate_limited" if status == 429 else "errors")
+            code = "rate_limit_exceeded" if status == 429 else "service_unavailable"
+            return self._send_json(status, {"error": {"message": message, "type": "requests", "code": code}},
+                                   {"Retry-After": str(fake.retry_after)} if status == 429 else None)
+
+        tokens = fake.answer(body.get("messages", []))
+        model = body.get("model", "fake-model")
+        time.sleep(fake.first_token_delay())
+        if body.get("stream"):
+            self._stream(fake, model, tokens)
+        else:
+            time.sleep(len(tokens) / fake.tokens_per_sec)
+            fake._count("completed")
+            fake._count("tokens", len(tokens))
+            self._send_json(200, {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+            })
+
+    def _stream(self, fake, model, tokens):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        fake._count("streams")
+        fake._count("active_streams")
+        started = time.perf_counter()
+        try:
+            drop_at = len(tokens) // 2 if fake.should_drop() else None
+            for index, token in enumerate(tokens):
+                if index == drop_at:
+                    fake._count("dropped")
+                    # Abort the chunked body without a terminating chunk
+                    self.close_connection = True
+                    return
+                self._event({"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": 0,
+                             "model": model, "choices": [{"index": 0, "delta": {"content": token},
+                                                          "finish_reason": None}]})
+                # Pace tokens against the clock so slow writes do not lower the rate further
+                delay = started + (index + 1) / fake.tokens_per_sec - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self._event({"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": 0, "model": model,
+                         "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                         "x_groq": {"id": "req-fake", "usage": {
+                             "prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens),
+                             "completion_time": time.perf_counter() - started}}})
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            fake._count("completed")
+            fake._count("tokens", len(tokens))
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        finally:
+            fake._count("active_streams", -1)
+
+    def _event(self, payload):
+        self._write_chunk(b"data: " + json.dumps(payload).encode() + b"\n\n")
+
+    def _write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def add_arguments(parser):
+    """Fake-server options, shared with the load test."""
+    parser.add_argument("--ttft-ms", type=float, default=250, help="Mean time to first token")
+    parser.add_argument("--ttft-jitter-ms", type=float, default=100)
+    parser.add_argument("--tokens-per-sec", type=float, default=100, help="Streaming rate per request")
+    parser.add_argument("--answer-tokens", type=int, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Share of streams cut off halfway")
+    parser.add_argument("--rpm", type=int, help="Requests per minute before answering 429")
+    parser.add_argument("--max-streams", type=int, help="Concurrent streams before answering 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+
+
+def from_arguments(args, seed=None):
+    return FakeGroq(ttft_ms=args.ttft_ms, ttft_jitter_ms=args.ttft_jitter_ms, tokens_per_sec=args.tokens_per_sec,
+                    answer_tokens=args.answer_tokens, error_rate=args.error_rate,
+                    rate_limit_rate=args.rate_limit_rate, drop_rate=args.drop_rate, rpm=args.rpm,
+                    max_streams=args.max_streams, retry_after=args.retry_after, seed=seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a fake Groq chat-completions API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    fake = from_arguments(args)
+    print(f"Fake Groq API listening on {fake.serve(args.host, args.port)}", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""Multi-session load test for the upload and chat paths.
+
+Each simulated session runs on its own thread, as Streamlit runs each
+session's script, and does what app.py does per session: upload and analyse
+a certificate, then ask a few questions that go through retrieval, the
+context window, the answer cache and a streamed completion. The shared
+resources (model client, caches, chat store) are process-wide as in the app.
+
+By default a fake Groq server (benchmarks.fake_groq) is started in a separate
+process, so no API key or network is needed:
+
+    python -m benchmarks.load_test --sessions 50 --turns 3 --ttft-ms 300
+    python -m benchmarks.load_test --sessions 20 --rate-limit-rate 0.1 --json report.json
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from benchmarks import fake_groq
+from benchmarks.synthetic_form16 import generate
+from taxnova.analysis import analyze_extracted
+from taxnova.answer_cache import AnswerCache
+from taxnova.assistant import DEFAULT_MODEL, Assistant
+from taxnova.chat_store import ChatStore
+from taxnova.chat_stream import StreamStats
+from taxnova.context_window import ContextWindow
+from taxnova.form16 import CORE_FIELDS, extract_form16_data
+from taxnova.form16_cache import ExtractionCache
+from taxnova.llm_client import LLMClient, LLMUnavailableError
+from taxnova.llm_scheduler import LLMScheduler
+from taxnova.model_router import ModelRouter, parse_routes
+from taxnova.retrieval import RetrievalIndex
+
+SYSTEM_PROMPT = "You are a tax assistant helping users navigate tax finalization."
+GREETING = "Hello! I'm here to help with tax finalization."
+QUESTIONS = [
+    "What is the 80C deduction limit?",
+    "How much can I claim for health insurance under 80D?",
+    "Should I choose the old or the new regime?",
+    "What is the standard deduction for salaried employees?",
+    "When is the last date to file my ITR?",
+    "Can I claim HRA and a home loan together?",
+    "How is the 87A rebate calculated?",
+    "Is interest on my savings account taxable?",
+    "What documents do I need to file my return?",
+    "How do I get a refund of excess TDS?",
+]
+FOLLOW_UPS = ["Can you explain that again?", "What about the previous point for my salary?",
+              "And how does that change in the new regime?"]
+
+
+class Recorder:
+    """Thread-safe latency samples and error counts per operation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.totals = defaultdict(int)
+
+    def add(self, name, value):
+        with self._lock:
+            self.totals[name] += value
+
+    def record(self, operation, milliseconds):
+        with self._lock:
+            self.samples[operation].append(milliseconds)
+
+    def error(self, operation):
+        with self._lock:
+            self.errors[operation] += 1
+
+    def summary(self, elapsed):
+        report = {}
+        with self._lock:
+            for operation in sorted(set(self.samples) | set(self.errors)):
+                samples = np.array(self.samples[operation])
+                report[operation] = {
+                    "count": len(samples),
+                    "errors": self.errors[operation],
+                    "per_sec": round(len(samples) / elapsed, 2),
+                    **{f"p{q}_ms": round(float(np.percentile(samples, q)), 1) if len(samples) else None
+                       for q in (50, 95, 99)},
+                    "max_ms": round(float(samples.max()), 1) if len(samples) else None,
+                }
+        return report
+
+
+class SharedResources:
+    """The process-wide singletons app.py creates with st.cache_resource."""
+
+    def __init__(self, base_url, args, work_dir):
+        self.llm = LLMScheduler(LLMClient(api_key="load-test", base_url=base_url,
+                                          max_concurrency=args.llm_concurrency, max_retries=args.llm_retries))
+        self.retrieval = RetrievalIndex.open()
+        self.answers = AnswerCache()
+        self.extractions = ExtractionCache()
+        self.chats = ChatStore(Path(work_dir) / "chat.db", retention_days=0)
+        self.router = ModelRouter(parse_routes(DEFAULT_MODEL, lambda endpoint: self.llm))
+        self.assistant = Assistant(self.router, self.retrieval, self.answers, SYSTEM_PROMPT, GREETING)
+
+
+def analyze(resources, pdf):
+    analyze_extracted(resources.extractions.get_or_extract(pdf, extract_form16_data, CORE_FIELDS))
+
+
+def ask(resources, session_id, window, question, recorder):
+    """One chat turn, as in app.py's chat panel."""
+    started = time.perf_counter()
+    chats = resources.chats
+    chats.append(session_id, "user", question)
+    assistant = resources.assistant
+    turn = assistant.prepare(question, chats.history(session_id), window)
+    answer = turn.cached_answer
+    if answer is not None:
+        recorder.record("chat_cached_ms", (time.perf_counter() - started) * 1000)
+    else:
+        stats = StreamStats(model=assistant.model)
+        try:
+            answer = "".join(assistant.stream(turn, stats))
+        except LLMUnavailableError:
+            recorder.error("chat_ms")
+            return
+        if stats.ttft_ms is not None:
+            recorder.record("chat_ttft_ms", stats.ttft_ms + (stats.started - started) * 1000)
+        recorder.record("chat_ms", (time.perf_counter() - started) * 1000)
+        recorder.add("tokens", stats.tokens)
+        assistant.remember(turn, answer)
+    chats.append(session_id, "assistant", answer)
+
+
+def run_session(number, resources, certificates, args, recorder):
+    rng = random.Random(args.seed * 100003 + number)
+    # Spread session starts over the ramp-up period
+    time.sleep(args.ramp_up * number / max(args.sessions, 1))
+    session_started = time.perf_counter()
+    session_id = resources.chats.new_session(greeting=GREETING)
+    window = ContextWindow()
+    for _ in range(args.uploads):
+        started = time.perf_counter()
+        try:
+            analyze(resources, rng.choice(certificates).pdf)
+        except Exception:
+            recorder.error("upload_ms")
+        else:
+            recorder.record("upload_ms", (time.perf_counter() - started) * 1000)
+    for turn in range(args.turns):
+        if args.think_time:
+            time.sleep(rng.expovariate(1 / args.think_time))
+        question = rng.choice(FOLLOW_UPS) if turn and rng.random() < 0.3 else rng.choice(QUESTIONS)
+        ask(resources, session_id, window, question, recorder)
+    recorder.record("session_ms", (time.perf_counter() - session_started) * 1000)
+
+
+def _serve_fake(args, urls, stop):
+    fake = fake_groq.from_arguments(args, seed=args.seed)
+    urls.put(fake.serve())
+    stop.wait()
+    fake.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent TaxNova sessions.")
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent sessions")
+    parser.add_argument("--turns", type=int, default=3, help="Questions per session")
+    parser.add_argument("--uploads", type=int, default=1, help="Certificates analysed per session")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean seconds between questions")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds over which sessions start")
+    parser.add_argument("--distinct-docs", type=int, default=20,
+                        help="Distinct certificates shared by all sessions (controls cache hits)")
+    parser.add_argument("--llm-concurrency", type=int, default=8)
+    parser.add_argument("--llm-retries", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--base-url", help="Use this API instead of starting the fake server")
+    parser.add_argument("--json", type=Path, help="Write the report to this file")
+    fake_groq.add_arguments(parser.add_argument_group("fake server"))
+    args = parser.parse_args(argv)
+
+    certificates = list(generate(args.distinct_docs, seed=args.seed, scanned_ratio=0))
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    fake_process = None
+    base_url = args.base_url
+    if base_url is None:
+        urls = context.Queue()
+        fake_process = context.Process(target=_serve_fake, args=(args, urls, stop), daemon=True)
+        fake_process.start()
+        base_url = urls.get(timeout=30)
+
+    recorder = Recorder()
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            resources = SharedResources(base_url, args, work_dir)
+            threads = [threading.Thread(target=run_session, args=(number, resources, certificates, args, recorder))
+                       for number in range(args.sessions)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            server_stats = httpx.get(f"{base_url}/stats").json() if fake_process else None
+            llm_stats = resources.llm.stats()
+            router_stats = resources.router.stats()
+            cache_stats = {"answers": resources.answers.stats(),
+                           "extractions": {"hits": resources.extractions.hits,
+                                           "misses": resources.extractions.misses}}
+    finally:
+        stop.set()
+        if fake_process:
+            fake_process.join(timeout=5)
+
+    operations = recorder.summary(elapsed)
+    tokens = recorder.totals["tokens"]
+    report = {
+        "config": {key: (str(value) if isinstance(value, Path) else value) for key, value in vars(args).items()},
+        "elapsed_sec": round(elapsed, 2),
+        "operations": operations,
+        "tokens_per_sec": round(tokens / elapsed, 1),
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                             / (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+        "llm_client": llm_stats,
+        "model_router": router_stats,
+        "caches": cache_stats,
+        "fake_server": server_stats,
+    }
+
+    print(f"{args.sessions} sessions in {elapsed:.1f}s, {report['tokens_per_sec']} tokens/s, "
+          f"peak RSS {report['peak_rss_mb']} MB")
+    print(f"{'operation':<16}{'count':>7}{'errors':>8}{'per sec':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for operation, row in operations.items():
+        print(f"{operation:<16}{row['count']:>7}{row['errors']:>8}{row['per_sec']:>9}"
+              f"{row['p50_ms'] or '-':>10}{row['p95_ms'] or '-':>10}{row['p99_ms'] or '-':>10}")
+    print(f"model client: {json.dumps(llm_stats)}")
+    if server_stats:
+        print(f"fake server: {json.dumps(server_stats)}")
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
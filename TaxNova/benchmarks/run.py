@@ -0,0 +1,249 @@
+"""Benchmarks for Form 16 extraction, deduction rules and slab calculation.
+
+Each suite runs in a fresh process so its peak RSS is its own. Results are
+compared with a JSON baseline and the run fails when a metric regresses by
+more than the tolerance:
+
+    python -m benchmarks.run                     # compare with the baseline
+    python -m benchmarks.run --save              # record a new baseline
+    python -m benchmarks.run --suite extraction --docs 50
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_BASELINE = Path(__file__).with_name("baselines") / "baseline.json"
+SUITES = ("extraction", "templates", "deductions", "slab_tax")
+# Accuracy may only drift by this much, whatever the timing tolerance
+ACCURACY_TOLERANCE = 0.005
+
+
+def _rate(count, seconds):
+    return round(count / seconds, 1) if seconds else None
+
+
+def _timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def bench_extraction(docs=200, seed=7, max_pages=8):
+    from benchmarks.synthetic_form16 import generate
+    from taxnova.form16 import extract_form16_data
+
+    certificates = list(generate(docs, seed=seed, max_pages=max_pages))
+    results = _extraction_results(certificates, extract_form16_data)
+    results.update(_all_fields_accuracy(certificates, extract_form16_data))
+    return results
+
+
+def bench_templates(docs=200, seed=7, max_pages=8, samples=60):
+    """Extraction of the same corpus with layout templates learned from other certificates."""
+    from benchmarks.synthetic_form16 import generate
+    from taxnova.form16 import extract_form16_data
+    from taxnova.form16_templates import TemplateIndex, learn
+    from taxnova.metrics import metrics
+
+    training = generate(samples, seed=seed + 1, max_pages=max_pages, scanned_ratio=0)
+    templates, learn_seconds = _timed(lambda: TemplateIndex(learn(io.BytesIO(c.pdf) for c in training)))
+    certificates = list(generate(docs, seed=seed, max_pages=max_pages))
+    results = _extraction_results(certificates, lambda file: extract_form16_data(file, templates=templates))
+    results["template_hit_rate"] = round(metrics.snapshot()["counters"].get("template_hits", 0) / docs, 4)
+    results.update(_all_fields_accuracy(
+        certificates, lambda file, fields: extract_form16_data(file, fields, templates=templates)))
+    results["learn_sec"] = round(learn_seconds, 2)
+    return results
+
+
+def _all_fields_accuracy(certificates, extract):
+    """Accuracy over every field in FIELD_SPECS, from a second pass that is not timed."""
+    from taxnova.form16 import ALL_FIELDS
+
+    results = _extraction_results(certificates, lambda file: extract(file, ALL_FIELDS), ALL_FIELDS)
+    return {key.replace("_field_accuracy", "_all_fields_accuracy"): value
+            for key, value in results.items() if key.endswith("_accuracy")}
+
+
+def _extraction_results(certificates, extract, fields=None):
+    """Timings and per-group accuracy; `fields` defaults to CORE_FIELDS, what the app extracts."""
+    from taxnova.form16 import CORE_FIELDS
+
+    fields = fields or CORE_FIELDS
+    page_ms = []
+    correct = defaultdict(int)
+    total = defaultdict(int)
+    started = time.perf_counter()
+    for certificate in certificates:
+        extracted, seconds = _timed(extract, io.BytesIO(certificate.pdf))
+        page_ms.extend([seconds * 1000 / certificate.pages] * certificate.pages)
+        groups = ("scanned",) if certificate.scanned else ("text", f"layout_{certificate.layout}",
+                                                           f"grouping_{certificate.grouping}")
+        for field in fields:
+            hit = abs(extracted[field] - certificate.truth[field]) < 0.005
+            for group in groups:
+                correct[group] += hit
+                total[group] += 1
+    elapsed = time.perf_counter() - started
+
+    results = {
+        "docs_per_sec": _rate(len(certificates), elapsed),
+        "pages_per_sec": _rate(len(page_ms), elapsed),
+        "page_p50_ms": round(float(np.percentile(page_ms, 50)), 3),
+        "page_p95_ms": round(float(np.percentile(page_ms, 95)), 3),
+    }
+    # Scanned pages have no text layer; their accuracy is reported, not gated
+    for group in sorted(total):
+        key = "scanned_field_accuracy" if group == "scanned" else f"{group}_field_accuracy"
+        results[key] = round(correct[group] / total[group], 4)
+    return results
+
+
+def bench_deductions(rows=1_000_000, scalar_rows=20_000, seed=7):
+    from taxnova.tax_engine import identify_deductions, identify_deductions_batch
+
+    incomes = np.random.default_rng(seed).uniform(1e5, 5e7, rows).round(2)
+    _, batch_seconds = _timed(identify_deductions_batch, incomes)
+    _, scalar_seconds = _timed(lambda: [identify_deductions(income) for income in incomes[:scalar_rows]])
+    return {
+        "batch_rows_per_sec": _rate(rows, batch_seconds),
+        "scalar_rows_per_sec": _rate(scalar_rows, scalar_seconds),
+    }
+
+
+def bench_slab_tax(rows=1_000_000, scalar_rows=20_000, seed=7):
+    from taxnova.tax_engine import DEFAULT_FY, compute_tax, compute_tax_batch, get_tax_table, slab_tax
+
+    rng = np.random.default_rng(seed)
+    incomes = rng.uniform(0, 5e7, rows).round(2)
+    tds = rng.uniform(0, 1e6, rows).round(2)
+    table = get_tax_table(DEFAULT_FY, "new")
+    slab, slab_seconds = _timed(slab_tax, incomes)
+    _, table_seconds = _timed(table.tax, incomes)
+    batch, batch_seconds = _timed(compute_tax_batch, incomes, tds, 0)
+    scalar, scalar_seconds = _timed(
+        lambda: [compute_tax(income, paid, 0) for income, paid in zip(incomes[:scalar_rows], tds[:scalar_rows])])
+    # The vectorized and scalar paths must agree to the paisa
+    mismatches = int(sum(abs(one["tax_liability"] - many) > 0.01
+                         for one, many in zip(scalar, batch["tax_liability"][:scalar_rows])))
+    mismatches += int(np.count_nonzero(np.abs(slab[:scalar_rows] - batch["tax_liability"][:scalar_rows]) > 0.01))
+    return {
+        "slab_rows_per_sec": _rate(rows, slab_seconds),
+        "regime_table_rows_per_sec": _rate(rows, table_seconds),
+        "compute_batch_rows_per_sec": _rate(rows, batch_seconds),
+        "compute_scalar_rows_per_sec": _rate(scalar_rows, scalar_seconds),
+        "scalar_batch_mismatches": mismatches,
+    }
+
+
+_BENCHMARKS = {"extraction": bench_extraction, "templates": bench_templates,
+               "deductions": bench_deductions, "slab_tax": bench_slab_tax}
+
+
+def _run_suite(name, options):
+    results = _BENCHMARKS[name](**options)
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results["peak_rss_mb"] = round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    return results
+
+
+def run_suites(names, options):
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results[name] = pool.submit(_run_suite, name, options.get(name, {})).result()
+    return results
+
+
+def _higher_is_better(metric):
+    return metric.endswith("_per_sec") or metric.endswith("_accuracy")
+
+
+def compare(results, baseline, tolerance):
+    """Returns human-readable regressions of `results` against `baseline`."""
+    regressions = []
+    for suite, metrics in results.items():
+        for metric, value in metrics.items():
+            expected = baseline.get(suite, {}).get(metric)
+            if expected is None or value is None or metric.startswith("scanned_"):
+                continue
+            if metric.endswith("_accuracy"):
+                regressed = value < expected - ACCURACY_TOLERANCE
+            elif metric.endswith("_mismatches"):
+                regressed = value > expected
+            elif _higher_is_better(metric):
+                regressed = value < expected * (1 - tolerance)
+            else:
+                regressed = value > expected * (1 + tolerance)
+            if regressed:
+                regressions.append(f"{suite}.{metric}: {value} (baseline {expected})")
+    return regressions
+
+
+def environment():
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "machine": platform.machine(), "cpus": os.cpu_count(), "numpy": np.__version__}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the TaxNova benchmark suites.")
+    parser.add_argument("--suite", action="append", choices=SUITES,
+                        help="Suite to run (repeatable, default: all)")
+    parser.add_argument("--docs", type=int, default=200, help="Synthetic certificates to extract")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Incomes per vectorized run")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative slowdown or memory growth (default: 0.25)")
+    parser.add_argument("-o", "--output", type=Path, help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    options = {
+        "extraction": {"docs": args.docs, "seed": args.seed},
+        "templates": {"docs": args.docs, "seed": args.seed},
+        "deductions": {"rows": args.rows, "seed": args.seed},
+        "slab_tax": {"rows": args.rows, "seed": args.seed},
+    }
+    results = run_suites(args.suite or SUITES, options)
+    report = {"environment": environment(), "options": options, "results": results}
+    for suite, metrics in results.items():
+        print(f"[{suite}]")
+        for metric, value in metrics.items():
+            print(f"  {metric:<32} {value}")
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save to create one", file=sys.stderr)
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if baseline.get("options") != options:
+        print("Warning: baseline was recorded with different options", file=sys.stderr)
+    regressions = compare(results, baseline["results"], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""Synthetic Form 16 / Form 22 certificates with known ground truth.
+
+Documents vary in form type, page count, layout, digit grouping and whether
+the pages carry a text layer or are image-only scans. Generation is seeded,
+so the same arguments always produce the same corpus:
+
+    python -m benchmarks.synthetic_form16 /tmp/certs -n 200 --seed 7
+    python -m benchmarks.synthetic_form16 /tmp/bundle -n 500 --bundle
+"""
+import argparse
+import json
+import random
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+from taxnova.form16 import ALL_FIELDS
+from taxnova.pdf_writer import PAGE_HEIGHT, PAGE_WIDTH, Page, iter_pdf, text_op
+from taxnova.tax_engine import CESS_RATE, slab_tax
+
+LAYOUTS = ("inline", "columns", "leader", "monospace")
+GROUPINGS = ("indian", "western", "plain")
+
+# `truth` maps every field in ALL_FIELDS to the value a correct parser returns (0 when not printed)
+Certificate = namedtuple("Certificate",
+                         ["name", "pdf", "truth", "form", "pages", "layout", "grouping", "scanned"])
+
+LEADING = 16
+MARGIN = 50
+_SCAN_SCALE = 2  # scanned pages are rasterised at half the page resolution
+
+
+def format_amount(value, grouping, decimals):
+    whole, fraction = f"{value:.2f}".split(".")
+    if grouping == "western":
+        whole = f"{int(whole):,}"
+    elif grouping == "indian" and len(whole) > 3:
+        head, tail = whole[:-3], whole[-3:]
+        pairs = []
+        while len(head) > 2:
+            pairs.insert(0, head[-2:])
+            head = head[:-2]
+        whole = ",".join([head] + pairs + [tail])
+    return f"{whole}.{fraction}" if decimals else whole
+
+
+class _Layout:
+    """Turns (label, amount) rows into positioned text for one layout style."""
+
+    def __init__(self, style, grouping, decimals):
+        self.style = style
+        self.grouping = grouping
+        self.decimals = decimals
+
+    def normalize(self, value):
+        """The value exactly as printed, i.e. what a parser should read back."""
+        return round(value, 2) if self.decimals else float(round(value))
+
+    def amount(self, value):
+        return format_amount(self.normalize(value), self.grouping, self.decimals)
+
+    def row(self, label, value, y):
+        amount = self.amount(value)
+        if self.style == "columns":
+            return [text_op("F1", 10, MARGIN, y, label), text_op("F1", 10, 430, y, amount)]
+        if self.style == "leader":
+            return [text_op("F1", 10, MARGIN, y, f"{label} {'.' * max(4, 60 - len(label))} Rs. {amount}")]
+        if self.style == "monospace":
+            return [text_op("F3", 9, MARGIN, y, f"{label:<58}{amount:>16}")]
+        return [text_op("F1", 10, MARGIN, y, f"{label}: Rs. {amount}")]
+
+
+def _page(lines, layout):
+    """Lays out a list of headings (str) and rows ((label, value)) top to bottom."""
+    ops = []
+    y = PAGE_HEIGHT - MARGIN
+    for line in lines:
+        if isinstance(line, str):
+            ops.append(text_op("F2", 12, MARGIN, y, line))
+        else:
+            ops.extend(layout.row(*line, y))
+        y -= LEADING
+    return ops, len(lines)
+
+
+def _scanned(line_count, rng):
+    """Image-only version of a page: dark bands where the text lines would be."""
+    width, height = PAGE_WIDTH // _SCAN_SCALE, PAGE_HEIGHT // _SCAN_SCALE
+    pixels = bytearray(b"\xf4" * (width * height))
+    for line in range(line_count):
+        top = (MARGIN + line * LEADING) // _SCAN_SCALE
+        ink = rng.randint(width // 4, width - MARGIN)
+        for row in range(top, min(top + 5, height)):
+            start = row * width + MARGIN // _SCAN_SCALE
+            pixels[start:start + ink - MARGIN // _SCAN_SCALE] = bytes(
+                rng.choice((0x20, 0x40, 0x90)) for _ in range(ink - MARGIN // _SCAN_SCALE))
+    content = b"q %d 0 0 %d 0 0 cm /Scan Do Q" % (PAGE_WIDTH, PAGE_HEIGHT)
+    return Page(content, (("Scan", width, height, bytes(pixels)),))
+
+
+def _filler_page(rng, layout, number):
+    """An annexure page full of numbers and none of the extracted labels."""
+    lines = [f"Annexure {number} - Details of salary paid"]
+    for month in ("April", "May", "June", "July", "August", "September",
+                  "October", "November", "December", "January", "February", "March"):
+        lines.append((f"Basic salary for {month}", rng.randint(20, 400) * 500))
+        lines.append((f"House rent allowance for {month}", rng.randint(5, 150) * 500))
+        lines.append((f"Employee PF contribution for {month}", rng.randint(2, 40) * 500))
+    return lines[:45]
+
+
+def _form16_sections(rng):
+    gross = rng.randint(300, 6000) * 1000 + rng.randint(0, 99) / 100
+    standard = 50000
+    chapter_via = min(rng.randint(0, 250) * 1000, max(gross - standard, 0))
+    taxable = max(gross - standard - chapter_via, 0)
+    tax = float(slab_tax([taxable])[0])
+    cess = tax * CESS_RATE
+    tds = (tax + cess) * rng.uniform(0.7, 1.2)
+    pan = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(5)) + f"{rng.randint(0, 9999):04d}F"
+    part_a = [
+        "FORM NO. 16",
+        "PART A - Certificate under section 203 of the Income-tax Act, 1961",
+        f"PAN of the Employee {pan}",
+        "Summary of amount paid/credited and tax deducted at source thereon",
+    ]
+    # Captions carry section numbers, years and rates as TRACES prints them, ahead of the amounts
+    for quarter in ("Q1", "Q2", "Q3", "Q4"):
+        part_a.append((f"{quarter} Amount of tax deposited / remitted", tds / 4))
+    part_a.append(("Total amount of tax deposited / remitted", tds))
+    part_a.append(("Tax Deducted at Source (TDS) u/s 192", tds))
+    part_b = [
+        "PART B - Details of Salary Paid and any other income and tax deducted",
+        ("Gross Salary", gross),
+        ("Standard deduction under section 16(ia)", standard),
+        ("Income chargeable under the head Salaries", gross - standard),
+        ("Aggregate of deductible amount under Chapter VI-A", chapter_via),
+        ("Taxable Income for FY 2024-25", taxable),
+        ("Tax on total income", tax),
+        ("Health and education cess @ 4%", cess),
+        ("Net tax payable", tax + cess),
+    ]
+    truth = {"Gross Salary": gross, "TDS Deducted": tds, "Taxable Income": taxable, "Tax Deposited": tds,
+             "Standard Deduction": standard, "Chapter VI-A Deductions": chapter_via,
+             "Tax on Total Income": tax, "Health and Education Cess": cess, "Net Tax Payable": tax + cess,
+             "PAN": pan}
+    return part_a, part_b, truth
+
+
+def _form22_sections(rng):
+    receipts = rng.randint(1000, 20000) * 1000
+    profit = receipts * rng.uniform(0.08, 0.35)
+    taxable = max(profit - rng.randint(0, 150) * 1000, 0)
+    tax = float(slab_tax([taxable])[0])
+    tds = tax * rng.uniform(0.3, 1.0)
+    head = [
+        "FORM 22",
+        "Statement of business income and tax deducted",
+        ("Gross Receipts", receipts),
+        ("Net Profit", profit),
+    ]
+    tail = [
+        "Computation of total income",
+        ("Taxable Income", taxable),
+        ("Tax on total income", tax),
+        ("Tax Deducted at Source", tds),
+    ]
+    truth = {"TDS Deducted": tds, "Taxable Income": taxable, "Tax on Total Income": tax,
+             "Gross Receipts": receipts, "Net Profit": profit}
+    return head, tail, truth
+
+
+def _certificate_pages(rng, form, layout, max_pages, scanned):
+    """The pages of one certificate and its (unrounded) truth."""
+    head, tail, truth = (_form16_sections if form == "16" else _form22_sections)(rng)
+    page_count = rng.randint(1, max_pages)
+    if page_count == 1:
+        page_lines = [head + tail]
+    else:
+        # Annexure pages sit between the two parts, so the last fields come late
+        fillers = [_filler_page(rng, layout, number) for number in range(1, page_count - 1)]
+        page_lines = [head] + fillers + [tail]
+
+    pages = []
+    for lines in page_lines:
+        ops, line_count = _page(lines, layout)
+        pages.append(_scanned(line_count, rng) if scanned else Page(b"\n".join(ops)))
+    return pages, truth
+
+
+def make_certificate(rng, index, max_pages=8, scanned_ratio=0.1):
+    form = "16" if rng.random() < 0.8 else "22"
+    layout_style = rng.choice(LAYOUTS)
+    grouping = rng.choice(GROUPINGS)
+    decimals = rng.random() < 0.5
+    scanned = rng.random() < scanned_ratio
+    layout = _Layout(layout_style, grouping, decimals)
+
+    pages, truth = _certificate_pages(rng, form, layout, max_pages, scanned)
+    pdf = b"".join(iter_pdf(pages))
+    name = f"synthetic_{index:05d}_form{form}_{layout_style}_{grouping}{'_scanned' if scanned else ''}.pdf"
+    return Certificate(name, pdf, {field: layout.normalize(truth.get(field, 0)) for field in ALL_FIELDS},
+                       form, len(pages), layout_style, grouping, scanned)
+
+
+def generate(count, seed=0, max_pages=8, scanned_ratio=0.1):
+    """Yields `count` certificates; the same seed always gives the same documents."""
+    rng = random.Random(seed)
+    for index in range(count):
+        yield make_certificate(rng, index, max_pages, scanned_ratio)
+
+
+def write_bundle(path, count, seed=0, max_pages=4):
+    """Writes a TRACES-style bulk PDF of `count` Form 16 certificates and returns their truth.
+
+    Pages are streamed to the file as they are drawn, so bundles of any size
+    can be generated. Each truth record has the employee's PAN, page range
+    (1-based, inclusive) and ALL_FIELDS.
+    """
+    rng = random.Random(seed)
+    # One employer issues the whole bundle, in one layout
+    layout = _Layout(rng.choice(LAYOUTS), rng.choice(GROUPINGS), rng.random() < 0.5)
+    records = []
+
+    def pages():
+        for _ in range(count):
+            certificate_pages, truth = _certificate_pages(rng, "16", layout, max_pages, scanned=False)
+            first_page = records[-1]["last_page"] + 1 if records else 1
+            records.append({"pan": truth["PAN"], "first_page": first_page,
+                            "last_page": first_page + len(certificate_pages) - 1,
+                            **{field: layout.normalize(truth.get(field, 0)) for field in ALL_FIELDS}})
+            yield from certificate_pages
+
+    with open(path, "wb") as bundle:
+        for chunk in iter_pdf(pages()):
+            bundle.write(chunk)
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic Form 16/22 PDFs and their ground truth.")
+    parser.add_argument("output_dir")
+    parser.add_argument("-n", "--count", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-pages", type=int, default=8)
+    parser.add_argument("--scanned-ratio", type=float, default=0.1)
+    parser.add_argument("--bundle", action="store_true",
+                        help="Write one TRACES-style bulk PDF (bundle.pdf) of Form 16 certificates instead")
+    args = parser.parse_args(argv)
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if args.bundle:
+        records = write_bundle(output_dir / "bundle.pdf", args.count, args.seed, args.max_pages)
+        with open(output_dir / "truth.jsonl", "w", encoding="utf-8") as truth_file:
+            truth_file.writelines(json.dumps(record) + "\n" for record in records)
+        print(f"Wrote a bundle of {args.count} certificates to {output_dir / 'bundle.pdf'}", file=sys.stderr)
+        return 0
+    with open(output_dir / "truth.jsonl", "w", encoding="utf-8") as truth_file:
+        for certificate in generate(args.count, args.seed, args.max_pages, args.scanned_ratio):
+            (output_dir / certificate.name).write_bytes(certificate.pdf)
+            record = certificate._asdict()
+            del record["pdf"]
+            truth_file.write(json.dumps(record) + "\n")
+    print(f"Wrote {args.count} certificates to {output_dir}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
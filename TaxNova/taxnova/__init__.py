@@ -0,0 +1 @@
+"""Core TaxNova logic shared by the Streamlit app and headless tools."""
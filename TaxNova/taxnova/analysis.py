@@ -0,0 +1,28 @@
+"""Certificate analysis shared by the app and the HTTP API."""
+from taxnova.metrics import metrics
+from taxnova.tax_engine import DEFAULT_FY, compute_tax, get_tax_table, identify_deductions, optimize_deductions
+
+
+def analyze_extracted(extracted_data, fy=DEFAULT_FY):
+    """Deductions, tax summary and the cheapest regime plan for extracted certificate data."""
+    # Gross salary when the certificate has it, as the regime plan uses; Form 22 has only taxable income
+    gross_salary = extracted_data.get("Gross Salary") or 0
+    income = gross_salary or extracted_data.get("Taxable Income", 0)
+    tds_paid = extracted_data.get("TDS Deducted", 0)
+    # The deduction sections below are old-regime ones, so the summary is the old regime's
+    table = get_tax_table(fy, "old")
+    with metrics.span("tax_compute"):
+        deductions = identify_deductions(income)
+        if gross_salary:
+            deductions = {"Standard Deduction": float(table.standard_deduction), **deductions}
+        # Same tax table as the regime plan: rebate, surcharge and cess included
+        tax_summary = compute_tax(income, tds_paid, sum(deductions.values()), table=table)
+    # Old vs new regime and the cheapest deduction plan
+    with metrics.span("regime_optimizer"):
+        regime_plan = optimize_deductions(income, fy=fy)
+    return {
+        "extracted_data": extracted_data,
+        "deductions": deductions,
+        "tax_summary": tax_summary,
+        "regime_plan": regime_plan,
+    }
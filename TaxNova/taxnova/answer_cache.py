@@ -0,0 +1,164 @@
+"""Local semantic cache for repeated, context-free tax questions.
+
+Questions are embedded with a signed hashing vectorizer over words and word
+bigrams, so no model or network call is needed. A lookup is one matrix-vector
+product against the cached questions; hits above the similarity threshold are
+served without touching the Groq rate limit.
+
+Similar is not enough for tax answers: a hit must also quote exactly the same
+numbers (amounts, years, sections) and share nearly all of its ordered word
+pairs, so "is the old regime better than the new" never gets the answer to
+the reverse question. Questions about the asker's own situation are never
+cached at all.
+"""
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+_WORDS = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an the is are was were be can could should would do does did what whats when which how s "
+    "for of to in on under at by with about me please tell explain i".split()
+)
+# Words that make a question depend on earlier turns
+REFERENCE_WORDS = frozenset(
+    "it its that this those these them they above previous earlier same also else".split()
+)
+# Openings of a follow-up that continues an earlier turn: "And for HRA?", "What about 80D?", "Is it taxable?"
+CONJUNCTIONS = frozenset("and but or so then also plus nor yet".split())
+PRONOUNS = REFERENCE_WORDS | frozenset("he she him her his hers".split())
+FOLLOW_UP_PHRASES = (("what", "about"), ("how", "about"), ("is", "it"), ("is", "that"), ("does", "it"),
+                     ("does", "that"), ("can", "it"))
+# Questions shorter than this lean on an earlier turn for their subject
+MIN_CONTEXT_FREE_WORDS = 4
+# Words that make a question about the asker's own income, whatever the turn
+PERSONAL_WORDS = frozenset("i im ive id my mine me myself we our ours us".split())
+# Share of ordered word pairs two questions must have in common for a hit
+BIGRAM_AGREEMENT = 0.8
+
+
+def _words(text):
+    # Digit grouping commas are dropped so "12,00,000" stays one number
+    return _WORDS.findall(re.sub(r"(?<=\d),(?=\d)", "", text.lower().replace("'", "")))
+
+
+def _bigrams(words):
+    return [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def _terms(text):
+    words = [word for word in _words(text) if word not in STOPWORDS]
+    return words + _bigrams(words)
+
+
+def question_key(text):
+    """What must agree exactly or nearly for a hit: the numbers in order, and the ordered word pairs."""
+    words = _words(text)
+    numbers = tuple(word for word in words if any(char.isdigit() for char in word))
+    return numbers, frozenset(_bigrams([word for word in words if word not in STOPWORDS]))
+
+
+def _bigrams_agree(first, second):
+    if not first and not second:
+        return True
+    return len(first & second) / len(first | second) >= BIGRAM_AGREEMENT
+
+
+def hash_vector(text, dim=4096):
+    vector = np.zeros(dim, dtype=np.float32)
+    for term in _terms(text):
+        digest = zlib.crc32(term.encode("utf-8"))
+        vector[digest % dim] += 1.0 if digest & 0x80000000 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def is_personal(question):
+    """True when the question is about the asker's own figures ("my salary", "do I pay")."""
+    return bool(PERSONAL_WORDS.intersection(_words(question)))
+
+
+def is_follow_up(question):
+    """True for a short question or one opening with a conjunction or pronoun, whatever came before."""
+    words = _words(question)
+    return (len(words) < MIN_CONTEXT_FREE_WORDS or words[0] in CONJUNCTIONS or words[0] in PRONOUNS
+            or tuple(words[:2]) in FOLLOW_UP_PHRASES)
+
+
+def is_context_free(question, history):
+    """True for a general question: not about the asker, and not referring back to earlier turns."""
+    if is_personal(question) or is_follow_up(question):
+        return False
+    if sum(1 for message in history if message["role"] == "user") <= 1:
+        return True
+    return not REFERENCE_WORDS.intersection(_words(question))
+
+
+class AnswerCache:
+    def __init__(self, max_entries=512, ttl_seconds=24 * 3600, threshold=0.95, dim=4096):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.dim = dim
+        self.hits = 0
+        self.misses = 0
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._entries = OrderedDict()  # slot -> (namespace, answer, stored_at, key), LRU order
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    def lookup(self, question, namespace=""):
+        """Returns a cached answer for a similar question, or None."""
+        if is_personal(question):
+            with self._lock:
+                self.misses += 1
+            return None
+        vector = hash_vector(question, self.dim)
+        numbers, bigrams = question_key(question)
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            if self._entries and vector.any():
+                slots = np.fromiter(self._entries, dtype=np.int64)
+                scores = self._vectors[slots] @ vector
+                for index in np.argsort(scores)[::-1]:
+                    if scores[index] < self.threshold:
+                        break
+                    slot = int(slots[index])
+                    entry_namespace, answer, _, (entry_numbers, entry_bigrams) = self._entries[slot]
+                    if (entry_namespace == namespace and entry_numbers == numbers
+                            and _bigrams_agree(entry_bigrams, bigrams)):
+                        self._entries.move_to_end(slot)
+                        self.hits += 1
+                        return answer
+            self.misses += 1
+            return None
+
+    def store(self, question, answer, namespace=""):
+        vector = hash_vector(question, self.dim)
+        if not vector.any() or not answer or is_personal(question):
+            return
+        with self._lock:
+            if not self._free_slots:
+                slot, _ = self._entries.popitem(last=False)
+                self._free_slots.append(slot)
+            slot = self._free_slots.pop()
+            self._vectors[slot] = vector
+            self._entries[slot] = (namespace, answer, time.time(), question_key(question))
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+    def _expire(self, now):
+        # Entries are in LRU order, not insertion order, so check them all
+        expired = [slot for slot, (_, _, stored_at, _) in self._entries.items()
+                   if now - stored_at > self.ttl_seconds]
+        for slot in expired:
+            del self._entries[slot]
+            self._free_slots.append(slot)
@@ -0,0 +1,376 @@
+"""Headless async HTTP API over the TaxNova core.
+
+    python -m taxnova.api --port 8080 --workers 4
+
+Endpoints:
+    POST /v1/extract      PDF body (application/pdf or multipart "file");
+                          ?fields=core|all|16-A|16-B|22, ?analyze=true adds
+                          deductions, tax summary and the regime plan
+    POST /v1/tax          {"taxable_income", "tds", "deductions"?}
+    POST /v1/tax/batch    {"taxable_income": [...], "tds": [...], "deductions"?: [...]}
+    POST /v1/chat         {"message", "history"?: [{"role", "content"}]} -> SSE
+    GET  /healthz, GET /metrics (Prometheus text)
+
+PDF parsing runs in a process pool and model streams on threads, so the
+event loop only ever does request handling and small vectorized math.
+Configuration comes from environment variables (GROQ_API_KEY, GROQ_BASE_URL,
+and the same optional settings the app reads from its secrets).
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from aiohttp import web
+
+from taxnova.analysis import analyze_extracted
+from taxnova.answer_cache import AnswerCache
+from taxnova.assistant import DEFAULT_MODEL, Assistant
+from taxnova.bulk_ingest import resolve_fields
+from taxnova.chat_stream import StreamStats
+from taxnova.context_window import ContextWindow
+from taxnova.form16 import extract_form16_data
+from taxnova.form16_cache import ExtractionCache
+from taxnova.form16_templates import TemplateIndex
+from taxnova.llm_client import LLMClient, LLMUnavailableError
+from taxnova.llm_scheduler import LLMScheduler
+from taxnova.metrics import metrics
+from taxnova.model_router import ModelRouter, parse_routes
+from taxnova.retrieval import RetrievalIndex
+from taxnova.tax_engine import DEFAULT_FY, TAX_RULES, deduction_columns, tax_columns
+
+DEFAULT_SYSTEM_PROMPT = ("You are a tax assistant helping users navigate tax finalization. Offer guidance on "
+                         "tax forms, deductions, credits, and filing deadlines.")
+DEFAULT_GREETING = "Hello! I'm here to help with tax finalization."
+# Batches larger than this are computed off the event loop
+INLINE_BATCH_ROWS = 2000
+MAX_BATCH_ROWS = 1_000_000
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _extract_bytes(pdf_bytes, fields, templates=None):
+    """Process-pool entry point."""
+    return extract_form16_data(io.BytesIO(pdf_bytes), fields, templates)
+
+
+def _amounts(payload, key, required=True):
+    value = payload.get(key)
+    if value is None:
+        if required:
+            raise ApiError(400, f"'{key}' is required")
+        return None
+    try:
+        amounts = np.asarray(value, dtype=float)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"'{key}' must be a number or a list of numbers") from None
+    if not np.isfinite(amounts).all():
+        raise ApiError(400, f"'{key}' must be finite")
+    return amounts
+
+
+class TaxNovaService:
+    """The process-wide resources behind the API, mirroring the app's cached singletons."""
+
+    def __init__(self, workers=None, config=os.environ):
+        self.config = config
+        self.processes = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        llm_concurrency = int(config.get("LLM_MAX_CONCURRENCY", 8))
+        # Threads wait on the process pool or hold a model stream; neither uses the CPU
+        self.threads = ThreadPoolExecutor(max_workers=(workers or os.cpu_count() or 1) * 2 + llm_concurrency,
+                                          thread_name_prefix="taxnova-api")
+        self.extraction_cache = ExtractionCache(max_entries=int(config.get("FORM16_CACHE_ENTRIES", 256)))
+        # Layout templates learned with `python -m taxnova.form16_templates learn`, if configured
+        templates_path = config.get("FORM16_TEMPLATES")
+        self.templates = TemplateIndex.load(templates_path) if templates_path else None
+        # Without an API key the service still extracts and computes; chat answers 503
+        self.llm = self.assistant = None
+        if not config.get("GROQ_API_KEY"):
+            return
+        self._endpoints = {}
+        # The model is picked per request from LLM_ROUTES, failing over when one is degraded
+        self.llm = ModelRouter(
+            parse_routes(config.get("LLM_ROUTES", DEFAULT_MODEL), self.endpoint),
+            ttft_budget_ms=float(config.get("LLM_TTFT_BUDGET_MS", 1500)),
+            first_token_timeout=float(config.get("LLM_FIRST_TOKEN_TIMEOUT_SECONDS", 15)),
+        )
+        self.assistant = Assistant(
+            llm=self.llm,
+            retrieval=RetrievalIndex.open(index_dir=config.get("RETRIEVAL_INDEX_DIR")),
+            answer_cache=AnswerCache(
+                max_entries=int(config.get("ANSWER_CACHE_ENTRIES", 512)),
+                ttl_seconds=int(config.get("ANSWER_CACHE_TTL_SECONDS", 24 * 3600)),
+                threshold=float(config.get("ANSWER_CACHE_THRESHOLD", 0.95)),
+            ),
+            system_prompt=config.get("CHAT_CONTEXT", DEFAULT_SYSTEM_PROMPT),
+            initial_response=config.get("INITIAL_RESPONSE", DEFAULT_GREETING),
+            top_k=int(config.get("RETRIEVAL_TOP_K", 3)),
+        )
+
+    def endpoint(self, name):
+        """The model client of an endpoint, configured as in the app's get_llm_client."""
+        llm = self._endpoints.get(name)
+        if llm is None:
+            prefix = f"LLM_ENDPOINT_{name.upper()}_"
+            # Identical concurrent questions share one model stream; chat turns go before background work
+            llm = self._endpoints[name] = LLMScheduler(
+                LLMClient(
+                    api_key=self.config.get(prefix + "API_KEY", self.config.get("GROQ_API_KEY")),
+                    base_url=self.config.get("GROQ_BASE_URL") if name == "groq" else self.config[prefix + "BASE_URL"],
+                    timeout=float(self.config.get("LLM_TIMEOUT_SECONDS", 30)),
+                    max_retries=int(self.config.get("LLM_MAX_RETRIES", 4)),
+                    max_concurrency=int(self.config.get("LLM_MAX_CONCURRENCY", 8)),
+                ),
+                background_slots=int(self.config.get("LLM_BACKGROUND_SLOTS", 0)) or None,
+                throttle_cooldown=float(self.config.get("LLM_THROTTLE_COOLDOWN_SECONDS", 20)),
+            )
+        return llm
+
+    def llm_stats(self):
+        if self.llm is None:
+            return None
+        return {**self.llm.stats(), "endpoints": {name: llm.stats() for name, llm in self._endpoints.items()}}
+
+    def extract(self, pdf_bytes, fields):
+        """Blocking: runs on a service thread, parsing in the process pool on a cache miss."""
+        return self.extraction_cache.get_or_extract(
+            pdf_bytes,
+            lambda file: self.processes.submit(_extract_bytes, file.getvalue(), fields, self.templates).result(),
+            fields, self.templates)
+
+    def close(self):
+        self.processes.shutdown(cancel_futures=True)
+        self.threads.shutdown(wait=False, cancel_futures=True)
+
+
+@web.middleware
+async def error_middleware(request, handler):
+    metrics.begin_request("api")
+    try:
+        with metrics.span("api_request", route=request.match_info.route.resource.canonical
+                          if request.match_info.route.resource else request.path):
+            return await handler(request)
+    except ApiError as exc:
+        return web.json_response({"error": str(exc)}, status=exc.status)
+    except json.JSONDecodeError:
+        return web.json_response({"error": "Request body must be JSON"}, status=400)
+
+
+async def _json_body(request):
+    payload = await request.json()
+    if not isinstance(payload, dict):
+        raise ApiError(400, "Request body must be a JSON object")
+    return payload
+
+
+async def _pdf_body(request):
+    if request.content_type.startswith("multipart/"):
+        reader = await request.multipart()
+        async for part in reader:
+            if part.name == "file":
+                return await part.read()
+        raise ApiError(400, "Multipart upload needs a 'file' part")
+    return await request.read()
+
+
+async def extract(request):
+    service = request.app["service"]
+    fields = resolve_fields(request.query.get("fields", "core"))
+    if not fields:
+        raise ApiError(400, "Unknown field set")
+    analyze = request.query.get("analyze", "").lower() in ("1", "true", "yes")
+    fy = request.query.get("fy", DEFAULT_FY)
+    supported_years = sorted({year for year, _ in TAX_RULES})
+    if analyze and fy not in supported_years:
+        raise ApiError(400, f"Unknown financial year '{fy}'; supported: {', '.join(supported_years)}")
+    pdf_bytes = await _pdf_body(request)
+    if not pdf_bytes.startswith(b"%PDF"):
+        raise ApiError(415, "Body is not a PDF")
+
+    loop = asyncio.get_running_loop()
+    try:
+        extracted = await loop.run_in_executor(service.threads, service.extract, pdf_bytes, fields)
+    except Exception as exc:
+        raise ApiError(422, f"Could not parse the certificate: {type(exc).__name__}") from exc
+    if analyze:
+        return web.json_response(await loop.run_in_executor(service.threads, analyze_extracted, extracted, fy))
+    return web.json_response({"extracted_data": extracted})
+
+
+def _tax_response(taxable_income, tds, deductions):
+    columns = tax_columns(taxable_income, tds, deductions)
+    return {name: values.tolist() for name, values in columns.items()}
+
+
+async def tax(request):
+    payload = await _json_body(request)
+    income = _amounts(payload, "taxable_income")
+    tds = _amounts(payload, "tds", required=False)
+    deductions = _amounts(payload, "deductions", required=False)
+    if income.ndim:
+        raise ApiError(400, "Use /v1/tax/batch for lists")
+    for name, values in (("tds", tds), ("deductions", deductions)):
+        if values is not None and values.ndim:
+            raise ApiError(400, f"'{name}' must be a single number; use /v1/tax/batch for lists")
+    breakdown = None
+    if deductions is None:
+        breakdown = {section: float(amount[0]) for section, amount in deduction_columns([income]).items()}
+        deductions = sum(breakdown.values())
+    summary = {name: values[0] for name, values in
+               _tax_response([income], [0 if tds is None else tds], [deductions]).items()}
+    return web.json_response({**summary, "deductions": breakdown} if breakdown else summary)
+
+
+async def tax_batch(request):
+    payload = await _json_body(request)
+    income = np.atleast_1d(_amounts(payload, "taxable_income"))
+    tds = _amounts(payload, "tds", required=False)
+    deductions = _amounts(payload, "deductions", required=False)
+    if income.ndim != 1:
+        raise ApiError(400, "'taxable_income' must be a flat list of numbers")
+    if len(income) > MAX_BATCH_ROWS:
+        raise ApiError(413, f"At most {MAX_BATCH_ROWS} rows per batch")
+    for name, values in (("tds", tds), ("deductions", deductions)):
+        if values is not None and values.ndim and values.shape != income.shape:
+            raise ApiError(400, f"'{name}' must have one value per income")
+    tds = 0 if tds is None else tds
+    if len(income) <= INLINE_BATCH_ROWS:
+        return web.json_response(_tax_response(income, tds, deductions))
+    response = await asyncio.get_running_loop().run_in_executor(
+        request.app["service"].threads, _tax_response, income, tds, deductions)
+    return web.json_response(response)
+
+
+def _history(payload):
+    history = payload.get("history") or []
+    if not isinstance(history, list) or not all(
+            isinstance(message, dict) and message.get("role") in ("user", "assistant")
+            and isinstance(message.get("content"), str) for message in history):
+        raise ApiError(400, "'history' must be a list of {role, content} messages")
+    return [{"role": message["role"], "content": message["content"]} for message in history]
+
+
+async def chat(request):
+    """Streams the answer as server-sent events: `delta` events, then `done` or `error`."""
+    service = request.app["service"]
+    if service.assistant is None:
+        raise ApiError(503, "Chat is not configured (GROQ_API_KEY is not set)")
+    payload = await _json_body(request)
+    question = payload.get("message")
+    if not isinstance(question, str) or not question.strip():
+        raise ApiError(400, "'message' is required")
+    history = _history(payload) + [{"role": "user", "content": question}]
+
+    loop = asyncio.get_running_loop()
+    assistant = service.assistant
+    turn = await loop.run_in_executor(service.threads, assistant.prepare, question, history, ContextWindow())
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache",
+                                           "X-Accel-Buffering": "no"})
+    await response.prepare(request)
+
+    async def send(event, data):
+        await response.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+
+    if turn.cached_answer is not None:
+        await send("delta", {"content": turn.cached_answer})
+        await send("done", {"cached": True})
+        return response
+
+    # The model stream is blocking; a service thread pumps it into an asyncio queue
+    queue = asyncio.Queue()
+    cancelled = threading.Event()
+    stats = StreamStats(model=assistant.model)
+
+    def pump():
+        parts = []
+        try:
+            stream = assistant.stream(turn, stats)
+            try:
+                for delta in stream:
+                    if cancelled.is_set():
+                        break
+                    parts.append(delta)
+                    loop.call_soon_threadsafe(queue.put_nowait, ("delta", delta))
+            finally:
+                stream.close()
+            if not cancelled.is_set():
+                assistant.remember(turn, "".join(parts))
+            loop.call_soon_threadsafe(queue.put_nowait, ("done", None))
+        except LLMUnavailableError as exc:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", str(exc)))
+        except Exception as exc:
+            # Anything else (e.g. a rejected API key) must still end the event stream
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", type(exc).__name__))
+
+    pumping = loop.run_in_executor(service.threads, pump)
+    try:
+        while True:
+            kind, value = await queue.get()
+            if kind == "delta":
+                await send("delta", {"content": value})
+            elif kind == "error":
+                await send("error", {"error": value})
+                break
+            else:
+                await send("done", {"cached": False, "stats": stats.as_dict()})
+                break
+    finally:
+        # Client went away or we are done: let the pump release its model slot
+        cancelled.set()
+        await pumping
+    return response
+
+
+async def healthz(request):
+    return web.json_response({"status": "ok", "llm": request.app["service"].llm_stats()})
+
+
+async def prometheus(request):
+    return web.Response(text=metrics.prometheus_text(), content_type="text/plain")
+
+
+def create_app(service):
+    app = web.Application(middlewares=[error_middleware], client_max_size=MAX_UPLOAD_BYTES)
+    app["service"] = service
+    app.add_routes([
+        web.post("/v1/extract", extract),
+        web.post("/v1/tax", tax),
+        web.post("/v1/tax/batch", tax_batch),
+        web.post("/v1/chat", chat),
+        web.get("/healthz", healthz),
+        web.get("/metrics", prometheus),
+    ])
+
+    async def close_service(app):
+        service.close()
+
+    app.on_cleanup.append(close_service)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the TaxNova HTTP API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None, help="PDF parsing processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    metrics.configure(jsonl_path=os.environ.get("METRICS_JSONL_PATH"),
+                      prometheus_path=os.environ.get("METRICS_PROMETHEUS_PATH"))
+    web.run_app(create_app(TaxNovaService(args.workers)), host=args.host, port=args.port, access_log=None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
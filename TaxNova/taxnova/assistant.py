@@ -0,0 +1,69 @@
+"""One chat turn of the tax assistant, independent of the UI.
+
+A turn is prepared (retrieval, context window, answer-cache lookup), then
+either answered from the cache or streamed from the model, and finally
+remembered in the cache when it does not depend on earlier turns.
+"""
+from collections import namedtuple
+
+from taxnova.answer_cache import is_context_free
+from taxnova.chat_stream import parse_groq_stream
+from taxnova.metrics import metrics
+from taxnova.retrieval import format_passages
+
+DEFAULT_MODEL = "llama3-8b-8192"
+
+# `messages` is what would be sent to the model; `cached_answer` is None on a miss
+ChatTurn = namedtuple("ChatTurn", ["question", "messages", "cacheable", "cached_answer"])
+
+
+class Assistant:
+    def __init__(self, llm, retrieval, answer_cache, system_prompt, initial_response,
+                 model=DEFAULT_MODEL, top_k=3):
+        self.llm = llm
+        self.retrieval = retrieval
+        self.answer_cache = answer_cache
+        self.system_prompt = system_prompt
+        self.initial_response = initial_response
+        self.model = model
+        self.top_k = top_k
+
+    def prepare(self, question, history, window, profile=None):
+        """Builds the turn for `question`, the last message of `history`.
+
+        `profile` is the taxpayer's context block (taxnova.briefing), if any.
+        """
+        # Ground the answer in the most relevant tax rules from the local corpus
+        with metrics.span("retrieval"):
+            passages = self.retrieval.search(question, k=self.top_k)
+        reference = ("Relevant tax rules (cite them where useful):\n" + format_passages(passages)
+                     if passages else None)
+        if profile:
+            reference = profile + ("\n\n" + reference if reference else "")
+        messages = window.build_messages(self.system_prompt, self.initial_response, history, reference=reference)
+
+        # Context-free questions can be answered from the shared answer cache;
+        # the last three turns are enough to tell a session's first question apart.
+        # Answers that may use the taxpayer's own figures never go through it.
+        cacheable = profile is None and is_context_free(question, history[-3:])
+        cached_answer = self.answer_cache.lookup(question, namespace=self.model) if cacheable else None
+        if cached_answer is not None:
+            metrics.inc("answer_cache_hits")
+        return ChatTurn(question, messages, cacheable, cached_answer)
+
+    def stream(self, turn, stats=None):
+        """Yields the model's answer as text deltas; raises LLMUnavailableError."""
+        return parse_groq_stream(self.llm.chat_stream(model=self.model, messages=turn.messages), stats)
+
+    def answer(self, question, profile=None, max_tokens=400):
+        """A complete, non-streamed answer to a standalone question, e.g. a briefing."""
+        messages = [{"role": "system", "content": self.system_prompt}]
+        if profile:
+            messages.append({"role": "system", "content": profile})
+        messages.append({"role": "user", "content": question})
+        response = self.llm.chat(model=self.model, messages=messages, max_tokens=max_tokens)
+        return response.choices[0].message.content
+
+    def remember(self, turn, answer):
+        if turn.cacheable and answer and turn.cached_answer is None:
+            self.answer_cache.store(turn.question, answer, namespace=self.model)
@@ -0,0 +1,115 @@
+"""Taxpayer profile for the chat and a speculative first-turn briefing.
+
+Once a certificate is analysed, its numbers are encoded into a compact profile
+block that goes into every chat request, so the user never has to retype
+them. A personalised briefing is generated from the same block on a
+background thread while the user reads the summary, and cached by document
+hash, so it is ready by the time they turn to the chat.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from taxnova.metrics import metrics
+from taxnova.tax_engine import DEFAULT_FY
+
+BRIEFING_REQUEST = ("Give me a short briefing on my Form 16 in under 150 words: my income and TDS, whether "
+                    "I owe tax or get a refund, which regime is cheaper for me, and the two most useful "
+                    "things I can still do to save tax.")
+
+
+def _rupees(value):
+    # Whole rupees keep the block short; paise do not change any advice
+    return f"{value:,.0f}"
+
+
+def taxpayer_profile(analysis, fy=DEFAULT_FY):
+    """Compact context block with the extracted figures, deductions, tax and regime plan."""
+    summary = analysis["tax_summary"]
+    plan = analysis["regime_plan"]
+    refund = max(0.0, summary["tds"] - summary["tax_liability"])
+    lines = [
+        f"Taxpayer profile from the user's uploaded Form 16 (FY {fy}, amounts in Rs.):",
+        "Certificate: " + " | ".join(f"{field} {_rupees(value)}"
+                                     for field, value in analysis["extracted_data"].items()),
+        "Deductions: " + " | ".join(f"{section} {_rupees(amount)}"
+                                    for section, amount in analysis["deductions"].items())
+        + f" (total {_rupees(summary['total_deductions'])})",
+        f"Tax: taxable after deductions {_rupees(summary['taxable_after_deductions'])} | "
+        f"liability {_rupees(summary['tax_liability'])} | due {_rupees(summary['tax_due'])} | "
+        f"refund {_rupees(refund)}",
+    ]
+    old, new = plan["old_regime"], plan["new_regime"]
+    if plan["regime"] == "new":
+        lines.append(f"Regime: new is cheaper (tax {_rupees(new['tax'])} vs {_rupees(old['tax'])} "
+                     f"under the old regime with its best deductions)")
+    else:
+        allocation = ", ".join(f"{section} {_rupees(amount)}" for section, amount in old["allocation"].items()
+                               if amount)
+        lines.append(f"Regime: old is cheaper (tax {_rupees(old['tax'])} vs {_rupees(new['tax'])} under the "
+                     f"new regime) if they claim {allocation}, investing {_rupees(old['extra_investment'])} more")
+    return "\n".join(lines)
+
+
+class Briefings:
+    """First-turn briefings by document hash, generated on background threads.
+
+    Sessions that upload the same certificate share one briefing; a failed
+    generation is forgotten so the next upload tries again.
+    """
+
+    def __init__(self, assistant, max_entries=256, workers=2):
+        self.assistant = assistant
+        self.max_entries = max_entries
+        self.generated = 0
+        self.failures = 0
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="taxnova-briefing")
+        self._lock = threading.Lock()
+        self._futures = OrderedDict()  # document hash -> Future, LRU order
+
+    def prefetch(self, document_hash, profile):
+        """Starts the briefing for a certificate unless it is ready or on its way."""
+        with self._lock:
+            future = self._futures.get(document_hash)
+            if future is not None and not (future.done() and future.exception()):
+                self._futures.move_to_end(document_hash)
+                return
+            self._futures[document_hash] = self._pool.submit(self._generate, profile)
+            while len(self._futures) > self.max_entries:
+                self._futures.popitem(last=False)
+
+    def get(self, document_hash, timeout=0):
+        """The briefing, waiting up to `timeout` seconds; None if it is not ready or failed."""
+        with self._lock:
+            future = self._futures.get(document_hash)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return None
+        except Exception:
+            return None
+
+    def pending(self, document_hash):
+        with self._lock:
+            future = self._futures.get(document_hash)
+        return future is not None and not future.done()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._futures), "pending": sum(not f.done() for f in self._futures.values()),
+                    "generated": self.generated, "failures": self.failures}
+
+    def _generate(self, profile):
+        try:
+            with metrics.span("briefing"):
+                briefing = self.assistant.answer(BRIEFING_REQUEST, profile)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            raise
+        with self._lock:
+            self.generated += 1
+        return briefing
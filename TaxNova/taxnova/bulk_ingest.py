@@ -0,0 +1,234 @@
+"""Headless bulk ingestion of Form 16 / Form 22 PDFs.
+
+Parses a directory or zip of certificates across a process pool and streams
+one row per file to CSV or Parquet as workers finish. With --bundle, the
+source is a single TRACES bulk Form 16 PDF and there is one row per employee:
+
+    python -m taxnova.bulk_ingest certificates.zip -o results.parquet --workers 8
+    python -m taxnova.bulk_ingest traces_bundle.pdf --bundle -o employees.csv --workers 8
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+from pathlib import Path
+
+from taxnova.form16 import ALL_FIELDS, CORE_FIELDS, extract_form16_data, fields_for_form
+from taxnova.form16_bundle import iter_bundle
+from taxnova.form16_templates import TemplateIndex
+from taxnova.tax_engine import compute_tax_batch
+
+TAX_COLUMNS = ["total_deductions", "taxable_after_deductions", "tax_liability", "tax_due"]
+# Every other output column is a number
+TEXT_COLUMNS = {"file", "status", "error", "pan", "pages"}
+
+
+def output_columns(fields):
+    return ["file", "status", "error", "elapsed_ms", *fields, *TAX_COLUMNS]
+
+
+def bundle_columns(fields):
+    return ["file", "status", "error", "pan", "pages", *fields, *TAX_COLUMNS]
+
+
+def iter_jobs(source):
+    """Yields (archive, member) pairs for every PDF in a directory or zip."""
+    source = Path(source)
+    if source.is_dir():
+        for path in sorted(source.rglob("*")):
+            if path.is_file() and path.suffix.lower() == ".pdf":
+                yield None, str(path)
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(".pdf"):
+                    yield str(source), info.filename
+    else:
+        raise ValueError(f"{source} is neither a directory nor a zip archive")
+
+
+def parse_job(job, fields=CORE_FIELDS, templates=None):
+    """Worker entry point: parses one certificate and never raises."""
+    archive, member = job
+    label = f"{archive}!{member}" if archive else member
+    started = time.perf_counter()
+    try:
+        if archive:
+            with zipfile.ZipFile(archive) as bundle:
+                data = extract_form16_data(io.BytesIO(bundle.read(member)), fields, templates)
+        else:
+            data = extract_form16_data(member, fields, templates)
+        row = {"file": label, "status": "ok", "error": "", **data}
+    except Exception as exc:
+        row = {"file": label, "status": "error", "error": f"{type(exc).__name__}: {exc}"}
+    row["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return row
+
+
+def add_tax_columns(rows):
+    """Runs the vectorized tax engine over a batch of parsed rows."""
+    parsed = [row for row in rows if row["status"] == "ok"]
+    if not parsed or "Taxable Income" not in parsed[0] or "TDS Deducted" not in parsed[0]:
+        return rows
+    taxes = compute_tax_batch(
+        [row["Taxable Income"] for row in parsed],
+        [row["TDS Deducted"] for row in parsed],
+    )
+    for row, (_, tax) in zip(parsed, taxes.iterrows()):
+        for column in TAX_COLUMNS:
+            row[column] = float(tax[column])
+    return rows
+
+
+class CsvSink:
+    def __init__(self, path, columns):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=columns, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSink:
+    def __init__(self, path, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow") from exc
+        self._pa = pa
+        self._columns = columns
+        self._schema = pa.schema(
+            [(column, pa.string() if column in TEXT_COLUMNS else pa.float64()) for column in columns]
+        )
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        columns = {column: [row.get(column) for row in rows] for column in self._columns}
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def open_sink(path, columns, fmt=None):
+    fmt = fmt or ("parquet" if str(path).lower().endswith(".parquet") else "csv")
+    return ParquetSink(path, columns) if fmt == "parquet" else CsvSink(path, columns)
+
+
+def resolve_fields(name):
+    """Maps a --fields choice ("core", "all" or a form such as "16-B") to field names."""
+    if name == "core":
+        return CORE_FIELDS
+    if name == "all":
+        return ALL_FIELDS
+    return fields_for_form(name)
+
+
+def run(source, output, fmt=None, workers=None, batch_size=500, max_tasks_per_child=200,
+        fields=CORE_FIELDS, templates=None):
+    """Parses every certificate under `source` and returns (ok, failed) counts."""
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 4
+    jobs = iter_jobs(source)
+    parse = partial(parse_job, fields=fields, templates=templates)
+    sink = open_sink(output, output_columns(fields), fmt)
+    buffer, ok, failed = [], 0, 0
+
+    def flush():
+        if buffer:
+            sink.write(add_tax_columns(buffer))
+            buffer.clear()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=max_tasks_per_child) as pool:
+            # Keep only a bounded window of jobs queued so huge archives never pile up in memory
+            pending = set()
+            for job in jobs:
+                pending.add(pool.submit(parse, job))
+                if len(pending) < max_in_flight:
+                    continue
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    row = future.result()
+                    ok, failed = (ok + 1, failed) if row["status"] == "ok" else (ok, failed + 1)
+                    buffer.append(row)
+                if len(buffer) >= batch_size:
+                    flush()
+            for future in wait(pending).done:
+                row = future.result()
+                ok, failed = (ok + 1, failed) if row["status"] == "ok" else (ok, failed + 1)
+                buffer.append(row)
+        flush()
+    finally:
+        sink.close()
+    return ok, failed
+
+
+def run_bundle(source, output, fmt=None, workers=None, batch_size=500, fields=CORE_FIELDS,
+               chunk_pages=100):
+    """Splits a TRACES bundle into per-employee rows and returns (ok, failed) counts."""
+    sink = open_sink(output, bundle_columns(fields), fmt)
+    buffer, ok, failed = [], 0, 0
+    try:
+        for result in iter_bundle(source, fields, workers, chunk_pages):
+            pages = f"{result.pop('first_page')}-{result.pop('last_page')}"
+            buffer.append({"file": f"{source}#{pages}", "pages": pages, **result})
+            ok, failed = (ok + 1, failed) if result["status"] == "ok" else (ok, failed + 1)
+            if len(buffer) >= batch_size:
+                sink.write(add_tax_columns(buffer))
+                buffer.clear()
+        if buffer:
+            sink.write(add_tax_columns(buffer))
+    finally:
+        sink.close()
+    return ok, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-parse Form 16 / Form 22 PDFs.")
+    parser.add_argument("source", help="Directory or .zip of PDF certificates, or a bundle PDF with --bundle")
+    parser.add_argument("-o", "--output", required=True, help="Output .csv or .parquet file")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="Defaults to the output extension")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--fields", choices=["core", "all", "16-A", "16-B", "22"], default="core",
+                        help="Fields to extract (default: the three shown in the app)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows buffered per write")
+    parser.add_argument("--max-tasks-per-child", type=int, default=200,
+                        help="Recycle workers after this many files to cap pdfplumber memory")
+    parser.add_argument("--templates", help="Layout templates for region-cropped extraction "
+                                            "(see taxnova.form16_templates; not used with --bundle)")
+    parser.add_argument("--bundle", action="store_true",
+                        help="Source is one TRACES bulk Form 16 PDF; write one row per employee")
+    parser.add_argument("--chunk-pages", type=int, default=100,
+                        help="Pages per worker task in --bundle mode")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.bundle:
+        ok, failed = run_bundle(args.source, args.output, args.format, args.workers,
+                                args.batch_size, resolve_fields(args.fields), args.chunk_pages)
+        unit = "employees"
+    else:
+        templates = TemplateIndex.load(args.templates) if args.templates else None
+        ok, failed = run(args.source, args.output, args.format, args.workers,
+                         args.batch_size, args.max_tasks_per_child, resolve_fields(args.fields), templates)
+        unit = "files"
+    elapsed = time.perf_counter() - started
+    print(f"Parsed {ok + failed} {unit} ({ok} ok, {failed} failed) in {elapsed:.1f}s -> {args.output}",
+          file=sys.stderr)
+    return 1 if failed and not ok else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""In-memory PDF export of chat transcripts.
+
+The transcript is laid out page by page in Helvetica and written with the
+pure-Python `pdf_writer` (no wkhtmltopdf subprocess), which yields the file
+in chunks as each page is finished. Rendered files are cached by transcript
+hash, so exporting the same conversation again costs nothing.
+"""
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+
+from taxnova.pdf_writer import PAGE_HEIGHT, PAGE_WIDTH, Page, iter_pdf, text_op, text_width
+
+MARGIN = 50
+FONT_SIZE = 10
+LEADING = 14
+
+# Characters the WinAnsi-encoded base font cannot show
+_REPLACEMENTS = {"₹": "Rs. ", "‘": "'", "’": "'", "“": '"', "”": '"',
+                 "–": "-", "—": "-", "•": "-", "…": "...", "\t": "    "}
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+CACHE_ENTRIES = 32
+
+
+def transcript_hash(messages):
+    payload = json.dumps([[m["role"], m["content"]] for m in messages], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _plain_text(text):
+    text = re.sub(r"(\*\*|__|`)", "", text)
+    text = re.sub(r"^\s{0,3}#{1,6}\s*", "", text, flags=re.MULTILINE)
+    for char, replacement in _REPLACEMENTS.items():
+        text = text.replace(char, replacement)
+    return text
+
+
+def wrap_lines(text, max_width=PAGE_WIDTH - 2 * MARGIN):
+    """Greedy word wrap using Helvetica metrics; very long words are split."""
+    for paragraph in _plain_text(text).split("\n"):
+        line = ""
+        for word in paragraph.split(" "):
+            candidate = f"{line} {word}" if line else word
+            if text_width(candidate, FONT_SIZE) <= max_width:
+                line = candidate
+                continue
+            if line:
+                yield line
+            while text_width(word, FONT_SIZE) > max_width:
+                cut = len(word)
+                while cut > 1 and text_width(word[:cut], FONT_SIZE) > max_width:
+                    cut -= 1
+                yield word[:cut]
+                word = word[cut:]
+            line = word
+        yield line
+
+
+def _transcript_lines(messages):
+    for message in messages:
+        yield ("bold", f"{message['role'].capitalize()}:")
+        for line in wrap_lines(message["content"]):
+            yield ("regular", line)
+        yield ("regular", "")
+
+
+def _iter_pages(messages, title):
+    lines = _transcript_lines(messages)
+    lines_per_page = (PAGE_HEIGHT - 2 * MARGIN) // LEADING - 2
+    page_number = 0
+    exhausted = False
+    while not exhausted:
+        page_number += 1
+        ops = [text_op("F2", 13, MARGIN, PAGE_HEIGHT - MARGIN, title)]
+        y = PAGE_HEIGHT - MARGIN - 2 * LEADING
+        for _ in range(lines_per_page):
+            item = next(lines, None)
+            if item is None:
+                exhausted = True
+                break
+            style, text = item
+            if text:
+                ops.append(text_op("F2" if style == "bold" else "F1", FONT_SIZE, MARGIN, y, text))
+            y -= LEADING
+        ops.append(text_op("F1", 8, PAGE_WIDTH - MARGIN - 30, MARGIN / 2, f"Page {page_number}"))
+        yield Page(b"\n".join(ops))
+
+
+def iter_chat_pdf(messages, title="TaxNova Assistant Chat"):
+    """Yields the PDF for `messages` in chunks, one page at a time."""
+    return iter_pdf(_iter_pages(messages, title))
+
+
+def render_chat_pdf(messages):
+    """Returns the transcript PDF as bytes, reusing the cached copy when unchanged."""
+    key = transcript_hash(messages)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    pdf = b"".join(iter_chat_pdf(messages))
+    with _cache_lock:
+        _cache[key] = pdf
+        while len(_cache) > CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return pdf
@@ -0,0 +1,199 @@
+"""SQLite-backed chat history, keyed by session.
+
+Turns are written to a local SQLite database in WAL mode, so readers never
+block the writer and sessions do not keep their whole conversation in RAM.
+Only the last few messages of recently active sessions are held in memory;
+sessions idle for longer than `idle_seconds` are dropped from that tier and
+read back from disk on their next visit. Old sessions are purged after
+`retention_days`.
+"""
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    message_count INTEGER NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen);
+"""
+
+
+class _Tail:
+    """The newest messages of one session plus its total message count."""
+
+    def __init__(self, messages, count, limit):
+        self.messages = deque(messages, maxlen=limit)
+        self.count = count
+        self.last_seen = time.monotonic()
+
+
+class ChatStore:
+    def __init__(self, path, tail_messages=50, idle_seconds=15 * 60, retention_days=30):
+        self.path = str(path)
+        self.tail_messages = tail_messages
+        self.idle_seconds = idle_seconds
+        self.retention_days = retention_days
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._tails = OrderedDict()  # session_id -> _Tail, least recently used first
+        with self._connection() as db:
+            db.executescript(SCHEMA)
+        if retention_days:
+            self.purge(older_than_seconds=retention_days * 86400)
+
+    def _connection(self):
+        # sqlite3 connections are not shared across threads; each thread gets its own
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def new_session(self, greeting=None):
+        """Creates a session, optionally opening it with an assistant greeting."""
+        session_id = uuid.uuid4().hex
+        self._connection().execute(
+            "INSERT INTO sessions (session_id, message_count, last_seen) VALUES (?, 0, ?)",
+            (session_id, time.time()))
+        with self._lock:
+            self._tails[session_id] = _Tail([], 0, self.tail_messages)
+        if greeting:
+            self.append(session_id, "assistant", greeting)
+        return session_id
+
+    def append(self, session_id, role, content):
+        tail = self._tail(session_id)
+        message = {"role": role, "content": content}
+        with self._lock:
+            seq = tail.count
+            tail.count += 1
+            tail.messages.append(message)
+        db = self._connection()
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute(
+                "INSERT INTO messages (session_id, seq, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                (session_id, seq, role, content, time.time()))
+            db.execute("UPDATE sessions SET message_count = ?, last_seen = ? WHERE session_id = ?",
+                       (seq + 1, time.time(), session_id))
+        self.evict_idle()
+        return seq
+
+    def count(self, session_id):
+        return self._tail(session_id).count
+
+    def recent(self, session_id, limit):
+        """The newest `limit` messages, oldest first; served from memory when possible."""
+        tail = self._tail(session_id)
+        with self._lock:
+            if limit <= len(tail.messages) or len(tail.messages) == tail.count:
+                return list(tail.messages)[-limit:] if limit else []
+            count = tail.count
+        return self.messages(session_id, max(count - limit, 0), count)
+
+    def messages(self, session_id, start=0, stop=None):
+        """Messages with positions in [start, stop), oldest first."""
+        query = "SELECT role, content FROM messages WHERE session_id = ? AND seq >= ?"
+        params = [session_id, start]
+        if stop is not None:
+            query += " AND seq < ?"
+            params.append(stop)
+        rows = self._connection().execute(query + " ORDER BY seq", params)
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def history(self, session_id):
+        return SessionHistory(self, session_id)
+
+    def evict_idle(self):
+        """Drops in-memory tails of sessions idle for longer than `idle_seconds`."""
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            while self._tails:
+                session_id, tail = next(iter(self._tails.items()))
+                if tail.last_seen >= cutoff:
+                    break
+                del self._tails[session_id]
+
+    def purge(self, older_than_seconds):
+        """Deletes sessions, and their messages, not seen for `older_than_seconds`."""
+        cutoff = time.time() - older_than_seconds
+        db = self._connection()
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("DELETE FROM messages WHERE session_id IN "
+                       "(SELECT session_id FROM sessions WHERE last_seen < ?)", (cutoff,))
+            deleted = db.execute("DELETE FROM sessions WHERE last_seen < ?", (cutoff,)).rowcount
+        return deleted
+
+    def stats(self):
+        with self._lock:
+            return {"sessions_in_memory": len(self._tails),
+                    "messages_in_memory": sum(len(tail.messages) for tail in self._tails.values())}
+
+    def _tail(self, session_id):
+        with self._lock:
+            tail = self._tails.get(session_id)
+            if tail is not None:
+                self._tails.move_to_end(session_id)
+                tail.last_seen = time.monotonic()
+                return tail
+        # Cold session: reload its newest messages from disk
+        row = self._connection().execute(
+            "SELECT message_count FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown chat session {session_id}")
+        count = row[0]
+        messages = self.messages(session_id, max(count - self.tail_messages, 0), count)
+        with self._lock:
+            tail = self._tails.setdefault(session_id, _Tail(messages, count, self.tail_messages))
+            self._tails.move_to_end(session_id)
+            return tail
+
+
+class SessionHistory:
+    """Read-only list view of one session, for code that expects a history list.
+
+    Indexing and slicing fetch only the requested messages.
+    """
+
+    def __init__(self, store, session_id):
+        self.store = store
+        self.session_id = session_id
+
+    def __len__(self):
+        return self.store.count(self.session_id)
+
+    def __getitem__(self, index):
+        count = len(self)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(count)
+            if stop <= start:
+                return []
+            if count - start <= self.store.tail_messages:
+                messages = self.store.recent(self.session_id, count - start)[:stop - start]
+            else:
+                messages = self.store.messages(self.session_id, start, stop)
+            return messages[::step]
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("chat history index out of range")
+        return self[index:index + 1][0]
+
+    def __iter__(self):
+        return iter(self.store.messages(self.session_id))
@@ -0,0 +1,76 @@
+"""Streaming helpers for Groq chat completions."""
+import logging
+import time
+
+from taxnova.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class StreamStats:
+    """Time-to-first-token and throughput of one streamed completion."""
+
+    def __init__(self, model=None):
+        self.model = model
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        self.chunks = 0
+        self.completion_tokens = None  # reported by Groq on the final chunk
+
+    @property
+    def tokens(self):
+        return self.completion_tokens if self.completion_tokens is not None else self.chunks
+
+    @property
+    def ttft_ms(self):
+        if self.first_token_at is None:
+            return None
+        return (self.first_token_at - self.started) * 1000
+
+    @property
+    def tokens_per_sec(self):
+        if self.first_token_at is None or self.finished_at is None:
+            return None
+        generation_time = self.finished_at - self.first_token_at
+        return self.tokens / generation_time if generation_time > 0 else None
+
+    def as_dict(self):
+        return {
+            "model": self.model,
+            "ttft_ms": self.ttft_ms,
+            "total_ms": (self.finished_at - self.started) * 1000 if self.finished_at else None,
+            "tokens": self.tokens,
+            "tokens_per_sec": self.tokens_per_sec,
+        }
+
+
+def parse_groq_stream(stream, stats=None):
+    """Yields content deltas as they arrive, recording timings into `stats`."""
+    response_content = ""
+    try:
+        for chunk in stream:
+            # The model that actually answered, which a router may have picked
+            if stats is not None and getattr(chunk, "model", None):
+                stats.model = chunk.model
+            usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+            if stats is not None and usage is not None:
+                stats.completion_tokens = usage.completion_tokens
+            if chunk.choices and chunk.choices[0].delta.content is not None:
+                if stats is not None:
+                    if stats.first_token_at is None:
+                        stats.first_token_at = time.perf_counter()
+                    stats.chunks += 1
+                response_content += chunk.choices[0].delta.content
+                yield chunk.choices[0].delta.content
+    finally:
+        if stats is not None:
+            stats.finished_at = time.perf_counter()
+            summary = stats.as_dict()
+            logger.info("LLM stream finished: %s", summary)
+            metrics.record_span("llm_stream", summary["total_ms"], model=stats.model,
+                                ttft_ms=summary["ttft_ms"], tokens=stats.tokens)
+            if stats.ttft_ms is not None:
+                metrics.observe("llm_ttft_ms", stats.ttft_ms)
+            metrics.inc("llm_completion_tokens", stats.tokens)
+    return response_content
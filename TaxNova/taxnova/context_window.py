@@ -0,0 +1,82 @@
+"""Token-budgeted chat context for the 8k-context Groq models.
+
+Recent turns are sent verbatim while they fit the budget. Turns that fall out
+of the window are folded into a rolling summary exactly once, so the cost of
+building the prompt stays flat however long the session runs.
+"""
+import math
+import re
+
+# Rough Llama 3 BPE estimate: one token per ~4 characters of a word, one per symbol
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def count_tokens(text):
+    return sum(math.ceil(len(piece) / 4) for piece in _TOKEN_PIECES.findall(text))
+
+
+def message_tokens(message):
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _first_sentence(text, max_chars=160):
+    sentence = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0]
+    return sentence if len(sentence) <= max_chars else sentence[:max_chars].rstrip() + "..."
+
+
+def extractive_summary(previous_summary, turns):
+    """Default local summarizer: one line per evicted turn appended to the summary."""
+    lines = [f"{turn['role'].capitalize()}: {_first_sentence(turn['content'])}" for turn in turns]
+    return "\n".join(filter(None, [previous_summary, *lines]))
+
+
+class ContextWindow:
+    def __init__(self, budget_tokens=6000, summary_tokens=600, summarize=extractive_summary):
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = summary_tokens
+        self.summarize = summarize
+        self.summary = ""
+        self.folded_upto = 0  # history[:folded_upto] lives only in the summary
+
+    def build_messages(self, system_prompt, initial_response, history, reference=None):
+        """Returns the messages to send for `history`, folding evicted turns first.
+
+        `reference` is optional grounding text (e.g. retrieved tax rules) sent
+        as a system message right after the system prompt.
+        """
+        fixed = [{"role": "system", "content": system_prompt},
+                 {"role": "assistant", "content": initial_response}]
+        if reference:
+            fixed.insert(1, {"role": "system", "content": reference})
+        # Room for the summary is reserved up front so folding never overflows the budget
+        available = (self.budget_tokens - sum(message_tokens(m) for m in fixed)
+                     - self.summary_tokens - MESSAGE_OVERHEAD_TOKENS)
+
+        # Walk back from the newest turn; the latest message is always kept
+        start = len(history)
+        used = 0
+        while start > self.folded_upto:
+            cost = message_tokens(history[start - 1])
+            if used + cost > available and start < len(history):
+                break
+            used += cost
+            start -= 1
+
+        if start > self.folded_upto:
+            self.summary = self._trim_summary(
+                self.summarize(self.summary, history[self.folded_upto:start]))
+            self.folded_upto = start
+
+        messages = fixed[:-1]
+        if self.summary:
+            messages.append({"role": "system",
+                             "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        return messages + fixed[-1:] + list(history[self.folded_upto:])
+
+    def _trim_summary(self, summary):
+        # Oldest summary lines go first once the summary outgrows its own budget
+        lines = summary.splitlines()
+        while len(lines) > 1 and count_tokens("\n".join(lines)) > self.summary_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
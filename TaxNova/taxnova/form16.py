@@ -0,0 +1,144 @@
+"""Form 16 / Form 22 PDF parsing."""
+import re
+from collections import namedtuple
+
+import pdfplumber
+
+from taxnova.metrics import metrics
+
+# A labelled amount to extract. `labels` are alternative captions for the same
+# value and `forms` lists where it appears: Form 16 Part A/B or Form 22.
+FieldSpec = namedtuple("FieldSpec", ["name", "labels", "forms"])
+
+FIELD_SPECS = [
+    FieldSpec("Gross Salary", ["Gross Salary"], ("16-B",)),
+    FieldSpec("TDS Deducted", ["Tax Deducted at Source"], ("16-A", "16-B", "22")),
+    FieldSpec("Taxable Income", ["Taxable Income"], ("16-B", "22")),
+    # The total row only; the quarterly rows above it carry the same caption
+    FieldSpec("Tax Deposited", ["Total amount of tax deposited", "Total tax deposited"], ("16-A",)),
+    FieldSpec("Standard Deduction", ["Standard deduction"], ("16-B",)),
+    FieldSpec("Chapter VI-A Deductions",
+              ["Aggregate of deductible amount under Chapter VI-A", "Deductions under Chapter VI-A"],
+              ("16-B",)),
+    FieldSpec("Tax on Total Income", ["Tax on total income"], ("16-B", "22")),
+    FieldSpec("Health and Education Cess", ["Health and education cess"], ("16-B", "22")),
+    FieldSpec("Net Tax Payable", ["Net tax payable"], ("16-B", "22")),
+    FieldSpec("Gross Receipts", ["Gross Receipts", "Total Turnover"], ("22",)),
+    FieldSpec("Net Profit", ["Net Profit"], ("22",)),
+]
+
+# Fields shown in the app and written by the bulk tools by default
+CORE_FIELDS = ("Gross Salary", "TDS Deducted", "Taxable Income")
+ALL_FIELDS = tuple(spec.name for spec in FIELD_SPECS)
+
+# Western (12,345,678), Indian lakh/crore (1,23,45,678) or ungrouped amounts
+AMOUNT_PATTERN = re.compile(
+    r'(?<![\d,])((?:\d{1,3}(?:,\d{3})+|\d{1,2}(?:,\d{2})+,\d{3}|\d+)(?:\.\d{1,2})?)(?!,?\d)'
+)
+
+
+# Numbers that are references rather than amounts: "section 16(ia)", "u/s 192",
+# "FY 2024-25", "@ 4%", "80C", or anything inside parentheses
+_REFERENCE_BEFORE = re.compile(r"(?:\bsection|\bsec\.?|\bu/s\.?|\bFY|\bAY|\brule|@|\d-)\s*$", re.IGNORECASE)
+_REFERENCE_AFTER = re.compile(r"\s*%|[A-Za-z(]|-\d")
+
+
+def _label_regex(label):
+    return r"\s+".join(re.escape(word) for word in label.split())
+
+
+# Every label of every field in one alternation, so a page is scanned once
+# no matter how many fields are registered. The group name indexes FIELD_SPECS.
+LABEL_PATTERN = re.compile(
+    "|".join(
+        f"(?P<f{index}>{'|'.join(_label_regex(label) for label in spec.labels)})"
+        for index, spec in enumerate(FIELD_SPECS)
+    ),
+    re.IGNORECASE,
+)
+
+
+# Each field's own labels, to check that a row read by position is the expected one
+FIELD_LABELS = {
+    spec.name: re.compile("|".join(_label_regex(label) for label in spec.labels), re.IGNORECASE)
+    for spec in FIELD_SPECS
+}
+
+
+def fields_for_form(form):
+    """Names of the fields found on a given form, e.g. "16-A", "16-B" or "22"."""
+    return tuple(spec.name for spec in FIELD_SPECS if form in spec.forms)
+
+
+def parse_amount(value):
+    return float(value.replace(',', ''))
+
+
+def iter_line_amounts(text, start, end):
+    """Amounts in text[start:end], skipping section numbers, years, rates and parenthesised numbers."""
+    for amount in AMOUNT_PATTERN.finditer(text, start, end):
+        before = text[start:amount.start()]
+        if (_REFERENCE_BEFORE.search(before) or _REFERENCE_AFTER.match(text, amount.end(), end)
+                or before.count("(") > before.count(")")):
+            continue
+        yield amount
+
+
+def scan_fields(text, fields, found):
+    """Adds the first amount after each wanted label in `text` to `found`."""
+    for match in LABEL_PATTERN.finditer(text):
+        field = FIELD_SPECS[int(match.lastgroup[1:])].name
+        if field in found or field not in fields:
+            continue
+        # The amount is the first number following the label on the same line
+        line_end = text.find("\n", match.end())
+        amount = next(iter_line_amounts(text, match.end(), len(text) if line_end == -1 else line_end), None)
+        if amount:
+            found[field] = parse_amount(amount.group(1))
+            if len(found) == len(fields):
+                break
+    return found
+
+
+def iter_page_text(pdf):
+    """Yields each page's text lazily, calling extract_text once per page."""
+    for page in pdf.pages:
+        with metrics.span("page_extract"):
+            text = page.extract_text()
+        metrics.inc("pages_extracted")
+        # Drop pdfplumber's parsed objects for pages we are done with
+        page.close()
+        if text:
+            yield text
+
+
+def extract_form16_data(uploaded_file, fields=CORE_FIELDS, templates=None):
+    """Reads `fields` from a certificate.
+
+    With a `templates` index (taxnova.form16_templates), a certificate in a
+    known layout is read from its field regions only; whatever the template
+    cannot supply is found by scanning the full text.
+    """
+    found = {}
+    with metrics.span("pdf_open"):
+        pdf = pdfplumber.open(uploaded_file)
+    with pdf:
+        if templates and pdf.pages:
+            # form16_templates builds on the patterns above, so it is imported here
+            from taxnova.form16_templates import read_regions
+
+            with metrics.span("template_match"):
+                template = templates.match(pdf.pages[0])
+            if template is not None:
+                metrics.inc("template_hits")
+                with metrics.span("template_extract"):
+                    found = read_regions(pdf, template, fields)
+        # Stop opening pages once every field has been located
+        pages = iter_page_text(pdf) if len(found) < len(fields) else ()
+        for text in pages:
+            with metrics.span("field_scan"):
+                scan_fields(text, fields, found)
+            if len(found) == len(fields):
+                break
+
+    return {field: found.get(field, 0) for field in fields}
@@ -0,0 +1,138 @@
+"""TRACES bulk Form 16 bundles: one PDF with every employee's certificate.
+
+The bundle is cut into page ranges that worker processes parse on their own.
+Each page is reduced to the employee PAN printed on it and the fields found
+on it, and its text and pdfplumber objects are dropped before the next page
+is read. The parent stitches consecutive pages back into certificates, in
+bundle order: a page with a different employee PAN starts a new certificate,
+and a page without one (Part B, annexures) belongs to the current one. Each
+employee is yielded as soon as the next one starts, so memory stays flat
+whatever the bundle size.
+"""
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import pdfplumber
+from pdfminer.pdftypes import resolve1
+
+from taxnova.form16 import CORE_FIELDS, scan_fields
+
+# Income-tax PAN: five letters, four digits, one letter (TANs have four letters and five digits)
+PAN_PATTERN = re.compile(r"\b[A-Z]{5}[0-9]{4}[A-Z]\b")
+EMPLOYEE_PAN_LABEL = re.compile(r"PAN\s+of\s+the\s+(?:Employee|Deductee)", re.IGNORECASE)
+
+# What a worker sends back per page: no text, just the PAN and the fields on it
+PageSummary = namedtuple("PageSummary", ["number", "pan", "fields", "error"], defaults=("",))
+
+
+def employee_pan(text):
+    """The employee PAN on a page, or None when the page does not show one.
+
+    TRACES prints the PAN either after its label ("PAN of the Employee
+    ABCDE1234F") or in a table row below a header that also names the
+    deductor's PAN and TAN, with the employee's PAN last; both cases are the
+    last PAN on the first line at or after the label that has one.
+    """
+    label = EMPLOYEE_PAN_LABEL.search(text)
+    if label is None:
+        return None
+    lines = text[label.end():].split("\n", 3)
+    for line in lines[:3]:
+        pans = PAN_PATTERN.findall(line)
+        if pans:
+            return pans[-1]
+    return None
+
+
+def page_count(path):
+    """Number of pages, from the page tree root rather than by loading every page."""
+    with pdfplumber.open(path) as pdf:
+        count = resolve1(pdf.doc.catalog["Pages"]).get("Count")
+        return int(count) if count is not None else len(pdf.pages)
+
+
+def parse_range(path, start, stop, fields=CORE_FIELDS):
+    """Worker entry point: summaries of pages [start, stop) (0-based); never raises."""
+    summaries = []
+    try:
+        # Only this range's pages are wrapped as pdfplumber Page objects
+        with pdfplumber.open(path, pages=range(start + 1, stop + 1)) as pdf:
+            for page in pdf.pages:
+                try:
+                    text = page.extract_text() or ""
+                except Exception as exc:
+                    summaries.append(PageSummary(page.page_number, None, {}, f"{type(exc).__name__}: {exc}"))
+                    continue
+                finally:
+                    page.close()
+                summaries.append(PageSummary(page.page_number, employee_pan(text), scan_fields(text, fields, {})))
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        parsed = {summary.number for summary in summaries}
+        summaries.extend(PageSummary(number, None, {}, error)
+                         for number in range(start + 1, stop + 1) if number not in parsed)
+    return summaries
+
+
+def iter_certificates(summaries, fields=CORE_FIELDS):
+    """Groups page summaries (in page order) into one result per employee certificate."""
+    current = None
+    for summary in summaries:
+        if current is None or (summary.pan and summary.pan != current["pan"]):
+            if current is not None:
+                yield _result(current, fields)
+            current = {"pan": summary.pan or "", "first_page": summary.number, "found": {}, "errors": []}
+        elif summary.pan and not current["pan"]:
+            current["pan"] = summary.pan
+        current["last_page"] = summary.number
+        # The first amount in page order wins, as in extract_form16_data
+        for field, value in summary.fields.items():
+            current["found"].setdefault(field, value)
+        if summary.error:
+            current["errors"].append(f"page {summary.number}: {summary.error}")
+    if current is not None:
+        yield _result(current, fields)
+
+
+def _result(current, fields):
+    return {
+        "pan": current["pan"],
+        "first_page": current["first_page"],
+        "last_page": current["last_page"],
+        "status": "error" if current["errors"] else "ok",
+        "error": "; ".join(current["errors"]),
+        **{field: current["found"].get(field, 0) for field in fields},
+    }
+
+
+def iter_bundle(path, fields=CORE_FIELDS, workers=None, chunk_pages=100, max_tasks_per_child=20):
+    """Yields one result per employee in `path`, in bundle order, as workers finish.
+
+    At most a few page ranges are queued or buffered at once, so a slow range
+    holds back the stream but never lets results pile up in memory.
+    """
+    path = str(path)
+    workers = workers or os.cpu_count() or 1
+    total = page_count(path)
+    ranges = iter((start, min(start + chunk_pages, total)) for start in range(0, total, chunk_pages))
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=max_tasks_per_child) as pool:
+        # Futures in submission (page) order; the oldest is always consumed first
+        pending = []
+
+        def fill():
+            while len(pending) < workers * 2:
+                page_range = next(ranges, None)
+                if page_range is None:
+                    return
+                pending.append(pool.submit(parse_range, path, *page_range, fields))
+
+        def summaries():
+            fill()
+            while pending:
+                chunk = pending.pop(0).result()
+                fill()
+                yield from chunk
+
+        yield from iter_certificates(summaries(), fields)
@@ -0,0 +1,129 @@
+"""Content-addressed cache for extracted Form 16 / Form 22 data.
+
+Results are keyed by the SHA-256 of the uploaded PDF bytes together with the
+requested fields and the version of the layout templates, so Streamlit reruns
+and other sessions uploading the same certificate never re-parse it, and a
+different field set or a re-learned template set never sees a stale result.
+An in-memory LRU tier sits in front of an optional on-disk JSON tier that is
+trimmed to a byte budget, oldest-used first.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+def document_hash(file_bytes):
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def extraction_key(file_bytes, fields, templates=None):
+    """Cache key of `fields` read from a document with a template index (or none)."""
+    version = templates.version if templates is not None else "none"
+    key = f"{document_hash(file_bytes)}|{','.join(fields)}|{version}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    def __init__(self, max_entries=256, disk_dir=None, max_disk_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def get_or_extract(self, file_bytes, extract, fields, templates=None):
+        """Returns cached data for `file_bytes`, calling `extract` at most once per key.
+
+        `extract` receives a file-like object and must read `fields` with
+        `templates`, like `extract_form16_data`. Concurrent callers with the
+        same key wait for the first one.
+        """
+        key = extraction_key(file_bytes, fields, templates)
+        while True:
+            with self._lock:
+                data = self._get_memory(key)
+                if data is not None:
+                    self.hits += 1
+                    return dict(data)
+                waiter = self._inflight.get(key)
+                if waiter is None:
+                    waiter = self._inflight[key] = threading.Event()
+                    break
+            # Another session is parsing the same document; reuse its result
+            waiter.wait()
+
+        try:
+            data = self._read_disk(key)
+            missed = data is None
+            if missed:
+                data = extract(io.BytesIO(file_bytes))
+                self._write_disk(key, data)
+            with self._lock:
+                if missed:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                self._put_memory(key, data)
+            return dict(data)
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def _get_memory(self, key):
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+        return data
+
+    def _put_memory(self, key, data):
+        self._memory[key] = dict(data)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self.disk_dir / f"{key}.json"
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)  # mark as recently used for eviction
+            return data
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, data):
+        if not self.disk_dir:
+            return
+        path = self.disk_dir / f"{key}.json"
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp_path, path)
+            self._evict_disk()
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+
+    def _evict_disk(self):
+        entries = []
+        for path in self.disk_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
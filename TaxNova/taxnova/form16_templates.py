@@ -0,0 +1,254 @@
+"""Layout templates for region-cropped extraction of known certificate formats.
+
+A template maps the fingerprint of a known layout (TRACES Part A, a payroll
+vendor's Part B, Form 22, ...) to the page and bounding box of each field's
+amount. For a matching certificate only those pages are parsed and only the
+words inside those boxes are read, so annexure pages are never opened; any
+field a template cannot supply falls back to the full-text regex scan.
+
+The fingerprint is where the label words of the first page sit on a coarse
+grid, together with the page size. Amounts, PANs and names do not take part,
+so every certificate printed from the same layout shares it, and lookup is a
+single dict access.
+
+Templates are learned from sample PDFs of a layout by locating each field
+with the regular label patterns, and stored as JSON:
+
+    python -m taxnova.form16_templates learn samples/ -o form16_templates.json --name "TRACES Part A"
+    python -m taxnova.form16_templates match form16.pdf --templates form16_templates.json
+"""
+import argparse
+import hashlib
+import json
+import sys
+from collections import defaultdict, namedtuple
+from pathlib import Path
+
+import pdfplumber
+
+from taxnova.form16 import (ALL_FIELDS, AMOUNT_PATTERN, FIELD_LABELS, FIELD_SPECS, LABEL_PATTERN,
+                            iter_line_amounts, parse_amount)
+from taxnova.metrics import metrics
+
+# Words that make up the fingerprint: every field label plus the form headings
+ANCHORS = ("FORM NO. 16", "FORM 16", "FORM 22", "PART A", "PART B", "Certificate under section 203",
+           "Statement of business income", "Computation of total income")
+_LABELS = ANCHORS + tuple(label for spec in FIELD_SPECS for label in spec.labels)
+VOCABULARY = frozenset(word.upper() for text in _LABELS for word in text.split())
+GRID = 6  # points; positions are snapped to this grid before hashing
+# Learned boxes are widened so amounts of other widths still fall inside
+PAD_X, PAD_Y = 24, 2
+
+# `page` is a 0-based page index; negative indexes count from the last page
+Region = namedtuple("Region", ["page", "bbox"])
+# `regions` maps field -> Region; `absent` lists fields the layout never prints
+Template = namedtuple("Template", ["name", "fingerprint", "regions", "absent"])
+
+
+def fingerprint(page):
+    """Layout fingerprint of a certificate's first page, or None when it has no label text (scans)."""
+    anchors = sorted(
+        (word["text"].upper(), round(word["x0"] / GRID), round(word["top"] / GRID))
+        for word in page.extract_words()
+        if word["text"].upper() in VOCABULARY
+    )
+    if not anchors:
+        return None
+    key = f"{round(page.width)}x{round(page.height)}|" + "|".join(f"{text}@{x},{y}" for text, x, y in anchors)
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class TemplateIndex:
+    """Templates by fingerprint."""
+
+    def __init__(self, templates=()):
+        self._templates = {}
+        for template in templates:
+            self.add(template)
+
+    def __len__(self):
+        return len(self._templates)
+
+    def __iter__(self):
+        return iter(self._templates.values())
+
+    def add(self, template):
+        # A template learned again for the same layout replaces the old one
+        self._templates[template.fingerprint] = template
+
+    def match(self, first_page):
+        key = fingerprint(first_page)
+        return self._templates.get(key) if key else None
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as file:
+            records = json.load(file)
+        return cls(
+            Template(record["name"], record["fingerprint"],
+                     {field: Region(region["page"], tuple(region["bbox"]))
+                      for field, region in record["regions"].items()},
+                     tuple(record.get("absent", ())))
+            for record in records
+        )
+
+    @property
+    def version(self):
+        """Digest of every template, so results cached under one template set are not reused under another."""
+        records = json.dumps(sorted(self._records(), key=lambda record: record["fingerprint"]), sort_keys=True)
+        return hashlib.blake2b(records.encode("utf-8"), digest_size=12).hexdigest()
+
+    def save(self, path):
+        Path(path).write_text(json.dumps(self._records(), indent=2) + "\n", encoding="utf-8")
+
+    def _records(self):
+        return [
+            {"name": template.name, "fingerprint": template.fingerprint,
+             "regions": {field: {"page": region.page, "bbox": list(region.bbox)}
+                         for field, region in template.regions.items()},
+             "absent": list(template.absent)}
+            for template in self
+        ]
+
+
+def read_regions(pdf, template, fields):
+    """Reads `fields` from a certificate matching `template`; returns only the fields it could read.
+
+    Fields the layout never prints come back as 0, as the full scan would return.
+    A row whose label is not the field's own (the fingerprint covers only the
+    first page, so later pages may have rows added or removed) is left out,
+    for the full scan to find.
+    """
+    found = {field: 0 for field in fields if field in template.absent}
+    by_page = defaultdict(list)
+    page_count = len(pdf.pages)
+    for field in fields:
+        region = template.regions.get(field)
+        if region is not None and -page_count <= region.page < page_count:
+            by_page[region.page % page_count].append((field, region.bbox))
+    for index in sorted(by_page):
+        page = pdf.pages[index]
+        for field, (x0, top, x1, bottom) in by_page[index]:
+            # Crop the whole row and keep whole words overlapping the box, so an
+            # amount wider than the learned ones is never cut short
+            row = page.crop((0, max(top, 0), page.width, min(bottom, page.height)))
+            words = sorted(row.extract_words(), key=lambda word: word["x0"])
+            amounts = [word for word in words
+                       if word["x1"] > x0 and word["x0"] < x1 and AMOUNT_PATTERN.fullmatch(word["text"])]
+            if not amounts:
+                continue
+            # In every known layout the amount closes its line, after any "Rs." or leader dots
+            amount = amounts[-1]
+            label = " ".join(word["text"] for word in words if word["x1"] <= amount["x0"])
+            if FIELD_LABELS[field].search(label):
+                found[field] = parse_amount(amount["text"])
+            else:
+                metrics.inc("template_label_mismatches")
+        page.close()
+    return found
+
+
+def locate_fields(page, fields):
+    """Bounding box of the amount after each wanted label on `page`."""
+    lines = defaultdict(list)
+    for word in page.extract_words():
+        lines[round(word["top"])].append(word)
+    boxes = {}
+    for top in sorted(lines):
+        words = sorted(lines[top], key=lambda word: word["x0"])
+        text, starts = "", []
+        for word in words:
+            starts.append(len(text))
+            text += word["text"] + " "
+        for match in LABEL_PATTERN.finditer(text):
+            field = FIELD_SPECS[int(match.lastgroup[1:])].name
+            if field in boxes or field not in fields:
+                continue
+            # The amount is the first word after the label that is a whole amount, as scan_fields reads it
+            amount = next((word for found in iter_line_amounts(text, match.end(), len(text))
+                           for word, start in zip(words, starts)
+                           if start == found.start() and AMOUNT_PATTERN.fullmatch(word["text"])), None)
+            if amount is not None:
+                boxes[field] = (amount["x0"], amount["top"], amount["x1"], amount["bottom"])
+    return boxes
+
+
+def learn(samples, name="", fields=ALL_FIELDS):
+    """Templates learned from sample PDFs (paths or file objects), one per layout found.
+
+    A field gets a region only when every sample of the layout prints it on
+    the same page (first, last or a fixed index), and is marked absent only
+    when no sample prints it at all.
+    """
+    layouts = defaultdict(list)
+    for sample in samples:
+        with pdfplumber.open(sample) as pdf:
+            page_count = len(pdf.pages)
+            key = fingerprint(pdf.pages[0])
+            if key is None:
+                continue  # nothing to recognise the layout by
+            located = {}
+            for index, page in enumerate(pdf.pages):
+                reference = 0 if index == 0 else index - page_count if index == page_count - 1 else index
+                for field, bbox in locate_fields(page, fields).items():
+                    located.setdefault(field, (reference, bbox))
+                page.close()
+        layouts[key].append(located)
+
+    templates = []
+    for number, (key, located_by_sample) in enumerate(sorted(layouts.items(), key=lambda item: -len(item[1]))):
+        regions, absent = {}, []
+        for field in fields:
+            seen = [located[field] for located in located_by_sample if field in located]
+            if not seen:
+                absent.append(field)
+            elif len(seen) == len(located_by_sample) and len({page for page, _ in seen}) == 1:
+                regions[field] = Region(seen[0][0], (
+                    min(bbox[0] for _, bbox in seen) - PAD_X, min(bbox[1] for _, bbox in seen) - PAD_Y,
+                    max(bbox[2] for _, bbox in seen) + PAD_X, max(bbox[3] for _, bbox in seen) + PAD_Y))
+        label = name or "template"
+        templates.append(Template(label if len(layouts) == 1 else f"{label} #{number + 1}",
+                                  key, regions, tuple(absent)))
+    return templates
+
+
+def _pdf_paths(source):
+    source = Path(source)
+    return sorted(path for path in source.rglob("*.pdf")) if source.is_dir() else [source]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Learn or test Form 16/22 layout templates.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    learn_command = commands.add_parser("learn", help="Learn templates from sample PDFs of known layouts")
+    learn_command.add_argument("samples", nargs="+", help="PDFs or directories of PDFs")
+    learn_command.add_argument("-o", "--output", required=True,
+                               help="Templates file; existing templates for other layouts are kept")
+    learn_command.add_argument("--name", default="", help="Name for the learned layout(s)")
+    match_command = commands.add_parser("match", help="Show which template a certificate matches")
+    match_command.add_argument("pdf")
+    match_command.add_argument("--templates", required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == "match":
+        index = TemplateIndex.load(args.templates)
+        with pdfplumber.open(args.pdf) as pdf:
+            template = index.match(pdf.pages[0])
+            result = {"template": template.name if template else None}
+            if template:
+                result["fields"] = read_regions(pdf, template, ALL_FIELDS)
+        print(json.dumps(result, indent=2))
+        return 0 if template else 1
+
+    samples = [path for source in args.samples for path in _pdf_paths(source)]
+    index = TemplateIndex.load(args.output) if Path(args.output).exists() else TemplateIndex()
+    for template in learn(samples, args.name):
+        index.add(template)
+        print(f"{template.name}: {len(template.regions)} regions, absent {list(template.absent)}",
+              file=sys.stderr)
+    index.save(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
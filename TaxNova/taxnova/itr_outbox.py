@@ -0,0 +1,334 @@
+"""Durable, idempotent ITR submission outbox.
+
+Filing requests are written to a local SQLite outbox and acknowledged
+immediately. Worker threads drain the outbox in batches against a portal
+backend, retry transient failures with backoff and poll accepted returns
+until the portal reports them filed or rejected.
+
+Each submission's idempotency key is derived from the certificate and the
+filed figures, so reruns and double clicks return the existing submission
+instead of filing twice; the key is also passed to the portal so a retry
+after a crash cannot file twice either. A submission that failed (retries
+ran out) or was rejected can be queued again with the same key.
+
+    python -m taxnova.itr_outbox work --db taxnova_itr.db --workers 4
+    python -m taxnova.itr_outbox status ITR-3F9A1C20B7D4
+    python -m taxnova.itr_outbox retry ITR-3F9A1C20B7D4
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import random
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    idempotency_key TEXT PRIMARY KEY,
+    reference_id TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    portal_ref TEXT,
+    message TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS submissions_due ON submissions (status, next_attempt_at);
+"""
+
+# queued -> submitting -> submitted -> filed | rejected; failed once retries run out
+QUEUED, SUBMITTING, SUBMITTED, FILED, REJECTED, FAILED = (
+    "queued", "submitting", "submitted", "filed", "rejected", "failed")
+
+# What a portal returns per submission: status is "accepted", "rejected" or
+# "retry" from submit_batch, and "processing", "filed" or "rejected" from poll
+PortalResult = namedtuple("PortalResult", ["status", "portal_ref", "message"], defaults=(None, ""))
+
+
+def idempotency_key(document_hash, payload):
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{document_hash}:{canonical}".encode("utf-8")).hexdigest()
+
+
+def reference_id(key):
+    return f"ITR-{key[:12].upper()}"
+
+
+class StubPortal:
+    """In-memory portal for local runs and tests.
+
+    Accepts well-formed returns after `latency` seconds, fails a share of
+    calls transiently, and reports them filed `processing_seconds` later.
+    Idempotency keys already seen return the original acknowledgement.
+    """
+
+    def __init__(self, latency=0.05, processing_seconds=3.0, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.processing_seconds = processing_seconds
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._accepted = {}  # idempotency key -> portal ref
+
+    def submit_batch(self, submissions):
+        time.sleep(self.latency)
+        with self._lock:
+            if self._random.random() < self.failure_rate:
+                raise ConnectionError("Portal unavailable")
+            results = []
+            for submission in submissions:
+                payload = submission["payload"]
+                if not payload.get("Taxable Income"):
+                    results.append(PortalResult("rejected", None, "Taxable income is missing"))
+                    continue
+                key = submission["idempotency_key"]
+                if key not in self._accepted:
+                    # The acceptance time rides in the reference, so polling survives restarts
+                    self._accepted[key] = f"ACK{int(time.time() * 1000)}-{uuid.uuid4().hex[:8].upper()}"
+                results.append(PortalResult("accepted", self._accepted[key]))
+            return results
+
+    def poll(self, portal_refs):
+        time.sleep(self.latency)
+        results = []
+        for portal_ref in portal_refs:
+            accepted_ms = portal_ref[3:].partition("-")[0]
+            if not portal_ref.startswith("ACK") or not accepted_ms.isdigit():
+                results.append(PortalResult("rejected", portal_ref, "Unknown acknowledgement"))
+            elif time.time() - int(accepted_ms) / 1000 >= self.processing_seconds:
+                results.append(PortalResult("filed", portal_ref, "Your ITR has been successfully filed!"))
+            else:
+                results.append(PortalResult("processing", portal_ref))
+        return results
+
+
+def load_portal(spec=None, **options):
+    """Builds a portal from "package.module:ClassName" (default: the local stub)."""
+    if not spec:
+        return StubPortal(**options)
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)(**options)
+
+
+class ITROutbox:
+    def __init__(self, path, portal, workers=2, batch_size=20, max_attempts=6,
+                 backoff_base=2.0, backoff_max=300.0, poll_interval=5.0, lease_seconds=120.0):
+        self.path = str(path)
+        self.portal = portal
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads = []
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def submit(self, document_hash, payload):
+        """Queues a return and acknowledges at once; repeated calls return the same submission.
+
+        A submission whose retries ran out (failed) is queued again; a rejected
+        one is only queued again through `retry`.
+        """
+        key = idempotency_key(document_hash, payload)
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR IGNORE INTO submissions (idempotency_key, reference_id, payload, status, "
+            "next_attempt_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, reference_id(key), json.dumps(payload, default=str), QUEUED, now, now, now))
+        return self._requeue(key, (FAILED,))
+
+    def retry(self, key):
+        """Queues a failed or rejected submission again (by key or reference ID); None if there is none."""
+        return self._requeue(key, (FAILED, REJECTED))
+
+    def _requeue(self, key, statuses):
+        now = time.time()
+        self._connection().execute(
+            "UPDATE submissions SET status = ?, attempts = 0, next_attempt_at = ?, portal_ref = NULL, "
+            f"updated_at = ? WHERE (idempotency_key = ? OR reference_id = ?) "
+            f"AND status IN ({','.join('?' * len(statuses))})",
+            (QUEUED, now, now, key, key, *statuses))
+        self._wake.set()
+        return self.get(key)
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT * FROM submissions WHERE idempotency_key = ? OR reference_id = ?", (key, key)).fetchone()
+        return self._record(row) if row else None
+
+    def find(self, document_hash, payload):
+        return self.get(idempotency_key(document_hash, payload))
+
+    def counts(self):
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM submissions GROUP BY status")
+        return dict(rows.fetchall())
+
+    def start(self):
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"itr-outbox-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_once(self):
+        """Submits one due batch and polls one batch; returns how many submissions were handled."""
+        handled = 0
+        batch = self._claim((QUEUED, SUBMITTING), SUBMITTING, self.lease_seconds)
+        if batch:
+            self._submit(batch)
+            handled += len(batch)
+        batch = self._claim((SUBMITTED,), SUBMITTED, self.poll_interval)
+        if batch:
+            self._poll(batch)
+            handled += len(batch)
+        return handled
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                handled = self.run_once()
+            except sqlite3.Error:
+                handled = 0
+            if not handled:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _claim(self, statuses, claimed_status, lease):
+        """Atomically takes up to `batch_size` due submissions and pushes their next attempt out by `lease`.
+
+        A worker that dies mid-batch leaves its claims to expire, and another
+        worker picks them up again after the lease.
+        """
+        now = time.time()
+        db = self._connection()
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            rows = db.execute(
+                f"SELECT * FROM submissions WHERE status IN ({','.join('?' * len(statuses))}) "
+                "AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+                (*statuses, now, self.batch_size)).fetchall()
+            db.executemany(
+                "UPDATE submissions SET status = ?, next_attempt_at = ?, updated_at = ? WHERE idempotency_key = ?",
+                [(claimed_status, now + lease, now, row["idempotency_key"]) for row in rows])
+        return [self._record(row) for row in rows]
+
+    def _submit(self, batch):
+        try:
+            results = self.portal.submit_batch(batch)
+        except Exception as exc:
+            # The whole call failed; every submission in it is retried
+            results = [PortalResult("retry", None, f"{type(exc).__name__}: {exc}")] * len(batch)
+        updates = []
+        now = time.time()
+        for submission, result in zip(batch, results):
+            attempts = submission["attempts"] + 1
+            if result.status == "accepted":
+                updates.append((SUBMITTED, attempts, now + self.poll_interval, result.portal_ref, result.message))
+            elif result.status == "rejected":
+                updates.append((REJECTED, attempts, now, None, result.message))
+            elif attempts >= self.max_attempts:
+                updates.append((FAILED, attempts, now, None, result.message))
+            else:
+                updates.append((QUEUED, attempts, now + self._backoff(attempts), None, result.message))
+        self._update(batch, updates)
+
+    def _poll(self, batch):
+        try:
+            results = self.portal.poll([submission["portal_ref"] for submission in batch])
+        except Exception:
+            return  # the claim already deferred the next poll
+        updates = []
+        now = time.time()
+        for submission, result in zip(batch, results):
+            if result.status in (FILED, REJECTED):
+                updates.append((result.status, submission["attempts"], now, submission["portal_ref"], result.message))
+            else:
+                updates.append((SUBMITTED, submission["attempts"], now + self.poll_interval,
+                                submission["portal_ref"], submission["message"]))
+        self._update(batch, updates)
+
+    def _update(self, batch, updates):
+        now = time.time()
+        db = self._connection()
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            db.executemany(
+                "UPDATE submissions SET status = ?, attempts = ?, next_attempt_at = ?, portal_ref = ?, "
+                "message = ?, updated_at = ? WHERE idempotency_key = ?",
+                [(*update, now, submission["idempotency_key"]) for submission, update in zip(batch, updates)])
+
+    def _backoff(self, attempts):
+        # Full jitter, as in LLMClient
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempts))
+
+    @staticmethod
+    def _record(row):
+        record = dict(row)
+        record["payload"] = json.loads(record["payload"])
+        return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drain or inspect the ITR submission outbox.")
+    parser.add_argument("--db", default="taxnova_itr.db", help="Outbox database (default: taxnova_itr.db)")
+    parser.add_argument("--portal", help="Portal backend as module:Class (default: the local stub)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    work = commands.add_parser("work", help="Run submission workers until interrupted")
+    work.add_argument("--workers", type=int, default=4)
+    work.add_argument("--batch-size", type=int, default=20)
+    status = commands.add_parser("status", help="Show one submission, or counts by status")
+    status.add_argument("reference", nargs="?", help="Reference ID or idempotency key")
+    retry = commands.add_parser("retry", help="Queue a failed or rejected submission again")
+    retry.add_argument("reference", help="Reference ID or idempotency key")
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        outbox = ITROutbox(args.db, portal=None, workers=0)
+        print(json.dumps(outbox.get(args.reference) if args.reference else outbox.counts(), indent=2))
+        return 0
+    if args.command == "retry":
+        submission = ITROutbox(args.db, portal=None, workers=0).retry(args.reference)
+        print(json.dumps(submission, indent=2))
+        if submission is None:
+            print(f"No submission {args.reference}", file=sys.stderr)
+            return 1
+        return 0 if submission["status"] == QUEUED else 1
+    outbox = ITROutbox(args.db, load_portal(args.portal), workers=args.workers, batch_size=args.batch_size).start()
+    print(f"Draining {args.db} with {args.workers} workers", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        outbox.stop(timeout=10)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
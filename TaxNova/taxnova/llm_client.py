@@ -0,0 +1,137 @@
+"""Process-wide Groq client with connection reuse, retries and a concurrency cap.
+
+One LLMClient is shared by every Streamlit session. It keeps a pooled HTTP
+connection to the API, retries 429/5xx and connection failures with
+exponential backoff and full jitter, and limits how many completions are in
+flight at once. Pointing `base_url` at a local fake server makes it testable
+offline.
+"""
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import httpx
+from groq import APIConnectionError, APIStatusError, Groq
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMUnavailableError(Exception):
+    """The model could not be reached after all retries, or no slot was free."""
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class LLMClient:
+    def __init__(self, api_key, base_url=None, timeout=30.0, connect_timeout=5.0,
+                 max_retries=4, backoff_base=0.5, backoff_max=8.0,
+                 max_concurrency=8, queue_timeout=30.0, pool_size=20):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.queue_timeout = queue_timeout
+        self.max_concurrency = max_concurrency
+        self._http = httpx.Client(
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+        # Retries are handled here so they share the backoff policy and metrics
+        self._groq = Groq(api_key=api_key, base_url=base_url, http_client=self._http, max_retries=0)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._latencies_ms = deque(maxlen=500)
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.in_flight = 0
+        # monotonic time of the last 429, so callers can hold back optional work
+        self.last_throttled_at = None
+
+    def chat(self, model, messages, max_retries=None, **kwargs):
+        """Non-streaming completion; `max_retries` overrides the client's for this request."""
+        with self._slot():
+            return self._create(max_retries, model=model, messages=messages, **kwargs)
+
+    def chat_stream(self, model, messages, max_retries=None, **kwargs):
+        """Yields completion chunks; the concurrency slot is held until the stream ends."""
+        with self._slot():
+            stream = self._create(max_retries, model=model, messages=messages, stream=True, **kwargs)
+            try:
+                yield from stream
+            except (APIConnectionError, APIStatusError, httpx.HTTPError) as exc:
+                with self._lock:
+                    self.failures += 1
+                raise LLMUnavailableError(f"Model stream interrupted: {exc}") from exc
+            finally:
+                stream.close()
+
+    def stats(self):
+        with self._lock:
+            latencies = list(self._latencies_ms)
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "failures": self.failures,
+                "in_flight": self.in_flight,
+                "latency_p50_ms": _percentile(latencies, 0.5),
+                "latency_p95_ms": _percentile(latencies, 0.95),
+            }
+
+    def close(self):
+        self._http.close()
+
+    @contextmanager
+    def _slot(self):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise LLMUnavailableError("Too many concurrent requests; please try again shortly.")
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def _create(self, max_retries=None, **request):
+        max_retries = self.max_retries if max_retries is None else max_retries
+        with self._lock:
+            self.requests += 1
+        for attempt in range(max_retries + 1):
+            started = time.perf_counter()
+            try:
+                response = self._groq.chat.completions.create(**request)
+            except (APIConnectionError, APIStatusError) as exc:
+                status = getattr(exc, "status_code", None)
+                retryable = status is None or status in RETRYABLE_STATUS
+                if status == 429:
+                    self.last_throttled_at = time.monotonic()
+                if not retryable or attempt == max_retries:
+                    with self._lock:
+                        self.failures += 1
+                    raise LLMUnavailableError(f"Model request failed: {exc}") from exc
+                with self._lock:
+                    self.retries += 1
+                time.sleep(self._backoff(attempt, exc))
+                continue
+            with self._lock:
+                self._latencies_ms.append((time.perf_counter() - started) * 1000)
+            return response
+
+    def _backoff(self, attempt, exc):
+        # Honour the server's Retry-After on 429s, otherwise full-jitter exponential backoff
+        response = getattr(exc, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), self.backoff_max)
+        except ValueError:
+            pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
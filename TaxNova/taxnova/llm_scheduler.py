@@ -0,0 +1,212 @@
+"""Request coalescing and priority admission in front of the shared LLMClient.
+
+On deadline day many sessions ask the same question at once. Streams for
+identical requests (same model, parameters and messages up to whitespace)
+are coalesced: the first one opens a single upstream stream, read by a pump
+thread into a buffer, and every session asking the same thing while it runs
+replays that buffer from the start and then follows it live. The stream is
+cancelled only when every session reading it has gone.
+
+Requests are admitted by priority. Streamed chat turns are interactive and
+non-streamed completions (briefings and other background work) are
+background. Background work never takes the last free slots, and holds back
+entirely for a while after the API has answered 429, so that near the rate
+limit the slots and the remaining quota go to people waiting at the chat box.
+"""
+import hashlib
+import heapq
+import itertools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from taxnova.llm_client import LLMUnavailableError
+from taxnova.metrics import metrics
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+
+def request_key(model, messages, params=None):
+    """Key of a request: identical prompts up to whitespace share it."""
+    normalized = [{"role": message["role"], "content": " ".join(str(message.get("content", "")).split())}
+                  for message in messages]
+    payload = json.dumps({"model": model, "messages": normalized, "params": params or {}},
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _SharedStream:
+    """Chunks of one upstream stream, replayed to every subscriber."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._chunks = []
+        self._done = False
+        self._error = None
+        self.subscribers = 0
+        self.cancelled = False
+
+    def add_subscriber(self):
+        """False once the stream has been cancelled; the caller must start a new one."""
+        with self._condition:
+            if self.cancelled:
+                return False
+            self.subscribers += 1
+            return True
+
+    def put(self, chunk):
+        with self._condition:
+            self._chunks.append(chunk)
+            self._condition.notify_all()
+
+    def finish(self, error=None):
+        with self._condition:
+            self._done = True
+            self._error = error
+            self._condition.notify_all()
+
+    def read(self):
+        """Yields every chunk so far, then new ones as they arrive; the caller has subscribed."""
+        index = 0
+        try:
+            while True:
+                with self._condition:
+                    while index >= len(self._chunks) and not self._done:
+                        self._condition.wait()
+                    chunks = self._chunks[index:]
+                    index += len(chunks)
+                    done, error = self._done, self._error
+                yield from chunks
+                if done:
+                    if error is not None:
+                        # A fresh exception per reader; they unwind on different threads
+                        raise LLMUnavailableError(str(error)) from error
+                    return
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+                if self.subscribers == 0 and not self._done:
+                    self.cancelled = True
+
+
+class LLMScheduler:
+    """Wraps an LLMClient with the same chat/chat_stream interface."""
+
+    def __init__(self, llm, slots=None, background_slots=None, throttle_cooldown=20.0,
+                 queue_timeout=30.0, background_timeout=120.0):
+        self.llm = llm
+        self.slots = slots or llm.max_concurrency
+        # Slots left for interactive turns however much background work is queued
+        self.background_slots = background_slots or max(1, self.slots // 2)
+        self.throttle_cooldown = throttle_cooldown
+        self.queue_timeout = queue_timeout
+        self.background_timeout = background_timeout
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._inflight = {}  # request key -> _SharedStream
+        self._condition = threading.Condition()
+        self._waiting = []  # heap of (priority, sequence) tickets
+        self._sequence = itertools.count()
+        self._running = {INTERACTIVE: 0, BACKGROUND: 0}
+
+    def chat(self, model, messages, priority=BACKGROUND, **kwargs):
+        """Non-streaming completion, by default as background work."""
+        with self._admit(priority):
+            return self.llm.chat(model=model, messages=messages, **kwargs)
+
+    def chat_stream(self, model, messages, priority=INTERACTIVE, **kwargs):
+        """Yields completion chunks, sharing one upstream stream among identical requests."""
+        # A generator, so nothing subscribes until the first chunk is asked for: a stream
+        # that is created but never read leaves no subscriber behind to keep the upstream open
+        key = request_key(model, messages, kwargs)
+        with self._lock:
+            shared = self._inflight.get(key)
+            if shared is not None and shared.add_subscriber():
+                self.coalesced += 1
+                metrics.inc("llm_coalesced")
+            else:
+                shared = self._inflight[key] = _SharedStream()
+                shared.add_subscriber()
+                threading.Thread(target=self._pump, args=(key, shared, model, messages, priority, kwargs),
+                                 name="taxnova-llm-stream", daemon=True).start()
+        yield from shared.read()
+
+    def throttled(self):
+        """Whether the API has rate-limited us within the cooldown."""
+        last = self.llm.last_throttled_at
+        return last is not None and time.monotonic() - last < self.throttle_cooldown
+
+    def stats(self):
+        with self._condition:
+            queued = [priority for priority, _ in self._waiting]
+            running = dict(self._running)
+        with self._lock:
+            streams = len(self._inflight)
+        return {
+            **self.llm.stats(),
+            "coalesced": self.coalesced,
+            "shared_streams": streams,
+            "throttled": self.throttled(),
+            **{f"running_{PRIORITY_NAMES[p]}": count for p, count in running.items()},
+            **{f"queued_{name}": queued.count(p) for p, name in PRIORITY_NAMES.items()},
+        }
+
+    def _pump(self, key, shared, model, messages, priority, kwargs):
+        error = None
+        try:
+            with self._admit(priority):
+                stream = self.llm.chat_stream(model=model, messages=messages, **kwargs)
+                try:
+                    for chunk in stream:
+                        if shared.cancelled:
+                            metrics.inc("llm_streams_cancelled")
+                            break
+                        shared.put(chunk)
+                finally:
+                    stream.close()
+        except Exception as exc:
+            error = exc
+        finally:
+            # Later requests start a new stream; the answer cache covers repeats after this one
+            with self._lock:
+                if self._inflight.get(key) is shared:
+                    del self._inflight[key]
+            shared.finish(error)
+
+    @contextmanager
+    def _admit(self, priority):
+        ticket = (priority, next(self._sequence))
+        timeout = self.queue_timeout if priority == INTERACTIVE else self.background_timeout
+        deadline = time.monotonic() + timeout
+        with metrics.span(f"llm_queue_{PRIORITY_NAMES[priority]}"), self._condition:
+            heapq.heappush(self._waiting, ticket)
+            while not self._can_run(ticket):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._condition.notify_all()
+                    raise LLMUnavailableError("Too many requests queued; please try again shortly.")
+                # Wake up now and then: the throttle cooldown ends without a notify
+                self._condition.wait(min(remaining, 1.0))
+            heapq.heappop(self._waiting)
+            self._running[priority] += 1
+            # The next ticket may be runnable too
+            self._condition.notify_all()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._running[priority] -= 1
+                self._condition.notify_all()
+
+    def _can_run(self, ticket):
+        # Strict priority, first come first served within a class
+        if self._waiting[0] != ticket or sum(self._running.values()) >= self.slots:
+            return False
+        if ticket[0] == INTERACTIVE:
+            return True
+        return self._running[BACKGROUND] < self.background_slots and not self.throttled()
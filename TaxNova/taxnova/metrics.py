@@ -0,0 +1,144 @@
+"""Lightweight per-stage timing and counters.
+
+`metrics` is a process-wide registry. Code wraps each stage in
+`metrics.span("stage")`; spans feed a latency histogram, are tagged with the
+current request id and, when configured, are appended to a JSON-lines file.
+The registry can also be rendered in Prometheus text format.
+"""
+import bisect
+import contextvars
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+# Latency buckets in milliseconds, Prometheus style (upper bounds)
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+_current_request = contextvars.ContextVar("taxnova_request", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, fraction):
+        """Upper bound of the bucket holding the given quantile."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.recent_spans = deque(maxlen=200)
+        self.jsonl_path = None
+        self.prometheus_path = None
+        self.prometheus_interval = 10.0
+        self._last_prometheus_write = 0.0
+
+    def configure(self, jsonl_path=None, prometheus_path=None, prometheus_interval=10.0):
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.prometheus_interval = prometheus_interval
+
+    def begin_request(self, kind):
+        """Starts a new request id; later spans in this context are tagged with it."""
+        request_id = f"{kind}-{uuid.uuid4().hex[:12]}"
+        _current_request.set(request_id)
+        return request_id
+
+    @contextmanager
+    def span(self, stage, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_span(stage, (time.perf_counter() - started) * 1000, **labels)
+
+    def record_span(self, stage, duration_ms, **labels):
+        event = {"ts": time.time(), "request": _current_request.get(), "stage": stage,
+                 "ms": round(duration_ms, 3), **labels}
+        with self._lock:
+            self._histogram(f"{stage}_ms").observe(duration_ms)
+            self.recent_spans.append(event)
+        self._export(event)
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS_MS):
+        with self._lock:
+            self._histogram(name, buckets).observe(value)
+
+    def snapshot(self):
+        """Counters and histogram summaries for display."""
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {
+                    name: {"count": h.count, "mean": h.sum / h.count if h.count else None,
+                           "p50": h.quantile(0.5), "p95": h.quantile(0.95), "p99": h.quantile(0.99)}
+                    for name, h in sorted(self.histograms.items())
+                },
+                "recent_spans": list(self.recent_spans),
+            }
+
+    def prometheus_text(self, prefix="taxnova_"):
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                # Counters end in _total, as the exposition conventions ask
+                total = f"{prefix}{name}" if name.endswith("_total") else f"{prefix}{name}_total"
+                lines += [f"# TYPE {total} counter", f"{total} {value}"]
+            for name, histogram in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{prefix}{name}_bucket{{le="{bound}"}} {cumulative}')
+                lines += [f"{prefix}{name}_sum {histogram.sum}", f"{prefix}{name}_count {histogram.count}"]
+        return "\n".join(lines) + "\n"
+
+    def _histogram(self, name, buckets=DEFAULT_BUCKETS_MS):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(buckets)
+        return histogram
+
+    def _export(self, event):
+        # Export failures must never break the request being measured
+        try:
+            if self.jsonl_path:
+                with self._lock, open(self.jsonl_path, "a", encoding="utf-8") as handle:
+                    handle.write(json.dumps(event) + "\n")
+            now = time.monotonic()
+            if self.prometheus_path and now - self._last_prometheus_write >= self.prometheus_interval:
+                self._last_prometheus_write = now
+                with open(self.prometheus_path, "w", encoding="utf-8") as handle:
+                    handle.write(self.prometheus_text())
+        except OSError:
+            pass
+
+
+metrics = Metrics()
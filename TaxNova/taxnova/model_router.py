@@ -0,0 +1,249 @@
+"""Per-request model choice with health tracking and a fallback chain.
+
+The router stands in for the model client (same chat/chat_stream interface)
+and picks a route (a model on an endpoint) for every request:
+
+* routes whose context window cannot hold the prompt plus the answer are left out;
+* complex questions (comparisons, calculations, long or multi-part questions)
+  prefer the routes marked strong, everything else the fast ones;
+* routes whose rolling median time to first token is over the latency budget
+  go after the ones within it, and degraded routes (a high error rate or
+  several failures in a row) go last.
+
+A request that fails before its first chunk moves on to the next route;
+each route but the last retries only once, so a struggling model costs one
+retry rather than a full backoff. Every attempt is recorded as an
+`llm_route` span with the route, the reason it was chosen and the outcome,
+which lands in the metrics JSON-lines log when one is configured.
+
+Routes are configured as comma-separated `model[@endpoint][:context_tokens][:strong]`:
+
+    LLM_ROUTES="llama-3.1-8b-instant:131072, llama-3.3-70b-versatile:131072:strong, llama-3.1-8b-instant@backup"
+"""
+import logging
+import re
+import threading
+import time
+from collections import deque, namedtuple
+
+from taxnova.llm_client import LLMUnavailableError
+from taxnova.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENDPOINT = "groq"
+DEFAULT_CONTEXT_TOKENS = 8192
+
+# `llm` is the client (or scheduler) of the route's endpoint
+Route = namedtuple("Route", ["name", "model", "llm", "context_tokens", "strong"])
+
+# Phrases of questions that need more than a lookup of one rule
+COMPLEX_HINTS = re.compile(
+    r"\b(compare|comparison|versus|vs|which regime|better|calculate|compute|how much|break ?up|"
+    r"step by step|explain why|plan|optimi[sz]e|capital gains?|set off|carry forward|presumptive|"
+    r"44AD|44ADA|HRA|multiple|both)\b",
+    re.IGNORECASE,
+)
+NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def parse_routes(spec, llm_for):
+    """Routes from an LLM_ROUTES string; `llm_for(endpoint)` returns the client of an endpoint."""
+    routes = []
+    for entry in spec.split(","):
+        parts = [part.strip() for part in entry.split(":")]
+        if not parts[0]:
+            continue
+        model, _, endpoint = parts[0].partition("@")
+        endpoint = endpoint or DEFAULT_ENDPOINT
+        options = parts[1:]
+        strong = "strong" in options
+        sizes = [int(option) for option in options if option.isdigit()]
+        routes.append(Route(model if endpoint == DEFAULT_ENDPOINT else f"{model}@{endpoint}", model,
+                            llm_for(endpoint), sizes[0] if sizes else DEFAULT_CONTEXT_TOKENS, strong))
+    if not routes:
+        raise ValueError("LLM_ROUTES names no model")
+    return routes
+
+
+def estimate_tokens(messages):
+    # About four characters per token for English, plus a few per message for the chat format
+    return sum(len(str(message.get("content", ""))) // 4 + 4 for message in messages)
+
+
+def complexity(question):
+    """Rough 0-1 score of how much reasoning a question needs."""
+    score = min(len(question.split()) / 60, 0.4)
+    score += min(len(COMPLEX_HINTS.findall(question)) * 0.2, 0.4)
+    score += min(len(NUMBER.findall(question)) * 0.1, 0.2)
+    if question.count("?") > 1:
+        score += 0.1
+    return min(score, 1.0)
+
+
+class _Health:
+    """Outcomes of a route's recent requests."""
+
+    def __init__(self, window_seconds, max_samples=200):
+        self.window_seconds = window_seconds
+        self.samples = deque(maxlen=max_samples)  # (monotonic time, ok, ttft_ms or None)
+        self.chosen = 0
+
+    def record(self, ok, ttft_ms=None):
+        self.samples.append((time.monotonic(), ok, ttft_ms))
+
+    def summary(self):
+        cutoff = time.monotonic() - self.window_seconds
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+        # Failures age out with the window, so a degraded route is tried first again later
+        outcomes = [ok for _, ok, _ in self.samples]
+        failing = 0
+        for ok in reversed(outcomes):
+            if ok:
+                break
+            failing += 1
+        ttfts = sorted(ttft for _, ok, ttft in self.samples if ok and ttft is not None)
+        return {
+            "samples": len(outcomes),
+            "error_rate": 1 - sum(outcomes) / len(outcomes) if outcomes else 0.0,
+            "ttft_p50_ms": ttfts[len(ttfts) // 2] if ttfts else None,
+            "consecutive_failures": failing,
+            "chosen": self.chosen,
+        }
+
+
+class ModelRouter:
+    def __init__(self, routes, ttft_budget_ms=1500, complex_threshold=0.5, answer_tokens=1024,
+                 first_token_timeout=15.0, window_seconds=300, min_samples=5, max_error_rate=0.5,
+                 max_consecutive_failures=3, retries_before_fallback=1):
+        self.routes = list(routes)
+        self.ttft_budget_ms = ttft_budget_ms
+        self.complex_threshold = complex_threshold
+        self.answer_tokens = answer_tokens
+        self.first_token_timeout = first_token_timeout
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.max_consecutive_failures = max_consecutive_failures
+        self.retries_before_fallback = retries_before_fallback
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+        self._health = {route.name: _Health(window_seconds) for route in self.routes}
+
+    def plan(self, messages, max_tokens=None):
+        """The routes to try in order, and why: the decision that gets logged."""
+        question = next((str(message.get("content", "")) for message in reversed(messages)
+                         if message.get("role") == "user"), "")
+        score = complexity(question)
+        prompt_tokens = estimate_tokens(messages)
+        needed = prompt_tokens + (max_tokens or self.answer_tokens)
+        fitting = [route for route in self.routes if route.context_tokens >= needed]
+        # A prompt too long for every route still gets a try on the largest window
+        candidates = fitting or [max(self.routes, key=lambda route: route.context_tokens)]
+        wants_strong = score >= self.complex_threshold
+        with self._lock:
+            health = {route.name: self._health[route.name].summary() for route in candidates}
+
+        def order(indexed):
+            index, route = indexed
+            summary = health[route.name]
+            return (self._degraded(summary), self._slow(summary), route.strong != wants_strong, index)
+
+        chain = [route for _, route in sorted(enumerate(candidates), key=order)]
+        decision = {
+            "complexity": round(score, 2),
+            "prompt_tokens": prompt_tokens,
+            "wants": "strong" if wants_strong else "fast",
+            "chain": " > ".join(route.name for route in chain),
+            "excluded": ",".join(route.name for route in self.routes if route not in candidates),
+            "degraded": ",".join(route.name for route in chain if self._degraded(health[route.name])),
+            "slow": ",".join(route.name for route in chain if self._slow(health[route.name])),
+        }
+        return chain, decision
+
+    def chat_stream(self, model, messages, **kwargs):
+        """Yields chunks from the first route that starts answering; the caller's `model` is ignored."""
+        chain, decision = self.plan(messages, kwargs.get("max_tokens"))
+        errors = []
+        for attempt, route in enumerate(chain):
+            started = time.perf_counter()
+            ttft_ms = None
+            stream = route.llm.chat_stream(model=route.model, messages=messages,
+                                           **self._request_options(attempt, len(chain), kwargs))
+            try:
+                for chunk in stream:
+                    if ttft_ms is None:
+                        ttft_ms = (time.perf_counter() - started) * 1000
+                    yield chunk
+            except LLMUnavailableError as exc:
+                self._record(route, attempt, decision, started, False, ttft_ms, exc)
+                if ttft_ms is not None:
+                    # Part of the answer is already on screen; another model cannot continue it
+                    raise
+                errors.append(f"{route.name}: {exc}")
+                continue
+            finally:
+                stream.close()
+            self._record(route, attempt, decision, started, True, ttft_ms)
+            return
+        raise LLMUnavailableError("No model could answer: " + "; ".join(errors))
+
+    def chat(self, model, messages, **kwargs):
+        """Non-streaming completion from the first route that answers; the caller's `model` is ignored."""
+        chain, decision = self.plan(messages, kwargs.get("max_tokens"))
+        errors = []
+        for attempt, route in enumerate(chain):
+            started = time.perf_counter()
+            try:
+                response = route.llm.chat(model=route.model, messages=messages,
+                                          **self._request_options(attempt, len(chain), kwargs))
+            except LLMUnavailableError as exc:
+                self._record(route, attempt, decision, started, False, None, exc)
+                errors.append(f"{route.name}: {exc}")
+                continue
+            self._record(route, attempt, decision, started, True, None)
+            return response
+        raise LLMUnavailableError("No model could answer: " + "; ".join(errors))
+
+    def stats(self):
+        with self._lock:
+            routes = {}
+            for route in self.routes:
+                summary = self._health[route.name].summary()
+                routes[route.name] = {**summary, "degraded": self._degraded(summary), "slow": self._slow(summary)}
+        return {"fallbacks": self.fallbacks, "routes": routes}
+
+    def _request_options(self, attempt, chain_length, kwargs):
+        options = dict(kwargs)
+        options.setdefault("timeout", self.first_token_timeout)
+        if attempt < chain_length - 1:
+            # Leave the long backoff to the last route; the others have somewhere to fall back to
+            options.setdefault("max_retries", self.retries_before_fallback)
+        return options
+
+    def _degraded(self, summary):
+        return (summary["consecutive_failures"] >= self.max_consecutive_failures
+                or (summary["samples"] >= self.min_samples and summary["error_rate"] > self.max_error_rate))
+
+    def _slow(self, summary):
+        return (summary["samples"] >= self.min_samples and summary["ttft_p50_ms"] is not None
+                and summary["ttft_p50_ms"] > self.ttft_budget_ms)
+
+    def _record(self, route, attempt, decision, started, ok, ttft_ms, error=None):
+        duration_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            health = self._health[route.name]
+            health.record(ok, ttft_ms)
+            health.chosen += 1
+            if attempt:
+                self.fallbacks += 1
+        outcome = "ok" if ok else "error"
+        metrics.inc(f"llm_route_{outcome}")
+        metrics.record_span("llm_route", duration_ms, route=route.name, attempt=attempt, outcome=outcome,
+                            ttft_ms=ttft_ms, **decision)
+        if ok:
+            logger.info("LLM route %s (attempt %d) answered in %.0f ms: %s",
+                        route.name, attempt + 1, duration_ms, decision)
+        else:
+            logger.warning("LLM route %s (attempt %d) failed after %.0f ms: %s; %s",
+                           route.name, attempt + 1, duration_ms, error, decision)
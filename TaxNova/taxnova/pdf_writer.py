@@ -0,0 +1,98 @@
+"""Minimal streaming PDF writer using the built-in base-14 fonts.
+
+Used for chat exports and the synthetic certificates in `benchmarks/`. Each
+page is a content stream plus optional grayscale images; the file is yielded
+in chunks as pages are written, so large documents never sit in memory twice.
+"""
+import zlib
+from collections import namedtuple
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+
+# Resource names available to every page's content stream
+FONTS = {"F1": "Helvetica", "F2": "Helvetica-Bold", "F3": "Courier"}
+
+# Helvetica advance widths (1/1000 em) for printable ASCII, from the standard AFM
+_HELVETICA_WIDTHS = dict(zip(
+    " !\"#$%&'()*+,-./0123456789:;<=>?@ABCDEFGHIJKLMNOPQRSTUVWXYZ[\\]^_`abcdefghijklmnopqrstuvwxyz{|}~",
+    [278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+     556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+     1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+     667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+     333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+     556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584],
+))
+
+# `images` holds (name, width, height, pixels) with one byte per gray pixel;
+# the content stream draws them with `/name Do`.
+Page = namedtuple("Page", ["content", "images"], defaults=((),))
+
+
+def text_width(text, size):
+    """Width of `text` in points when set in Helvetica at `size`."""
+    return sum(_HELVETICA_WIDTHS.get(char, 556) for char in text) * size / 1000
+
+
+def escape(text):
+    encoded = text.encode("cp1252", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def text_op(font, size, x, y, text):
+    """Content-stream operators that draw one line of text."""
+    return b"BT /%s %d Tf %.2f %.2f Td (%s) Tj ET" % (font.encode(), size, x, y, escape(text))
+
+
+def iter_pdf(pages):
+    """Yields a complete PDF for an iterable of `Page`s, one page at a time."""
+    offsets = {}
+    position = 0
+
+    def emit(object_id, body):
+        nonlocal position
+        offsets[object_id] = position
+        chunk = b"%d 0 obj\n" % object_id + body + b"\nendobj\n"
+        position += len(chunk)
+        return chunk
+
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    position = len(header)
+    yield header
+    # Object 1 is the catalog, 2 the page tree (written last), then the fonts
+    font_refs = []
+    next_id = 3
+    for name, base_font in FONTS.items():
+        yield emit(next_id, b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+                   % base_font.encode())
+        font_refs.append(b"/%s %d 0 R" % (name.encode(), next_id))
+        next_id += 1
+    fonts = b"/Font << %s >>" % b" ".join(font_refs)
+
+    page_ids = []
+    for page in pages:
+        image_refs = []
+        for name, width, height, pixels in page.images:
+            data = zlib.compress(pixels)
+            yield emit(next_id, b"<< /Type /XObject /Subtype /Image /Width %d /Height %d "
+                       b"/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode /Length %d >>\n"
+                       b"stream\n%s\nendstream" % (width, height, len(data), data))
+            image_refs.append(b"/%s %d 0 R" % (name.encode(), next_id))
+            next_id += 1
+        resources = fonts + (b" /XObject << %s >>" % b" ".join(image_refs) if image_refs else b"")
+        content_id, page_id = next_id, next_id + 1
+        next_id += 2
+        yield emit(content_id, b"<< /Length %d >>\nstream\n%s\nendstream" % (len(page.content), page.content))
+        yield emit(page_id, b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+                   b"/Resources << %s >> /Contents %d 0 R >>"
+                   % (PAGE_WIDTH, PAGE_HEIGHT, resources, content_id))
+        page_ids.append(page_id)
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    yield emit(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids)))
+    yield emit(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    xref_position = position
+    xref = [b"xref\n0 %d\n0000000000 65535 f \n" % next_id]
+    xref += [b"%010d 00000 n \n" % offsets[object_id] for object_id in range(1, next_id)]
+    yield b"".join(xref)
+    yield b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (next_id, xref_position)
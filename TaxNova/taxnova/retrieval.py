@@ -0,0 +1,239 @@
+"""In-process BM25 retrieval over the local tax-rules corpus.
+
+The corpus is the set of Markdown files in `corpus/`; every `## ` section is
+one passage. The index is built once into a directory of flat arrays that are
+opened with mmap, so the app starts without re-indexing and every worker
+process shares the same pages of memory.
+
+Indexes live in a writable cache directory (RETRIEVAL_INDEX_DIR, by default
+~/.cache/taxnova/retrieval), one subdirectory per corpus version. A build
+writes a temporary directory next to it and renames it into place while
+holding a file lock, so processes starting together build only once and
+never truncate files another process has mapped. Read-only deployments can
+build at deploy time instead:
+
+    RETRIEVAL_INDEX_DIR=/srv/taxnova/index python -m taxnova.retrieval build
+    python -m taxnova.retrieval search "80C limit"
+"""
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import sys
+import tempfile
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+CORPUS_DIR = Path(__file__).with_name("corpus")
+INDEX_VERSION = 1
+
+_TOKENS = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have how i in is it its of on or the "
+    "to under up was what when which with my me do does".split()
+)
+
+
+def tokenize(text):
+    terms = []
+    for token in _TOKENS.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        # Light plural folding so "deductions" matches "deduction"
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+def load_passages(corpus_dir=CORPUS_DIR):
+    """Splits every Markdown file into (title, text) passages, one per `## ` heading."""
+    passages = []
+    for path in sorted(Path(corpus_dir).glob("*.md")):
+        for section in re.split(r"^## ", path.read_text(encoding="utf-8"), flags=re.MULTILINE)[1:]:
+            title, _, body = section.partition("\n")
+            passages.append((title.strip(), " ".join(body.split())))
+    return passages
+
+
+def corpus_fingerprint(corpus_dir=CORPUS_DIR):
+    digest = hashlib.sha256()
+    for path in sorted(Path(corpus_dir).glob("*.md")):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def default_index_dir():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(os.environ.get("RETRIEVAL_INDEX_DIR") or Path(cache_home) / "taxnova" / "retrieval")
+
+
+def _index_name(fingerprint):
+    return f"v{INDEX_VERSION}-{fingerprint[:16]}"
+
+
+@contextmanager
+def _build_lock(root):
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / ".lock", "a") as handle:
+        if fcntl is not None:
+            # Released when the handle closes, also if the process dies mid-build
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        yield
+
+
+def build_index(corpus_dir=CORPUS_DIR, index_dir=None, k1=1.5, b=0.75):
+    """Rebuilds the index of the current corpus under `index_dir`; returns its directory."""
+    root = Path(index_dir or default_index_dir())
+    with _build_lock(root):
+        return _build(corpus_dir, root, k1, b)
+
+
+def _build(corpus_dir, root, k1=1.5, b=0.75):
+    """Builds the BM25 index as postings in CSR layout with precomputed weights; the caller holds the lock."""
+    fingerprint = corpus_fingerprint(corpus_dir)
+    target = root / _index_name(fingerprint)
+    index_dir = Path(tempfile.mkdtemp(prefix=".build-", dir=root))
+    try:
+        _write_index(load_passages(corpus_dir), fingerprint, index_dir, k1, b)
+        # mkdtemp makes it private; an index built at deploy time is read by the app's user
+        index_dir.chmod(0o755)
+        if target.exists():
+            # A forced rebuild: move the old copy aside; processes that mapped it keep their pages
+            os.replace(target, root / f".old-{index_dir.name}")
+        os.replace(index_dir, target)
+    except BaseException:
+        shutil.rmtree(index_dir, ignore_errors=True)
+        raise
+    # Older corpus versions and leftovers of interrupted builds
+    for path in root.iterdir():
+        if path.is_dir() and path != target:
+            shutil.rmtree(path, ignore_errors=True)
+    return target
+
+
+def _write_index(passages, fingerprint, index_dir, k1, b):
+    # Titles are counted twice so a section heading outweighs a passing mention
+    doc_terms = [Counter(tokenize(f"{title} {title} {text}")) for title, text in passages]
+    lengths = np.array([sum(terms.values()) for terms in doc_terms], dtype=np.float32)
+    average_length = float(lengths.mean()) if len(lengths) else 0.0
+
+    postings = {}
+    for doc_id, terms in enumerate(doc_terms):
+        for term, frequency in terms.items():
+            postings.setdefault(term, []).append((doc_id, frequency))
+
+    vocabulary = {term: term_id for term_id, term in enumerate(sorted(postings))}
+    indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    doc_ids, weights = [], []
+    for term, term_id in vocabulary.items():
+        entries = postings[term]
+        idf = math.log(1 + (len(passages) - len(entries) + 0.5) / (len(entries) + 0.5))
+        for doc_id, frequency in entries:
+            norm = k1 * (1 - b + b * lengths[doc_id] / average_length)
+            doc_ids.append(doc_id)
+            weights.append(idf * frequency * (k1 + 1) / (frequency + norm))
+        indptr[term_id + 1] = len(doc_ids)
+
+    texts = [f"{title}: {text}".encode("utf-8") for title, text in passages]
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(text) for text in texts])
+
+    np.save(index_dir / "indptr.npy", indptr)
+    np.save(index_dir / "doc_ids.npy", np.array(doc_ids, dtype=np.int32))
+    np.save(index_dir / "weights.npy", np.array(weights, dtype=np.float32))
+    np.save(index_dir / "offsets.npy", offsets)
+    (index_dir / "texts.bin").write_bytes(b"".join(texts) or b"\0")
+    (index_dir / "meta.json").write_text(json.dumps({
+        "version": INDEX_VERSION,
+        "fingerprint": fingerprint,
+        "passages": len(passages),
+        "vocabulary": vocabulary,
+    }), encoding="utf-8")
+
+
+class RetrievalIndex:
+    def __init__(self, index_dir):
+        index_dir = Path(index_dir)
+        meta = json.loads((index_dir / "meta.json").read_text(encoding="utf-8"))
+        self.fingerprint = meta["fingerprint"]
+        self.size = meta["passages"]
+        self._vocabulary = meta["vocabulary"]
+        self._indptr = np.load(index_dir / "indptr.npy", mmap_mode="r")
+        self._doc_ids = np.load(index_dir / "doc_ids.npy", mmap_mode="r")
+        self._weights = np.load(index_dir / "weights.npy", mmap_mode="r")
+        self._offsets = np.load(index_dir / "offsets.npy", mmap_mode="r")
+        with open(index_dir / "texts.bin", "rb") as handle:
+            self._texts = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @classmethod
+    def open(cls, corpus_dir=CORPUS_DIR, index_dir=None):
+        """Opens the index of the current corpus, building it first if there is none yet."""
+        root = Path(index_dir or default_index_dir())
+        target = root / _index_name(corpus_fingerprint(corpus_dir))
+        if not (target / "meta.json").exists():
+            with _build_lock(root):
+                # Another process may have built it while we waited for the lock
+                if not (target / "meta.json").exists():
+                    _build(corpus_dir, root)
+        return cls(target)
+
+    def passage(self, doc_id):
+        return self._texts[self._offsets[doc_id]:self._offsets[doc_id + 1]].decode("utf-8")
+
+    def search(self, query, k=3, min_score=1.0):
+        """Returns up to `k` (score, passage) pairs, best first."""
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self._vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self._indptr[term_id], self._indptr[term_id + 1]
+            scores[self._doc_ids[start:end]] += self._weights[start:end]
+        if not scores.any():
+            return []
+        k = min(k, self.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[doc_id]), self.passage(doc_id))
+                for doc_id in top if scores[doc_id] >= min_score]
+
+
+def format_passages(results):
+    """Renders search results as a context block for the system prompt."""
+    return "\n".join(f"[{number}] {passage}" for number, (_, passage) in enumerate(results, 1))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the tax-rules retrieval index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    parser.add_argument("--index-dir", help="Where indexes are kept (default: RETRIEVAL_INDEX_DIR or the user cache)")
+    commands.add_parser("build", help="Rebuild the index from the corpus")
+    search = commands.add_parser("search", help="Query the index")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        print(f"Index written to {build_index(index_dir=args.index_dir)}", file=sys.stderr)
+        return 0
+    for score, passage in RetrievalIndex.open(index_dir=args.index_dir).search(args.query, args.k, min_score=0):
+        print(f"{score:6.2f}  {passage[:160]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
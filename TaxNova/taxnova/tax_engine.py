@@ -0,0 +1,287 @@
+"""Vectorized tax computation used by both the Streamlit page and bulk jobs.
+
+Every function works on whole arrays of taxpayers at once; the single-user
+helpers simply run a batch of one so the UI and bulk results always agree.
+Slab tables are stored as cumulative-tax breakpoints, so the tax on any income
+is one binary search (np.searchsorted) plus a multiply.
+"""
+import numpy as np
+
+# Income tax slabs as (lower bound, marginal rate) rows, lowest slab first
+OLD_REGIME_SLABS = [
+    (0, 0.0),
+    (250000, 0.05),
+    (500000, 0.2),
+    (1000000, 0.3),
+]
+
+# Deduction rules as (section, share of income, cap). A rule without a share
+# of income is a flat amount equal to its cap.
+DEDUCTION_RULES = [
+    ("Section 80C (Investments)", 0.1, 150000),
+    ("Section 80D (Health Insurance)", None, 25000),
+    ("Section 24 (Home Loan Interest)", None, 200000),
+]
+
+DEFAULT_FY = "2024-25"
+AGE_GROUPS = ("below_60", "60_to_79", "80_plus")
+
+# Surcharge as (income above, rate) rows; the new regime caps it at 25%
+SURCHARGE = [(5000000, 0.10), (10000000, 0.15), (20000000, 0.25), (50000000, 0.37)]
+CESS_RATE = 0.04
+
+_OLD_SLABS_BY_AGE = {
+    "below_60": OLD_REGIME_SLABS,
+    "60_to_79": [(0, 0.0), (300000, 0.05), (500000, 0.2), (1000000, 0.3)],
+    "80_plus": [(0, 0.0), (500000, 0.2), (1000000, 0.3)],
+}
+# Chapter VI-A caps the optimizer may allocate to under the old regime
+_OLD_DEDUCTION_CAPS = {
+    "below_60": {"80C": 150000, "80CCD(1B)": 50000, "80D": 25000},
+    "60_to_79": {"80C": 150000, "80CCD(1B)": 50000, "80D": 50000},
+    "80_plus": {"80C": 150000, "80CCD(1B)": 50000, "80D": 50000},
+}
+
+# Versioned rules per financial year and regime
+TAX_RULES = {
+    ("2023-24", "old"): {
+        "slabs": _OLD_SLABS_BY_AGE, "standard_deduction": 50000,
+        "rebate_limit": 500000, "rebate_max": 12500, "rebate_marginal_relief": False,
+        "surcharge_cap": 0.37, "deduction_caps": _OLD_DEDUCTION_CAPS,
+    },
+    ("2023-24", "new"): {
+        "slabs": [(0, 0.0), (300000, 0.05), (600000, 0.1), (900000, 0.15), (1200000, 0.2), (1500000, 0.3)],
+        "standard_deduction": 50000,
+        "rebate_limit": 700000, "rebate_max": 25000, "rebate_marginal_relief": True,
+        "surcharge_cap": 0.25, "deduction_caps": None,
+    },
+    ("2024-25", "old"): {
+        "slabs": _OLD_SLABS_BY_AGE, "standard_deduction": 50000,
+        "rebate_limit": 500000, "rebate_max": 12500, "rebate_marginal_relief": False,
+        "surcharge_cap": 0.37, "deduction_caps": _OLD_DEDUCTION_CAPS,
+    },
+    ("2024-25", "new"): {
+        "slabs": [(0, 0.0), (300000, 0.05), (700000, 0.1), (1000000, 0.15), (1200000, 0.2), (1500000, 0.3)],
+        "standard_deduction": 75000,
+        "rebate_limit": 700000, "rebate_max": 25000, "rebate_marginal_relief": True,
+        "surcharge_cap": 0.25, "deduction_caps": None,
+    },
+    ("2025-26", "old"): {
+        "slabs": _OLD_SLABS_BY_AGE, "standard_deduction": 50000,
+        "rebate_limit": 500000, "rebate_max": 12500, "rebate_marginal_relief": False,
+        "surcharge_cap": 0.37, "deduction_caps": _OLD_DEDUCTION_CAPS,
+    },
+    ("2025-26", "new"): {
+        "slabs": [(0, 0.0), (400000, 0.05), (800000, 0.1), (1200000, 0.15), (1600000, 0.2),
+                  (2000000, 0.25), (2400000, 0.3)],
+        "standard_deduction": 75000,
+        "rebate_limit": 1200000, "rebate_max": 60000, "rebate_marginal_relief": True,
+        "surcharge_cap": 0.25, "deduction_caps": None,
+    },
+}
+
+
+def slab_breakpoints(slabs):
+    """Converts slab rows into (bounds, cumulative tax at each bound, rates) arrays."""
+    bounds = np.array([lower for lower, _ in slabs], dtype=float)
+    rates = np.array([rate for _, rate in slabs], dtype=float)
+    base_tax = np.concatenate([[0.0], np.cumsum(np.diff(bounds) * rates[:-1])])
+    return bounds, base_tax, rates
+
+
+def _breakpoint_tax(income, bounds, base_tax, rates):
+    index = np.searchsorted(bounds, income, side="right") - 1
+    return base_tax[index] + (income - bounds[index]) * rates[index]
+
+
+def slab_tax(taxable_income, slabs=OLD_REGIME_SLABS):
+    """Applies the slab table to an array of taxable incomes."""
+    income = np.maximum(np.asarray(taxable_income, dtype=float).reshape(-1), 0)
+    return _breakpoint_tax(income, *slab_breakpoints(slabs))
+
+
+class TaxTable:
+    """One regime's rules for one financial year and age group, precomputed for lookups."""
+
+    def __init__(self, fy, regime, age_group="below_60"):
+        rules = TAX_RULES[(fy, regime)]
+        slabs = rules["slabs"][age_group] if isinstance(rules["slabs"], dict) else rules["slabs"]
+        self.fy = fy
+        self.regime = regime
+        self.age_group = age_group
+        self.standard_deduction = rules["standard_deduction"]
+        self.rebate_limit = rules["rebate_limit"]
+        self.rebate_max = rules["rebate_max"]
+        self.rebate_marginal_relief = rules["rebate_marginal_relief"]
+        caps = rules["deduction_caps"]
+        self.deduction_caps = dict(caps[age_group]) if caps else {}
+        self.bounds, self.base_tax, self.rates = slab_breakpoints(slabs)
+
+        surcharge = [(threshold, min(rate, rules["surcharge_cap"])) for threshold, rate in SURCHARGE]
+        self.surcharge_thresholds = np.array([threshold for threshold, _ in surcharge], dtype=float)
+        self.surcharge_rates = np.array([rate for _, rate in surcharge], dtype=float)
+        # Tax plus surcharge exactly at each threshold, for marginal relief
+        previous_rates = np.concatenate([[0.0], self.surcharge_rates[:-1]])
+        self.surcharge_base = self.slab_tax(self.surcharge_thresholds) * (1 + previous_rates)
+
+    def slab_tax(self, income):
+        return _breakpoint_tax(income, self.bounds, self.base_tax, self.rates)
+
+    def tax(self, taxable_income):
+        """Tax after the 87A rebate, surcharge (with marginal relief) and cess."""
+        income = np.maximum(np.asarray(taxable_income, dtype=float).reshape(-1), 0)
+        tax = self.slab_tax(income)
+
+        rebated = np.where(income <= self.rebate_limit, np.maximum(0, tax - self.rebate_max), tax)
+        if self.rebate_marginal_relief:
+            # Just above the rebate limit, tax may not exceed the income over the limit
+            over = income > self.rebate_limit
+            rebated = np.where(over, np.minimum(rebated, income - self.rebate_limit), rebated)
+        tax = rebated
+
+        band = np.searchsorted(self.surcharge_thresholds, income, side="left") - 1
+        has_surcharge = band >= 0
+        band = np.maximum(band, 0)
+        with_surcharge = tax * (1 + self.surcharge_rates[band])
+        relief_cap = self.surcharge_base[band] + (income - self.surcharge_thresholds[band])
+        tax = np.where(has_surcharge, np.minimum(with_surcharge, relief_cap), tax)
+        return tax * (1 + CESS_RATE)
+
+    def tax_for(self, taxable_income):
+        return float(self.tax([taxable_income])[0])
+
+
+_TABLE_CACHE = {}
+
+
+def get_tax_table(fy=DEFAULT_FY, regime="old", age_group="below_60"):
+    key = (fy, regime, age_group)
+    table = _TABLE_CACHE.get(key)
+    if table is None:
+        table = _TABLE_CACHE[key] = TaxTable(fy, regime, age_group)
+    return table
+
+
+def deduction_columns(income, rules=DEDUCTION_RULES):
+    """One array per deduction section for an array of incomes."""
+    income = np.asarray(income, dtype=float)
+    columns = {}
+    for section, share, cap in rules:
+        if share is None:
+            columns[section] = np.full(income.shape, float(cap))
+        else:
+            columns[section] = np.minimum(income * share, cap)
+    return columns
+
+
+def identify_deductions_batch(income, rules=DEDUCTION_RULES):
+    """Returns one column per deduction section for an array of incomes."""
+    import pandas as pd  # only bulk jobs need DataFrames; keeps pandas off the app's cold start
+
+    return pd.DataFrame(deduction_columns(income, rules))
+
+
+def tax_columns(taxable_income, tds, deductions=None, slabs=OLD_REGIME_SLABS, table=None):
+    """The columns of `compute_tax_batch` as plain arrays, without building a DataFrame.
+
+    With a TaxTable the liability is that table's tax (rebate, surcharge and
+    cess included) rather than the bare slab tax.
+    """
+    income = np.asarray(taxable_income, dtype=float)
+    tds = np.broadcast_to(np.asarray(tds, dtype=float), income.shape)
+    if deductions is None:
+        deductions = sum(deduction_columns(income).values())
+    deductions = np.broadcast_to(np.asarray(deductions, dtype=float), income.shape)
+
+    taxable_after_deductions = np.maximum(0, income - deductions)
+    if table is not None:
+        tax_liability = table.tax(taxable_after_deductions)
+    else:
+        tax_liability = slab_tax(taxable_after_deductions, slabs)
+    tax_due = np.maximum(0, tax_liability - tds)
+
+    return {
+        "income": income,
+        "tds": tds,
+        "total_deductions": deductions,
+        "taxable_after_deductions": taxable_after_deductions,
+        "tax_liability": tax_liability,
+        "tax_due": tax_due,
+    }
+
+
+def compute_tax_batch(taxable_income, tds, deductions=None, slabs=OLD_REGIME_SLABS):
+    """Computes liability and tax due for many taxpayers in one shot.
+
+    `deductions` is the total deduction per taxpayer; when omitted it is
+    derived from DEDUCTION_RULES.
+    """
+    import pandas as pd
+
+    return pd.DataFrame(tax_columns(taxable_income, tds, deductions, slabs))
+
+
+def identify_deductions(income):
+    """Deduction breakdown for a single taxpayer."""
+    return {section: float(amount[0]) for section, amount in deduction_columns([income]).items()}
+
+
+def compute_tax(income, tds, deductions, table=None):
+    """Tax summary for a single taxpayer, using the same engine as bulk runs."""
+    return {column: float(values[0])
+            for column, values in tax_columns([income], [tds], [deductions], table=table).items()}
+
+
+def compare_regimes(gross_income, old_regime_deductions=0, fy=DEFAULT_FY, age_group="below_60"):
+    """Tax under the old and new regimes for one taxpayer.
+
+    `old_regime_deductions` are Chapter VI-A and similar deductions, which the
+    new regime does not allow; each regime applies its own standard deduction.
+    """
+    old = get_tax_table(fy, "old", age_group)
+    new = get_tax_table(fy, "new", age_group)
+    old_tax = old.tax_for(gross_income - old.standard_deduction - old_regime_deductions)
+    new_tax = new.tax_for(gross_income - new.standard_deduction)
+    return {"old": old_tax, "new": new_tax, "better": "new" if new_tax <= old_tax else "old"}
+
+
+def optimize_deductions(gross_income, fy=DEFAULT_FY, age_group="below_60", budget=None,
+                        committed=None, other_deductions=0, step=5000):
+    """Finds the cheapest regime and deduction allocation for one taxpayer.
+
+    Every allocation of the old-regime deduction caps on a `step` grid, starting
+    from the `committed` amounts and limited to `budget` of extra investment,
+    is evaluated in one vectorized pass alongside the new regime. Among the
+    plans with the lowest tax, the one needing the least investment wins.
+    """
+    old = get_tax_table(fy, "old", age_group)
+    new = get_tax_table(fy, "new", age_group)
+    committed = committed or {}
+    sections = list(old.deduction_caps)
+
+    axes = []
+    for section in sections:
+        cap = old.deduction_caps[section]
+        floor = min(committed.get(section, 0), cap)
+        axes.append(np.unique(np.append(np.arange(floor, cap, step), cap)))
+    grid = np.stack([axis.ravel() for axis in np.meshgrid(*axes, indexing="ij")], axis=1)
+    floors = np.array([axis[0] for axis in axes], dtype=float)
+    extra = (grid - floors).sum(axis=1)
+    if budget is not None:
+        grid, extra = grid[extra <= budget], extra[extra <= budget]
+
+    taxable = gross_income - old.standard_deduction - other_deductions - grid.sum(axis=1)
+    old_tax = np.round(old.tax(taxable), 2)
+    best = np.lexsort((extra, old_tax))[0]
+    new_tax = round(new.tax_for(gross_income - new.standard_deduction), 2)
+
+    old_plan = {
+        "regime": "old",
+        "tax": float(old_tax[best]),
+        "allocation": {section: float(amount) for section, amount in zip(sections, grid[best])},
+        "extra_investment": float(extra[best]),
+    }
+    new_plan = {"regime": "new", "tax": new_tax, "allocation": {}, "extra_investment": 0.0}
+    cheapest = new_plan if new_tax <= old_plan["tax"] else old_plan
+    return {**cheapest, "old_regime": old_plan, "new_regime": new_plan,
+            "plans_evaluated": int(len(grid)) + 1}
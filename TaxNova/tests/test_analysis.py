@@ -0,0 +1,38 @@
+import pytest
+
+from taxnova.analysis import analyze_extracted
+from taxnova.tax_engine import get_tax_table
+
+
+def test_summary_uses_the_regime_tables_with_standard_deduction_and_cess():
+    analysis = analyze_extracted({"Gross Salary": 1500000.0, "TDS Deducted": 150000.0, "Taxable Income": 1450000.0})
+    summary, deductions = analysis["tax_summary"], analysis["deductions"]
+    assert deductions["Standard Deduction"] == 50000
+    assert summary["total_deductions"] == sum(deductions.values())
+    taxable = 1500000 - summary["total_deductions"]
+    assert summary["taxable_after_deductions"] == taxable
+    # 50,000 standard + 1,50,000 (80C) + 25,000 (80D) + 2,00,000 (24) leaves 10,75,000:
+    # slab tax 1,12,500 + 30% of 75,000, plus 4% cess
+    assert summary["tax_liability"] == pytest.approx((112500 + 22500) * 1.04)
+    assert summary["tax_liability"] == pytest.approx(get_tax_table("2024-25", "old").tax_for(taxable))
+
+
+def test_summary_and_regime_plan_agree_for_the_same_deductions():
+    analysis = analyze_extracted({"Gross Salary": 900000.0, "TDS Deducted": 0.0, "Taxable Income": 850000.0})
+    old_plan = analysis["regime_plan"]["old_regime"]
+    old = get_tax_table("2024-25", "old")
+    planned = old.tax_for(900000 - old.standard_deduction - sum(old_plan["allocation"].values()))
+    assert old_plan["tax"] == pytest.approx(planned, abs=0.01)
+
+
+def test_rebate_leaves_no_tax_below_the_limit():
+    summary = analyze_extracted({"Gross Salary": 600000.0, "TDS Deducted": 5000.0})["tax_summary"]
+    assert summary["taxable_after_deductions"] <= 500000
+    assert summary["tax_liability"] == 0
+    assert summary["tax_due"] == 0
+
+
+def test_business_income_gets_no_standard_deduction():
+    analysis = analyze_extracted({"TDS Deducted": 0.0, "Taxable Income": 2000000.0}, fy="2023-24")
+    assert "Standard Deduction" not in analysis["deductions"]
+    assert analysis["tax_summary"]["income"] == 2000000
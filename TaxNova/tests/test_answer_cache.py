@@ -0,0 +1,66 @@
+from taxnova.answer_cache import AnswerCache, is_context_free
+
+FIRST_TURN = [{"role": "assistant", "content": "Hello!"}]
+
+
+def cache_with(question, threshold=0.95):
+    cache = AnswerCache(max_entries=8, threshold=threshold)
+    cache.store(question, "cached answer")
+    return cache
+
+
+def lenient_cache_with(question):
+    # Near misses must be rejected by the exact checks, not only by the similarity threshold
+    return cache_with(question, threshold=0.5)
+
+
+def test_serves_the_same_question_reworded_in_case_and_spacing():
+    cache = cache_with("What is the limit of section 80C?")
+    assert cache.lookup("what is the  limit of Section 80C") == "cached answer"
+
+
+def test_personal_questions_are_never_context_free():
+    question = "My salary is 12 lakh, how much tax do I pay?"
+    assert not is_context_free(question, FIRST_TURN + [{"role": "user", "content": question}])
+    assert is_context_free("How is HRA exemption calculated?", FIRST_TURN)
+
+
+def test_personal_questions_are_never_stored_or_served():
+    cache = cache_with("My salary is 18 lakh, how much tax do I pay?")
+    assert cache.stats()["entries"] == 0
+    cache = lenient_cache_with("How much tax is due on a salary of 18 lakh?")
+    assert cache.lookup("My salary is 18 lakh, how much tax do I pay?") is None
+
+
+def test_different_amounts_miss():
+    cache = lenient_cache_with("How much tax is due on a salary of 18 lakh?")
+    assert cache.lookup("How much tax is due on a salary of 12 lakh?") is None
+    assert cache.lookup("How much tax is due on a salary of 18,00,000?") is None
+
+
+def test_amounts_must_match_even_in_long_similar_questions():
+    cache = cache_with("Should one pick the old regime or the new regime with a salary of 15 lakh "
+                       "and 80C of 1.5 lakh")
+    assert cache.lookup("Should one pick the old regime or the new regime with a salary of 12 lakh "
+                        "and 80C of 1.5 lakh") is None
+
+
+def test_different_years_and_sections_miss():
+    cache = lenient_cache_with("What is the deduction limit under section 80C for FY 2024-25?")
+    assert cache.lookup("What is the deduction limit under section 80D for FY 2024-25?") is None
+    assert cache.lookup("What is the deduction limit under section 80C for FY 2023-24?") is None
+
+
+def test_reversed_comparison_misses():
+    cache = lenient_cache_with("Is the new regime better than the old")
+    assert cache.lookup("Is the old regime better than the new") is None
+    assert cache.lookup("is the new regime better than the old?") == "cached answer"
+
+
+def test_follow_ups_are_never_context_free():
+    history = FIRST_TURN + [{"role": "user", "content": "What is the limit of section 80C?"},
+                            {"role": "assistant", "content": "Rs. 1,50,000."}]
+    for question in ("And for HRA?", "80D?", "What about section 80D?", "But is there a cap for seniors?",
+                     "Is it the same under the new regime?", "They also count for NPS, right?"):
+        assert not is_context_free(question, history + [{"role": "user", "content": question}]), question
+    assert is_context_free("What is the limit of section 80D?", history)
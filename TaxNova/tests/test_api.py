@@ -0,0 +1,62 @@
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from taxnova.api import TaxNovaService, create_app
+from taxnova.metrics import metrics
+
+
+def call(method, path, **kwargs):
+    async def request():
+        # No GROQ_API_KEY: the service extracts and computes without a model
+        async with TestClient(TestServer(create_app(TaxNovaService(workers=1, config={})))) as client:
+            response = await client.request(method, path, **kwargs)
+            if response.content_type == "application/json":
+                return response.status, await response.json()
+            return response.status, await response.text()
+    return asyncio.run(request())
+
+
+def post(path, **kwargs):
+    return call("POST", path, **kwargs)
+
+
+def test_unknown_financial_year_is_a_bad_request():
+    status, body = post("/v1/extract?analyze=true&fy=1999-00", data=b"%PDF-1.4")
+    assert status == 400
+    assert "2024-25" in body["error"]
+
+
+def test_single_computation_rejects_lists_of_tds_or_deductions():
+    for extra in ({"tds": [1, 2]}, {"deductions": [50000, 25000]}):
+        status, body = post("/v1/tax", json={"taxable_income": 900000, **extra})
+        assert status == 400
+        assert "single number" in body["error"]
+
+
+def test_single_computation_itemises_deductions():
+    status, body = post("/v1/tax", json={"taxable_income": 900000, "tds": 40000})
+    assert status == 200
+    assert body["deductions"] and body["tds"] == 40000
+
+
+def test_batch_rejects_nested_lists():
+    status, _ = post("/v1/tax/batch", json={"taxable_income": [[800000, 900000], [1000000, 1100000]]})
+    assert status == 400
+
+
+def test_batch_computes_one_row_per_income():
+    status, body = post("/v1/tax/batch", json={"taxable_income": [800000, 1200000], "tds": [0, 50000]})
+    assert status == 200
+    assert len(body["tax_due"]) == 2
+
+
+def test_metrics_scrape_names_counters_with_total():
+    metrics.inc("llm_requests")
+    post("/v1/tax", json={"taxable_income": 900000})
+    status, text = call("GET", "/metrics")
+    assert status == 200
+    assert "# TYPE taxnova_llm_requests_total counter" in text
+    counters = [line.split()[2] for line in text.splitlines() if line.endswith(" counter")]
+    assert all(name.endswith("_total") and not name.endswith("_total_total") for name in counters)
+    assert "taxnova_api_request_ms_count" in text
@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+from taxnova.metrics import metrics
+
+APP = str(Path(__file__).resolve().parents[1] / "app.py")
+
+
+def script_runs():
+    return metrics.snapshot()["histograms"].get("script_run_ms", {}).get("count", 0)
+
+
+def test_page_runs_without_secrets_and_says_chat_is_not_configured(tmp_path, monkeypatch):
+    # No .env and no .streamlit/secrets.toml in the working directory
+    monkeypatch.chdir(tmp_path)
+    at = AppTest.from_file(APP, default_timeout=60)
+    runs = script_runs()
+    at.run()
+    assert not at.exception
+    # Every full script run is timed
+    assert script_runs() == runs + 1
+
+    at.chat_input[0].set_value("What is the 80C limit?").run()
+    assert not at.exception
+    assert any("GROQ_API_KEY is not set" in error.value for error in at.error)
@@ -0,0 +1,30 @@
+import csv
+import zipfile
+
+import pytest
+
+from benchmarks.synthetic_form16 import generate
+from taxnova.bulk_ingest import run
+from taxnova.form16 import CORE_FIELDS
+
+
+def test_zip_is_parsed_in_parallel_with_one_row_per_certificate(tmp_path):
+    certificates = list(generate(6, seed=3, max_pages=3, scanned_ratio=0))
+    archive = tmp_path / "certificates.zip"
+    with zipfile.ZipFile(archive, "w") as bundle:
+        for certificate in certificates:
+            bundle.writestr(certificate.name, certificate.pdf)
+        bundle.writestr("broken.pdf", b"%PDF-1.4 not really")
+
+    output = tmp_path / "results.csv"
+    assert run(archive, output, workers=2, batch_size=2) == (6, 1)
+
+    with open(output, newline="", encoding="utf-8") as file:
+        rows = {row["file"].rsplit("!", 1)[1]: row for row in csv.DictReader(file)}
+    assert rows["broken.pdf"]["status"] == "error" and rows["broken.pdf"]["error"]
+    for certificate in certificates:
+        row = rows[certificate.name]
+        assert row["status"] == "ok"
+        for field in CORE_FIELDS:
+            assert float(row[field]) == pytest.approx(certificate.truth[field])
+        assert float(row["tax_due"]) >= 0
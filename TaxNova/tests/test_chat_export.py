@@ -0,0 +1,34 @@
+import io
+
+import pdfplumber
+
+from taxnova.chat_export import render_chat_pdf
+
+MESSAGES = [
+    {"role": "assistant", "content": "Hello! I'm here to help with tax finalization."},
+    {"role": "user", "content": "What is the **80C** limit?"},
+    {"role": "assistant", "content": "Up to ₹1,50,000 a year – PPF, ELSS and life insurance premiums count."},
+]
+
+
+def pdf_text(pdf_bytes):
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        return [page.extract_text() for page in pdf.pages]
+
+
+def test_export_opens_and_contains_every_turn():
+    text = "\n".join(pdf_text(render_chat_pdf(MESSAGES)))
+    assert "TaxNova Assistant Chat" in text
+    assert "User:" in text and "Assistant:" in text
+    assert "What is the 80C limit?" in text
+    # Characters the base font lacks are spelled out
+    assert "Up to Rs. 1,50,000 a year - PPF, ELSS" in text
+
+
+def test_long_transcripts_run_over_several_pages():
+    messages = [{"role": "user" if number % 2 else "assistant", "content": f"Turn {number} " + "word " * 80}
+                for number in range(40)]
+    pages = pdf_text(render_chat_pdf(messages))
+    assert len(pages) > 1
+    assert "Turn 0" in pages[0] and "Turn 39" in pages[-1]
+    assert render_chat_pdf(messages) is render_chat_pdf(list(messages))
@@ -0,0 +1,27 @@
+import time
+
+from benchmarks.fake_groq import FakeGroq
+from taxnova.chat_stream import StreamStats, parse_groq_stream
+from taxnova.llm_client import LLMClient
+
+MESSAGES = [{"role": "user", "content": "What is the 80C limit?"}]
+
+
+def test_answer_arrives_token_by_token_with_timings():
+    fake = FakeGroq(ttft_ms=100, ttft_jitter_ms=0, tokens_per_sec=200, answer_tokens=20, seed=1)
+    llm = LLMClient(api_key="test", base_url=fake.serve())
+    try:
+        stats = StreamStats(model="fake-model")
+        arrivals, deltas = [], []
+        for delta in parse_groq_stream(llm.chat_stream(model="fake-model", messages=MESSAGES), stats):
+            arrivals.append(time.perf_counter())
+            deltas.append(delta)
+    finally:
+        fake.shutdown()
+
+    assert "".join(deltas) == "".join(fake.answer(MESSAGES))
+    # Shown as they are generated, not all at once at the end: 20 tokens at 200/s take about 0.1 s
+    assert len(deltas) == 20
+    assert arrivals[-1] - arrivals[0] > 0.05
+    assert stats.ttft_ms >= 90
+    assert stats.tokens == 20 and stats.tokens_per_sec > 0
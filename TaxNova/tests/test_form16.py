@@ -0,0 +1,26 @@
+import pytest
+
+from taxnova.form16 import ALL_FIELDS, scan_fields
+
+
+@pytest.mark.parametrize("text, field, expected", [
+    ("Standard deduction under section 16(ia) 50,000", "Standard Deduction", 50000),
+    ("Tax Deducted at Source (TDS) u/s 192 85,000", "TDS Deducted", 85000),
+    ("Taxable Income for FY 2024-25 12,00,000", "Taxable Income", 1200000),
+    ("Health and education cess @ 4% 3,120.50", "Health and Education Cess", 3120.5),
+    ("Deductions under Chapter VI-A 80C 1,50,000", "Chapter VI-A Deductions", 150000),
+    ("Gross Salary (a) Salary as per section 17(1) Rs. 9,87,654.32", "Gross Salary", 987654.32),
+])
+def test_skips_section_numbers_years_and_rates(text, field, expected):
+    assert scan_fields(text, ALL_FIELDS, {})[field] == expected
+
+
+def test_tax_deposited_is_the_total_row():
+    text = ("Q1 Amount of tax deposited / remitted 21,000\n"
+            "Q2 Amount of tax deposited / remitted 21,000\n"
+            "Total amount of tax deposited / remitted 84,000")
+    assert scan_fields(text, ALL_FIELDS, {})["Tax Deposited"] == 84000
+
+
+def test_label_without_an_amount_is_not_found():
+    assert "Taxable Income" not in scan_fields("Taxable Income for FY 2024-25", ALL_FIELDS, {})
@@ -0,0 +1,27 @@
+import pytest
+
+from benchmarks.synthetic_form16 import write_bundle
+from taxnova.form16 import CORE_FIELDS
+from taxnova.form16_bundle import employee_pan, iter_bundle
+
+
+def test_bundle_is_split_into_one_result_per_employee_in_order(tmp_path):
+    path = tmp_path / "bundle.pdf"
+    records = write_bundle(path, 8, seed=5, max_pages=3)
+
+    # Small ranges so certificates straddle range boundaries between workers
+    results = list(iter_bundle(path, workers=2, chunk_pages=3))
+
+    assert [result["pan"] for result in results] == [record["pan"] for record in records]
+    for result, record in zip(results, records):
+        assert result["status"] == "ok"
+        assert (result["first_page"], result["last_page"]) == (record["first_page"], record["last_page"])
+        for field in CORE_FIELDS:
+            assert result[field] == pytest.approx(record[field])
+
+
+def test_employee_pan_skips_the_deductor_pan_in_the_header_row():
+    text = ("PAN of the Deductor TAN of the Deductor PAN of the Employee\n"
+            "AAACT1234Q MUMT12345A ABCDE1234F\n")
+    assert employee_pan(text) == "ABCDE1234F"
+    assert employee_pan("Part B annexure\nGross Salary 500000") is None
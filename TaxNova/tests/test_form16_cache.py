@@ -0,0 +1,50 @@
+import threading
+import time
+
+from taxnova.form16_cache import ExtractionCache
+from taxnova.form16_templates import Region, Template, TemplateIndex
+
+PDF = b"%PDF-1.4 certificate"
+CORE = ("Gross Salary", "TDS Deducted", "Taxable Income")
+
+
+def counting_extract(calls, delay=0.0):
+    def extract(file):
+        time.sleep(delay)
+        calls.append(file.getvalue())
+        return {"Gross Salary": 1200000.0}
+    return extract
+
+
+def template_index(x0):
+    return TemplateIndex([Template("Part B", "abc", {"Gross Salary": Region(0, (x0, 100, 200, 110))}, ())])
+
+
+def test_field_sets_and_template_versions_are_cached_apart(tmp_path):
+    cache = ExtractionCache(disk_dir=tmp_path)
+    calls = []
+    cache.get_or_extract(PDF, counting_extract(calls), CORE)
+    cache.get_or_extract(PDF, counting_extract(calls), CORE + ("Tax Payable",))
+    cache.get_or_extract(PDF, counting_extract(calls), CORE, template_index(50))
+    # A re-learned template set is a new version even under the same layout fingerprint
+    cache.get_or_extract(PDF, counting_extract(calls), CORE, template_index(60))
+    assert len(calls) == 4
+
+    cache.get_or_extract(PDF, counting_extract(calls), CORE, template_index(60))
+    fresh = ExtractionCache(disk_dir=tmp_path)
+    fresh.get_or_extract(PDF, counting_extract(calls), CORE + ("Tax Payable",))
+    assert len(calls) == 4
+    assert (cache.hits, cache.misses, fresh.hits, fresh.misses) == (1, 4, 1, 0)
+
+
+def test_concurrent_callers_parse_once_and_every_call_is_counted():
+    cache = ExtractionCache()
+    calls = []
+    threads = [threading.Thread(target=cache.get_or_extract, args=(PDF, counting_extract(calls, 0.05), CORE))
+               for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (15, 1)
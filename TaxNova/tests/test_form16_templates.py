@@ -0,0 +1,54 @@
+import io
+
+from taxnova.form16 import extract_form16_data
+from taxnova.form16_templates import TemplateIndex, learn
+from taxnova.metrics import metrics
+from taxnova.pdf_writer import PAGE_HEIGHT, Page, iter_pdf, text_op
+
+FIELDS = ("Gross Salary", "TDS Deducted", "Taxable Income")
+
+
+def page(lines):
+    ops = []
+    for number, line in enumerate(lines):
+        y = PAGE_HEIGHT - 50 - 16 * number
+        if isinstance(line, str):
+            ops.append(text_op("F2", 12, 50, y, line))
+        else:
+            label, amount = line
+            ops += [text_op("F1", 10, 50, y, label), text_op("F1", 10, 430, y, f"{amount:,}")]
+    return Page(b"\n".join(ops))
+
+
+def certificate(gross, tds, extra_rows=()):
+    part_a = ["FORM NO. 16", "PART A - Certificate under section 203 of the Income-tax Act, 1961",
+              ("Tax Deducted at Source (TDS) u/s 192", tds)]
+    part_b = ["PART B - Details of Salary Paid", *extra_rows, ("Gross Salary", gross),
+              ("Standard deduction under section 16(ia)", 50000), ("Taxable Income", gross - 50000)]
+    return b"".join(iter_pdf([page(part_a), page(part_b)]))
+
+
+def pages_scanned(pdf, templates):
+    before = metrics.snapshot()["counters"].get("pages_extracted", 0)
+    data = extract_form16_data(io.BytesIO(pdf), FIELDS, templates)
+    return data, metrics.snapshot()["counters"].get("pages_extracted", 0) - before
+
+
+def templates():
+    samples = [io.BytesIO(certificate(600000 + 100000 * number, 20000 + number)) for number in range(5)]
+    return TemplateIndex(learn(samples, "Two-page Form 16"))
+
+
+def test_matching_certificate_is_read_from_its_regions_alone():
+    data, scanned = pages_scanned(certificate(900000, 45000), templates())
+    assert data == {"Gross Salary": 900000, "TDS Deducted": 45000, "Taxable Income": 850000}
+    assert scanned == 0
+
+
+def test_row_shifted_under_a_learned_region_falls_back_to_the_scan():
+    # Same first page, so the template matches, but Part B has an extra row above Gross Salary
+    pdf = certificate(1200000, 45000, [("Value of perquisites u/s 17(2)", 25000)])
+    data, scanned = pages_scanned(pdf, templates())
+    assert data == extract_form16_data(io.BytesIO(pdf), FIELDS)
+    assert data == {"Gross Salary": 1200000, "TDS Deducted": 45000, "Taxable Income": 1150000}
+    assert scanned > 0
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from taxnova.itr_outbox import FAILED, FILED, QUEUED, REJECTED, SUBMITTED, SUBMITTING, ITROutbox, StubPortal
+
+PAYLOAD = {"fy": "2024-25", "Gross Salary": 1200000.0, "TDS Deducted": 85000.0, "Taxable Income": 1150000.0}
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    portal = StubPortal(latency=0, processing_seconds=0, failure_rate=1.0, seed=1)
+    # Workers are never started; each test drains the outbox with run_once
+    return ITROutbox(tmp_path / "itr.db", portal, workers=0, max_attempts=2, backoff_base=0, poll_interval=0)
+
+
+def drain(outbox, rounds=10):
+    for _ in range(rounds):
+        outbox.run_once()
+
+
+def test_failed_submission_is_queued_again_by_a_later_submit(outbox):
+    submission = outbox.submit("doc", PAYLOAD)
+    drain(outbox)
+    assert outbox.get(submission["reference_id"])["status"] == FAILED
+
+    outbox.portal.failure_rate = 0.0
+    again = outbox.submit("doc", PAYLOAD)
+    assert again["reference_id"] == submission["reference_id"]
+    assert (again["status"], again["attempts"]) == (QUEUED, 0)
+    drain(outbox)
+    assert outbox.get(submission["reference_id"])["status"] == FILED
+
+
+def test_rejected_submission_is_only_queued_again_by_retry(outbox):
+    outbox.portal.failure_rate = 0.0
+    submission = outbox.submit("doc", {**PAYLOAD, "Taxable Income": 0})
+    drain(outbox)
+    assert outbox.get(submission["reference_id"])["status"] == REJECTED
+    assert outbox.submit("doc", {**PAYLOAD, "Taxable Income": 0})["status"] == REJECTED
+
+    assert outbox.retry(submission["reference_id"])["status"] == QUEUED
+    assert outbox.retry("ITR-UNKNOWN") is None
+
+
+def test_retry_leaves_live_submissions_alone(outbox):
+    outbox.portal.failure_rate = 0.0
+    submission = outbox.submit("doc", PAYLOAD)
+    outbox.run_once()
+    assert outbox.retry(submission["reference_id"])["status"] in (SUBMITTED, FILED)
+
+
+def test_expired_claim_is_picked_up_again(outbox):
+    outbox.portal.failure_rate = 0.0
+    outbox.lease_seconds = 0.2
+    submission = outbox.submit("doc", PAYLOAD)
+    # A worker claims the batch and dies before submitting it
+    claimed = outbox._claim((QUEUED, SUBMITTING), SUBMITTING, outbox.lease_seconds)
+    assert [row["reference_id"] for row in claimed] == [submission["reference_id"]]
+    assert outbox._claim((QUEUED, SUBMITTING), SUBMITTING, outbox.lease_seconds) == []
+
+    time.sleep(0.3)
+    drain(outbox)
+    assert outbox.get(submission["reference_id"])["status"] == FILED
@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.fake_groq import FakeGroq
+from taxnova.llm_client import LLMClient, LLMUnavailableError
+from taxnova.llm_scheduler import LLMScheduler
+from taxnova.model_router import ModelRouter, parse_routes
+
+MODEL = "fake-model"
+
+
+class RecordingGroq(FakeGroq):
+    """Remembers the questions in the order the server started answering them."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.questions = []
+
+    def answer(self, messages):
+        self.questions.append(messages[-1]["content"])
+        return super().answer(messages)
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(**options):
+        fake = RecordingGroq(**{"ttft_ms": 50, "ttft_jitter_ms": 0, "tokens_per_sec": 2000,
+                                "answer_tokens": 10, "seed": 1, **options})
+        servers.append(fake)
+        return fake, LLMClient(api_key="test", base_url=fake.serve(), backoff_base=0, max_retries=1)
+
+    yield start
+    for fake in servers:
+        fake.shutdown()
+
+
+def ask(question):
+    return [{"role": "user", "content": question}]
+
+
+def text(chunks):
+    return "".join(chunk.choices[0].delta.content or "" for chunk in chunks)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_identical_streams_share_one_upstream_request(serve):
+    fake, llm = serve(ttft_ms=300)
+    scheduler = LLMScheduler(llm)
+    answers = []
+    threads = [threading.Thread(target=lambda: answers.append(
+        text(scheduler.chat_stream(MODEL, ask("What is the 80C  limit?"))))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert fake.counters["streams"] == 1
+    assert scheduler.coalesced == 4
+    assert len(set(answers)) == 1 and answers[0]
+
+
+def test_stream_that_is_never_read_opens_nothing(serve):
+    fake, llm = serve()
+    scheduler = LLMScheduler(llm)
+    unread = scheduler.chat_stream(MODEL, ask("Unread"))
+    assert scheduler.stats()["shared_streams"] == 0
+    del unread
+
+    # A later identical request starts its own stream rather than joining a dead one
+    assert text(scheduler.chat_stream(MODEL, ask("Unread")))
+    assert fake.counters["streams"] == 1
+
+
+def test_interactive_turn_is_admitted_before_earlier_background_work(serve):
+    fake, llm = serve()
+    scheduler = LLMScheduler(llm, slots=1)
+    release = threading.Event()
+
+    def hold_the_slot():
+        stream = scheduler.chat_stream(MODEL, ask("first"))
+        next(stream)
+        release.wait()
+        text(stream)
+
+    threads = [threading.Thread(target=hold_the_slot)]
+    threads[0].start()
+    wait_for(lambda: fake.questions == ["first"])
+    threads.append(threading.Thread(target=lambda: scheduler.chat(MODEL, ask("background"))))
+    threads[1].start()
+    wait_for(lambda: scheduler.stats()["queued_background"] == 1)
+    threads.append(threading.Thread(target=lambda: text(scheduler.chat_stream(MODEL, ask("interactive")))))
+    threads[2].start()
+    wait_for(lambda: scheduler.stats()["queued_interactive"] == 1)
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert fake.questions == ["first", "interactive", "background"]
+
+
+def test_background_work_holds_back_after_a_429(serve):
+    fake, llm = serve()
+    scheduler = LLMScheduler(llm, background_timeout=0.2)
+    llm.last_throttled_at = time.monotonic()
+    with pytest.raises(LLMUnavailableError):
+        scheduler.chat(MODEL, ask("background"))
+    assert text(scheduler.chat_stream(MODEL, ask("interactive")))
+    assert fake.questions == ["interactive"]
+
+
+def test_router_falls_back_when_a_route_fails_and_then_tries_it_last(serve):
+    broken, broken_llm = serve(error_rate=1.0)
+    healthy, healthy_llm = serve()
+    endpoints = {"broken": broken_llm, "healthy": healthy_llm}
+    router = ModelRouter(parse_routes("model-a@broken, model-b@healthy", endpoints.get),
+                         max_consecutive_failures=1)
+
+    assert text(router.chat_stream(MODEL, ask("What is the 80C limit?")))
+    assert router.stats()["fallbacks"] == 1
+    # One try and one retry before giving up on the broken route
+    assert broken.counters["errors"] == 2
+
+    chain, decision = router.plan(ask("What is the 80D limit?"))
+    assert [route.name for route in chain] == ["model-b@healthy", "model-a@broken"]
+    assert decision["degraded"] == "model-a@broken"
+    assert router.chat(MODEL, ask("What is the 80D limit?")).choices[0].message.content
+    assert broken.counters["errors"] == 2
@@ -0,0 +1,49 @@
+from taxnova.model_router import ModelRouter, complexity, parse_routes
+
+SPEC = "small-fast:4096, big-fast@backup:131072, big-strong:131072:strong"
+
+
+def ask(question):
+    return [{"role": "user", "content": question}]
+
+
+def names(chain):
+    return [route.name for route in chain]
+
+
+def test_parse_routes_reads_endpoint_window_and_strength():
+    routes = parse_routes(SPEC + ",", lambda endpoint: endpoint)
+    assert [(route.name, route.model, route.llm, route.context_tokens, route.strong) for route in routes] == [
+        ("small-fast", "small-fast", "groq", 4096, False),
+        ("big-fast@backup", "big-fast", "backup", 131072, False),
+        ("big-strong", "big-strong", "groq", 131072, True),
+    ]
+
+
+def test_simple_questions_go_fast_and_complex_ones_strong():
+    router = ModelRouter(parse_routes(SPEC, lambda endpoint: None))
+    simple = "What is the 80C limit?"
+    hard = "Compare the old and new regime and calculate which is better on a salary of 18,00,000 with HRA of 2,40,000?"
+    assert complexity(simple) < router.complex_threshold <= complexity(hard)
+
+    chain, decision = router.plan(ask(simple))
+    assert decision["wants"] == "fast" and names(chain)[-1] == "big-strong"
+    chain, decision = router.plan(ask(hard))
+    assert decision["wants"] == "strong" and names(chain)[0] == "big-strong"
+
+
+def test_prompt_too_long_for_a_window_skips_that_route():
+    router = ModelRouter(parse_routes(SPEC, lambda endpoint: None))
+    long_prompt = ask("What is the 80C limit? " + "context " * 4000)
+    chain, decision = router.plan(long_prompt)
+    assert "small-fast" not in names(chain)
+    assert decision["excluded"] == "small-fast"
+
+
+def test_routes_over_the_latency_budget_go_after_the_rest():
+    router = ModelRouter(parse_routes(SPEC, lambda endpoint: None), ttft_budget_ms=1000, min_samples=3)
+    for _ in range(3):
+        router._health["small-fast"].record(True, ttft_ms=2500)
+    chain, decision = router.plan(ask("What is the 80C limit?"))
+    assert names(chain) == ["big-fast@backup", "big-strong", "small-fast"]
+    assert decision["slow"] == "small-fast"
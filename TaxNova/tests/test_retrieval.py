@@ -0,0 +1,50 @@
+import threading
+
+from taxnova import retrieval
+from taxnova.retrieval import RetrievalIndex, build_index
+
+
+def write_corpus(path, limit=150000):
+    path.mkdir(exist_ok=True)
+    (path / "deductions.md").write_text(
+        f"# Deductions\n\n## Section 80C\nInvestments up to {limit} a year are deductible.\n\n"
+        "## Section 80D\nHealth insurance premiums are deductible.\n", encoding="utf-8")
+    return path
+
+
+def test_concurrent_opens_build_the_index_once(tmp_path, monkeypatch):
+    corpus = write_corpus(tmp_path / "corpus")
+    builds = []
+    build = retrieval._build
+    monkeypatch.setattr(retrieval, "_build", lambda *args: builds.append(1) or build(*args))
+    indexes = []
+    threads = [threading.Thread(target=lambda: indexes.append(RetrievalIndex.open(corpus, tmp_path / "index")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+    assert all(index.search("80C limit", min_score=0)[0][1].startswith("Section 80C") for index in indexes)
+
+
+def test_changed_corpus_gets_a_new_index_and_old_ones_stay_readable(tmp_path):
+    corpus = write_corpus(tmp_path / "corpus")
+    old = RetrievalIndex.open(corpus, tmp_path / "index")
+    write_corpus(corpus, limit=200000)
+    new = RetrievalIndex.open(corpus, tmp_path / "index")
+    assert "200000" in new.search("80C", min_score=0)[0][1]
+    # The old directory is gone, but its mapped pages are still there for whoever opened it
+    assert "150000" in old.search("80C", min_score=0)[0][1]
+    assert [path.name for path in (tmp_path / "index").iterdir() if path.is_dir()] == [new_name(corpus)]
+
+
+def test_forced_rebuild_replaces_the_index(tmp_path):
+    corpus = write_corpus(tmp_path / "corpus")
+    first = build_index(corpus, tmp_path / "index")
+    assert build_index(corpus, tmp_path / "index") == first
+    assert RetrievalIndex.open(corpus, tmp_path / "index").size == 2
+
+
+def new_name(corpus):
+    return retrieval._index_name(retrieval.corpus_fingerprint(corpus))
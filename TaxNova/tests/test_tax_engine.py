@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from taxnova.tax_engine import (TAX_RULES, compute_tax, compute_tax_batch, get_tax_table,
+                                identify_deductions, slab_tax)
+
+
+def legacy_tax(taxable):
+    # The if/elif slab chain the page used before the vectorized engine
+    if taxable <= 250000:
+        return 0
+    elif taxable <= 500000:
+        return (taxable - 250000) * 0.05
+    elif taxable <= 1000000:
+        return 12500 + (taxable - 500000) * 0.2
+    return 112500 + (taxable - 1000000) * 0.3
+
+
+BOUNDARIES = [0, 1, 249999, 250000, 250001, 499999, 500000, 500001, 999999, 1000000, 1000001, 5432109.5]
+
+
+def test_slab_tax_matches_the_legacy_chain_at_every_boundary():
+    assert slab_tax(BOUNDARIES) == pytest.approx([legacy_tax(income) for income in BOUNDARIES])
+    assert slab_tax([-5000])[0] == 0
+
+
+def test_batch_and_single_taxpayer_agree_with_the_legacy_page():
+    incomes = np.array([300000, 800000, 1600000, 2500000], dtype=float)
+    tds = np.array([0, 40000, 150000, 500000], dtype=float)
+    batch = compute_tax_batch(incomes, tds)
+    for row, (income, paid) in enumerate(zip(incomes, tds)):
+        deductions = identify_deductions(income)
+        assert deductions["Section 80C (Investments)"] == min(income * 0.1, 150000)
+        single = compute_tax(income, paid, sum(deductions.values()))
+        after = max(0, income - sum(deductions.values()))
+        assert single["tax_liability"] == pytest.approx(legacy_tax(after))
+        assert single["tax_due"] == pytest.approx(max(0, legacy_tax(after) - paid))
+        assert batch.loc[row, "tax_due"] == pytest.approx(single["tax_due"])
+
+
+@pytest.mark.parametrize("fy, regime", sorted(TAX_RULES))
+def test_tables_match_a_slab_by_slab_loop(fy, regime):
+    rules = TAX_RULES[(fy, regime)]
+    slabs = rules["slabs"]["below_60"] if isinstance(rules["slabs"], dict) else rules["slabs"]
+    incomes = sorted({lower + delta for lower, _ in slabs for delta in (-1, 0, 1) if lower + delta >= 0})
+
+    def loop_tax(income):
+        uppers = [lower for lower, _ in slabs[1:]] + [float("inf")]
+        return sum(max(0, min(income, upper) - lower) * rate for (lower, rate), upper in zip(slabs, uppers))
+
+    assert get_tax_table(fy, regime).slab_tax(np.array(incomes, dtype=float)) == pytest.approx(
+        [loop_tax(income) for income in incomes])